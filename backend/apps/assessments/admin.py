@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import Assessment, Question, Choice, AssessmentAttempt
+
+
+@admin.register(Assessment)
+class AssessmentAdmin(admin.ModelAdmin):
+    list_display = ("id", "title", "course", "created_at")
+    search_fields = ("title",)
+
+
+admin.site.register(Question)
+admin.site.register(Choice)
+admin.site.register(AssessmentAttempt)
@@ -0,0 +1,286 @@
+"""
+Assessment Item Analysis
+
+Computes classical item statistics for an assessment: per-question difficulty,
+discrimination index, point-biserial correlation, distractor frequencies and
+per-student percentile ranks.
+
+All submitted answers are loaded in a single query and packed into an
+attempts x questions response matrix, so every statistic is a handful of
+numpy operations over that matrix instead of a query or loop per question.
+Results are cached per assessment and invalidated when an attempt changes
+(see signals.py).
+"""
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import AssessmentAttempt, AttemptAnswer, Choice, Question
+
+
+# Share of attempts in the upper and lower groups used for the
+# discrimination index (Kelley's 27% rule)
+GROUP_FRACTION = 0.27
+
+CACHE_TIMEOUT = 60 * 60
+
+UNANSWERED = -1
+
+
+def item_analysis_cache_key(assessment_id):
+    return f"assessments:item_analysis:{assessment_id}"
+
+
+def invalidate_item_analysis(assessment_id):
+    """Drop the cached statistics for an assessment."""
+    cache.delete(item_analysis_cache_key(assessment_id))
+
+
+def build_response_matrix(attempt_ids, question_ids, choice_ids, choice_positions,
+                          answer_attempts, answer_questions, answer_choices):
+    """
+    Scatter raw answer rows into an attempts x questions matrix.
+
+    Args:
+        attempt_ids (ndarray): Sorted attempt ids, one row each
+        question_ids (ndarray): Question ids in display order, one column each
+        choice_ids (ndarray): Sorted choice ids
+        choice_positions (ndarray): Position of each choice within its question
+        answer_attempts, answer_questions, answer_choices (ndarray):
+            One entry per submitted answer
+
+    Returns:
+        ndarray: int16 matrix of chosen choice positions, UNANSWERED where
+        no choice was recorded
+    """
+    responses = np.full((len(attempt_ids), len(question_ids)), UNANSWERED, dtype=np.int16)
+    if len(answer_attempts) == 0:
+        return responses
+
+    question_order = np.argsort(question_ids)
+    sorted_questions = question_ids[question_order]
+
+    rows = np.searchsorted(attempt_ids, answer_attempts)
+    cols = question_order[np.searchsorted(sorted_questions, answer_questions)]
+    responses[rows, cols] = choice_positions[np.searchsorted(choice_ids, answer_choices)]
+    return responses
+
+
+def compute_item_statistics(responses, correct, n_choices, group_fraction=GROUP_FRACTION):
+    """
+    Compute item statistics from a response matrix.
+
+    Args:
+        responses (ndarray): attempts x questions matrix of chosen choice
+            positions, UNANSWERED for skipped questions
+        correct (ndarray): Position of the correct choice for each question
+        n_choices (int): Largest number of choices on any question
+        group_fraction (float): Share of attempts in the upper/lower groups
+
+    Returns:
+        dict: Arrays keyed by statistic name
+    """
+    n_attempts, n_questions = responses.shape
+    is_correct = responses == correct[np.newaxis, :]
+    scores = is_correct.sum(axis=1)
+
+    # Distractor frequencies: one bincount over (question, choice) cells,
+    # with an extra trailing column per question for unanswered
+    cells = np.where(responses >= 0, responses, n_choices)
+    flat = (np.arange(n_questions) * (n_choices + 1))[np.newaxis, :] + cells
+    choice_counts = np.bincount(
+        flat.ravel(), minlength=n_questions * (n_choices + 1)
+    ).reshape(n_questions, n_choices + 1)
+
+    if n_attempts == 0:
+        zeros = np.zeros(n_questions)
+        return {
+            "scores": scores,
+            "difficulty": zeros,
+            "discrimination": zeros,
+            "point_biserial": zeros,
+            "choice_counts": choice_counts,
+        }
+
+    correct_f = is_correct.astype(np.float64)
+
+    # Difficulty (p-value): share of attempts answering correctly
+    difficulty = correct_f.mean(axis=0)
+
+    # Discrimination index: p(upper group) - p(lower group)
+    group_size = max(1, int(round(n_attempts * group_fraction)))
+    ranked = np.argsort(scores, kind='stable')
+    lower = correct_f[ranked[:group_size]].mean(axis=0)
+    upper = correct_f[ranked[-group_size:]].mean(axis=0)
+    discrimination = upper - lower
+
+    # Point-biserial correlation between each item and the total score
+    score_f = scores.astype(np.float64)
+    score_std = score_f.std()
+    n_correct = correct_f.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_correct = (correct_f.T @ score_f) / n_correct
+        mean_wrong = ((1.0 - correct_f).T @ score_f) / (n_attempts - n_correct)
+        point_biserial = (
+            (mean_correct - mean_wrong) / score_std
+            * np.sqrt(difficulty * (1.0 - difficulty))
+        )
+    point_biserial = np.nan_to_num(point_biserial, nan=0.0, posinf=0.0, neginf=0.0)
+
+    return {
+        "scores": scores,
+        "difficulty": difficulty,
+        "discrimination": discrimination,
+        "point_biserial": point_biserial,
+        "choice_counts": choice_counts,
+    }
+
+
+def percentile_ranks(scores):
+    """
+    Percentile rank of each score within the group.
+
+    Uses the mid-rank definition: share of scores strictly below plus half
+    of the ties, as a percentage.
+    """
+    if len(scores) == 0:
+        return np.zeros(0)
+    sorted_scores = np.sort(scores)
+    below = np.searchsorted(sorted_scores, scores, side='left')
+    ties = np.searchsorted(sorted_scores, scores, side='right') - below
+    return (below + 0.5 * ties) / len(scores) * 100
+
+
+def best_score_per_student(student_ids, scores):
+    """
+    Reduce per-attempt scores to each student's best score.
+
+    Returns:
+        tuple: (unique student ids, best score for each)
+    """
+    students, inverse = np.unique(student_ids, return_inverse=True)
+    best = np.zeros(len(students), dtype=scores.dtype)
+    np.maximum.at(best, inverse, scores)
+    return students, best
+
+
+def build_item_analysis(assessment):
+    """
+    Compute the item analysis report for an assessment from the database.
+
+    Only submitted attempts are included.
+    """
+    questions = list(
+        Question.objects.filter(assessment=assessment).values_list('id', 'text')
+    )
+    choices = list(
+        Choice.objects.filter(question__assessment=assessment)
+        .order_by('question_id', 'order', 'id')
+        .values_list('id', 'question_id', 'text', 'is_correct')
+    )
+    attempts = list(
+        AssessmentAttempt.objects.filter(
+            assessment=assessment,
+            submitted_at__isnull=False
+        ).order_by('id').values_list('id', 'student_id', 'student__username')
+    )
+    answers = AttemptAnswer.objects.filter(
+        attempt__assessment=assessment,
+        attempt__submitted_at__isnull=False,
+        choice__isnull=False
+    ).values_list('attempt_id', 'question_id', 'choice_id')
+    answer_rows = np.array(list(answers), dtype=np.int64).reshape(-1, 3)
+
+    question_ids = np.array([q[0] for q in questions], dtype=np.int64)
+    attempt_ids = np.array([a[0] for a in attempts], dtype=np.int64)
+    attempt_students = np.array([a[1] for a in attempts], dtype=np.int64)
+
+    # Position of each choice within its question, and the correct position
+    choices_by_question = {}
+    for choice_id, question_id, text, is_correct in choices:
+        choices_by_question.setdefault(question_id, []).append((choice_id, text, is_correct))
+
+    correct = np.full(len(questions), -2, dtype=np.int16)
+    n_choices = 0
+    position_by_id = {}
+    for column, (question_id, _) in enumerate(questions):
+        question_choices = choices_by_question.get(question_id, [])
+        n_choices = max(n_choices, len(question_choices))
+        for position, (choice_id, _, is_correct) in enumerate(question_choices):
+            position_by_id[choice_id] = position
+            if is_correct and correct[column] < 0:
+                correct[column] = position
+
+    choice_ids = np.sort(np.array([c[0] for c in choices], dtype=np.int64))
+    choice_positions = np.array(
+        [position_by_id[c] for c in choice_ids], dtype=np.int16
+    )
+
+    responses = build_response_matrix(
+        attempt_ids, question_ids, choice_ids, choice_positions,
+        answer_rows[:, 0], answer_rows[:, 1], answer_rows[:, 2]
+    )
+    stats = compute_item_statistics(responses, correct, n_choices)
+
+    # Percentile ranks are per student, based on their best attempt
+    students, best = best_score_per_student(attempt_students, stats["scores"])
+    ranks = percentile_ranks(best)
+    usernames = {a[1]: a[2] for a in attempts}
+
+    n_attempts = len(attempts)
+    questions_data = []
+    for column, (question_id, text) in enumerate(questions):
+        counts = stats["choice_counts"][column]
+        choices_data = []
+        for position, (choice_id, choice_text, is_correct) in enumerate(
+            choices_by_question.get(question_id, [])
+        ):
+            count = int(counts[position])
+            choices_data.append({
+                "choice_id": choice_id,
+                "text": choice_text,
+                "is_correct": is_correct,
+                "count": count,
+                "frequency": round(count / n_attempts, 4) if n_attempts else 0,
+            })
+
+        questions_data.append({
+            "question_id": question_id,
+            "text": text,
+            "difficulty": round(float(stats["difficulty"][column]), 4),
+            "discrimination": round(float(stats["discrimination"][column]), 4),
+            "point_biserial": round(float(stats["point_biserial"][column]), 4),
+            "unanswered": int(counts[n_choices]),
+            "choices": choices_data,
+        })
+
+    students_data = [
+        {
+            "student_id": int(student_id),
+            "student_username": usernames[int(student_id)],
+            "best_score": int(score),
+            "percentile_rank": round(float(rank), 2),
+        }
+        for student_id, score, rank in zip(students, best, ranks)
+    ]
+    students_data.sort(key=lambda s: s["percentile_rank"], reverse=True)
+
+    return {
+        "assessment_id": assessment.id,
+        "assessment_title": assessment.title,
+        "total_questions": len(questions),
+        "total_attempts": n_attempts,
+        "total_students": len(students_data),
+        "questions": questions_data,
+        "students": students_data,
+    }
+
+
+def get_item_analysis(assessment):
+    """Return the cached item analysis report, computing it on a miss."""
+    key = item_analysis_cache_key(assessment.id)
+    report = cache.get(key)
+    if report is None:
+        report = build_item_analysis(assessment)
+        cache.set(key, report, CACHE_TIMEOUT)
+    return report
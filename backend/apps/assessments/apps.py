@@ -1,6 +1,11 @@
+# assessments app
 from django.apps import AppConfig
 
 
 class AssessmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.assessments'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.assessments.signals  # noqa
@@ -0,0 +1,440 @@
+"""
+Timed Exam Sessions
+
+Keeps the state of in-progress attempts in the cache so that answer
+autosaves never touch the database:
+
+- start_session() creates (or resumes) an attempt, fixes its server-side
+  deadline and caches the attempt state plus the assessment's answer key.
+- autosave() validates a full answer snapshot against the cached key and
+  overwrites the cached state. The attempt is marked dirty in this process.
+  Reading and rewriting an attempt's state happens under a per-attempt
+  lock key in the cache, so racing saves in different workers can't
+  replace a newer snapshot with an older one.
+- A background thread per process flushes dirty attempts every
+  EXAM_AUTOSAVE_FLUSH_INTERVAL seconds, upserting answers in batches.
+  It takes the same locks and skips attempts submitted in the meantime.
+- submit_session() flushes the attempt, scores it and marks it submitted.
+  It is idempotent: repeated or racing submits return the same result.
+
+State and locks are only shared between workers through a shared cache,
+so the views refuse to run sessions unless EXAM_SESSIONS_ENABLED is set.
+"""
+
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.courses.background import start_periodic
+from .analytics import invalidate_item_analysis
+from .models import AssessmentAttempt, AttemptAnswer, Question
+
+
+FLUSH_INTERVAL = getattr(settings, 'EXAM_AUTOSAVE_FLUSH_INTERVAL', 5)
+FLUSH_BATCH_SIZE = getattr(settings, 'EXAM_AUTOSAVE_BATCH_SIZE', 1000)
+
+# Autosaves arriving slightly after the deadline are still accepted to
+# absorb client clock skew and network latency
+DEADLINE_GRACE_SECONDS = getattr(settings, 'EXAM_DEADLINE_GRACE_SECONDS', 10)
+
+# Untimed attempts keep their cached state for this long after the last save
+UNTIMED_STATE_TIMEOUT = 60 * 60 * 24
+
+# An attempt's state lock expires after LOCK_TIMEOUT seconds in case its
+# holder dies; callers give up after waiting LOCK_WAIT seconds for it
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.01
+
+
+def is_enabled():
+    return getattr(settings, 'EXAM_SESSIONS_ENABLED', False)
+
+
+class ExamSessionError(Exception):
+    """Raised when an autosave or submit is not allowed."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _state_key(attempt_id):
+    return f"exam:attempt:{attempt_id}"
+
+
+def _answer_key_key(assessment_id):
+    return f"exam:answer_key:{assessment_id}"
+
+
+def _lock_key(attempt_id):
+    return f"exam:attempt:{attempt_id}:lock"
+
+
+# ===== DIRTY ATTEMPT TRACKING =====
+
+_dirty = set()
+_dirty_lock = threading.Lock()
+
+
+def _mark_dirty(attempt_id):
+    with _dirty_lock:
+        _dirty.add(attempt_id)
+    start_periodic("exam-autosave-flusher", FLUSH_INTERVAL, flush_autosaves)
+
+
+# ===== CACHED STATE =====
+
+def _answer_key(assessment_id):
+    """
+    Map of question id to the set of valid choice ids, cached per assessment.
+    """
+    key = _answer_key_key(assessment_id)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = {}
+        questions = Question.objects.filter(
+            assessment_id=assessment_id
+        ).prefetch_related('choices')
+        for question in questions:
+            answer_key[question.id] = {c.id for c in question.choices.all()}
+        cache.set(key, answer_key, UNTIMED_STATE_TIMEOUT)
+    return answer_key
+
+
+def invalidate_answer_key(assessment_id):
+    cache.delete(_answer_key_key(assessment_id))
+
+
+def _state_timeout(state):
+    if state["deadline"] is None:
+        return UNTIMED_STATE_TIMEOUT
+    remaining = state["deadline"] - time.time()
+    return max(int(remaining) + DEADLINE_GRACE_SECONDS + 60 * 60, 60)
+
+
+def _load_state(attempt):
+    """Build the cached state for an attempt from the database."""
+    answers = dict(
+        AttemptAnswer.objects.filter(attempt=attempt).values_list('question_id', 'choice_id')
+    )
+    return {
+        "attempt_id": attempt.id,
+        "assessment_id": attempt.assessment_id,
+        "student_id": attempt.student_id,
+        "deadline": attempt.deadline.timestamp() if attempt.deadline else None,
+        "submitted": attempt.submitted_at is not None,
+        "answers": answers,
+        "seq": 0,
+    }
+
+
+def _get_state(attempt_id):
+    state = cache.get(_state_key(attempt_id))
+    if state is None:
+        attempt = AssessmentAttempt.objects.filter(pk=attempt_id).first()
+        if attempt is None:
+            return None
+        state = _load_state(attempt)
+        cache.set(_state_key(attempt_id), state, _state_timeout(state))
+    return state
+
+
+def _acquire(attempt_id):
+    """
+    Try once to take the attempt's state lock. cache.add() is atomic, so
+    only one worker at a time gets it.
+
+    Returns:
+        str: Token to release the lock with, or None if it is held
+    """
+    token = uuid.uuid4().hex
+    if cache.add(_lock_key(attempt_id), token, LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def _release(attempt_id, token):
+    """
+    Drop the lock only if it is still ours. A holder that ran past
+    LOCK_TIMEOUT must not release the lock another worker took since.
+    The cache API has no compare-and-delete, so a lock expiring between
+    the get and the delete can still be dropped; LOCK_TIMEOUT is far
+    longer than any holder should need.
+    """
+    key = _lock_key(attempt_id)
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+@contextmanager
+def _locked(attempt_id):
+    """Hold the attempt's state lock, waiting up to LOCK_WAIT seconds for it."""
+    deadline = time.monotonic() + LOCK_WAIT
+    token = _acquire(attempt_id)
+    while token is None:
+        if time.monotonic() > deadline:
+            raise ExamSessionError("Attempt is busy, please retry", status_code=409)
+        time.sleep(LOCK_POLL_INTERVAL)
+        token = _acquire(attempt_id)
+    try:
+        yield
+    finally:
+        _release(attempt_id, token)
+
+
+def remaining_seconds(state):
+    if state["deadline"] is None:
+        return None
+    return max(0, int(state["deadline"] - time.time()))
+
+
+# ===== PUBLIC API =====
+
+def start_session(assessment, student):
+    """
+    Start a new attempt or resume the student's in-progress one.
+
+    Returns:
+        dict: Cached session state
+    """
+    attempt = AssessmentAttempt.objects.filter(
+        assessment=assessment,
+        student=student,
+        submitted_at__isnull=True
+    ).first()
+
+    if attempt is None:
+        deadline = None
+        if assessment.time_limit_minutes:
+            deadline = timezone.now() + timedelta(minutes=assessment.time_limit_minutes)
+        attempt = AssessmentAttempt.objects.create(
+            assessment=assessment,
+            student=student,
+            deadline=deadline
+        )
+
+    # Warm the answer key so autosaves can validate without the database
+    _answer_key(assessment.id)
+
+    state = cache.get(_state_key(attempt.id))
+    if state is None:
+        state = _load_state(attempt)
+        cache.set(_state_key(attempt.id), state, _state_timeout(state))
+    return state
+
+
+def autosave(attempt_id, student_id, answers, seq):
+    """
+    Store a full snapshot of the student's answers in the cache.
+
+    Args:
+        attempt_id (int): Attempt being autosaved
+        student_id (int): Authenticated student
+        answers (dict): Question id -> choice id (or None to clear)
+        seq (int): Client sequence number; older snapshots are ignored.
+            None saves the snapshot as the newest
+
+    Returns:
+        dict: Cached session state after the save
+    """
+    with _locked(attempt_id):
+        state = _get_state(attempt_id)
+        if state is None or state["student_id"] != student_id:
+            raise ExamSessionError("Attempt not found", status_code=404)
+        if state["submitted"]:
+            raise ExamSessionError("Attempt already submitted", status_code=409)
+        if state["deadline"] is not None and time.time() > state["deadline"] + DEADLINE_GRACE_SECONDS:
+            raise ExamSessionError("Time limit exceeded", status_code=403)
+
+        if seq is None:
+            seq = state["seq"] + 1
+        # Out-of-order delivery: keep the newest snapshot only
+        if seq <= state["seq"]:
+            return state
+
+        state["answers"] = _clean_answers(state["assessment_id"], answers)
+        state["seq"] = seq
+        cache.set(_state_key(attempt_id), state, _state_timeout(state))
+    _mark_dirty(attempt_id)
+    return state
+
+
+def _clean_answers(assessment_id, answers):
+    """Validate a snapshot against the answer key; question id -> choice id."""
+    answer_key = _answer_key(assessment_id)
+    cleaned = {}
+    for question_id, choice_id in answers.items():
+        try:
+            question_id = int(question_id)
+            choice_id = int(choice_id) if choice_id is not None else None
+        except (TypeError, ValueError):
+            raise ExamSessionError(f"Invalid answer for question {question_id}")
+        valid_choices = answer_key.get(question_id)
+        if valid_choices is None or (choice_id is not None and choice_id not in valid_choices):
+            raise ExamSessionError(f"Invalid answer for question {question_id}")
+        cleaned[question_id] = choice_id
+    return cleaned
+
+
+def _write_answers(states):
+    """Upsert the cached answers of several attempts in batched writes."""
+    rows = [
+        AttemptAnswer(attempt_id=state["attempt_id"], question_id=question_id, choice_id=choice_id)
+        for state in states
+        for question_id, choice_id in state["answers"].items()
+    ]
+    if not rows:
+        return 0
+    AttemptAnswer.objects.bulk_create(
+        rows,
+        batch_size=FLUSH_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['attempt', 'question'],
+        update_fields=['choice']
+    )
+    return len(rows)
+
+
+def flush_autosaves():
+    """
+    Write every attempt autosaved in this process since the last flush.
+
+    Each chunk is written under its attempts' locks and only for attempts
+    still open in the database, so a flush can't overwrite the answers
+    submit_session() scored with an older snapshot. Attempts whose lock is
+    busy are left for the next round.
+
+    Returns:
+        int: Number of answer rows written
+    """
+    with _dirty_lock:
+        if not _dirty:
+            return 0
+        attempt_ids = list(_dirty)
+        _dirty.clear()
+
+    written = 0
+    try:
+        for start in range(0, len(attempt_ids), FLUSH_BATCH_SIZE):
+            chunk = attempt_ids[start:start + FLUSH_BATCH_SIZE]
+            tokens = {}
+            busy = []
+            for attempt_id in chunk:
+                token = _acquire(attempt_id)
+                if token is None:
+                    busy.append(attempt_id)
+                else:
+                    tokens[attempt_id] = token
+            try:
+                with transaction.atomic():
+                    open_ids = AssessmentAttempt.objects.filter(
+                        pk__in=list(tokens),
+                        submitted_at__isnull=True
+                    ).values_list('id', flat=True)
+                    cached = cache.get_many([_state_key(a) for a in open_ids])
+                    states = [s for s in cached.values() if not s["submitted"]]
+                    written += _write_answers(states)
+            finally:
+                for attempt_id, token in tokens.items():
+                    _release(attempt_id, token)
+            with _dirty_lock:
+                _dirty.update(busy)
+    except Exception:
+        # Put the attempts back so the next round retries them
+        with _dirty_lock:
+            _dirty.update(attempt_ids)
+        raise
+    return written
+
+
+def submit_session(attempt_id, student_id, answers=None, seq=None):
+    """
+    Finalize an attempt and return its score.
+
+    A final answer snapshot may be included; it is applied like an autosave
+    if the deadline has not passed. Safe to call repeatedly.
+
+    Returns:
+        AssessmentAttempt: The submitted attempt
+    """
+    attempt = AssessmentAttempt.objects.filter(pk=attempt_id, student_id=student_id).first()
+    if attempt is None:
+        raise ExamSessionError("Attempt not found", status_code=404)
+    if attempt.submitted_at is not None:
+        return attempt
+
+    if answers is not None:
+        try:
+            autosave(attempt_id, student_id, answers, seq)
+        except ExamSessionError as e:
+            # Late final snapshots are dropped; the last saved answers count
+            if e.status_code != 403:
+                raise
+
+    correct_answers = AttemptAnswer.objects.filter(
+        attempt_id=OuterRef('pk'),
+        choice__is_correct=True
+    ).order_by().values('attempt_id').annotate(total=Count('id')).values('total')
+
+    # Under the lock, no autosave can slip in between the answers written
+    # here and the state being marked submitted
+    with _locked(attempt_id):
+        state = _get_state(attempt_id)
+        with _dirty_lock:
+            _dirty.discard(attempt_id)
+
+        with transaction.atomic():
+            _write_answers([state])
+
+            # Conditional update scored in the same statement: only the first
+            # of several racing submits wins
+            updated = AssessmentAttempt.objects.filter(
+                pk=attempt_id,
+                submitted_at__isnull=True
+            ).update(
+                score=Coalesce(Subquery(correct_answers), 0),
+                submitted_at=timezone.now()
+            )
+
+        if updated:
+            state["submitted"] = True
+            cache.set(_state_key(attempt_id), state, _state_timeout(state))
+            invalidate_item_analysis(attempt.assessment_id)
+
+    attempt.refresh_from_db()
+    return attempt
+
+
+def close_expired_attempts():
+    """
+    Submit every attempt whose deadline (plus grace) has passed.
+
+    Returns:
+        int: Number of attempts closed
+    """
+    cutoff = timezone.now() - timedelta(seconds=DEADLINE_GRACE_SECONDS)
+    expired = AssessmentAttempt.objects.filter(
+        submitted_at__isnull=True,
+        deadline__lt=cutoff
+    ).values_list('id', 'student_id')
+
+    closed = 0
+    for attempt_id, student_id in expired:
+        try:
+            submit_session(attempt_id, student_id)
+        except ExamSessionError:
+            # Busy with a racing save or submit; the next run retries it
+            continue
+        closed += 1
+    return closed
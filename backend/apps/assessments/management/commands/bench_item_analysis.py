@@ -0,0 +1,94 @@
+"""
+Benchmark item analysis on a synthetic dataset.
+
+Generates responses in memory with a simple ability/difficulty model, then
+times matrix assembly from raw answer rows and the statistics computation.
+No database access is needed.
+
+Usage:
+    python manage.py bench_item_analysis --attempts 50000 --questions 40
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.assessments.analytics import (
+    best_score_per_student,
+    build_response_matrix,
+    compute_item_statistics,
+    percentile_ranks,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark assessment item analysis on synthetic attempts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=50000)
+        parser.add_argument('--questions', type=int, default=40)
+        parser.add_argument('--choices', type=int, default=4)
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        n_attempts = options['attempts']
+        n_questions = options['questions']
+        n_choices = options['choices']
+        rng = np.random.default_rng(options['seed'])
+
+        # Synthetic ids and answer key
+        attempt_ids = np.arange(1, n_attempts + 1, dtype=np.int64)
+        question_ids = np.arange(1, n_questions + 1, dtype=np.int64)
+        choice_ids = np.arange(1, n_questions * n_choices + 1, dtype=np.int64)
+        choice_positions = np.tile(np.arange(n_choices, dtype=np.int16), n_questions)
+        correct = rng.integers(0, n_choices, n_questions).astype(np.int16)
+        students = rng.integers(1, options['students'] + 1, n_attempts)
+
+        # Rasch-style responses: P(correct) = sigmoid(ability - difficulty)
+        ability = rng.normal(0, 1, n_attempts)[:, np.newaxis]
+        difficulty = rng.normal(0, 1, n_questions)[np.newaxis, :]
+        p_correct = 1 / (1 + np.exp(difficulty - ability))
+        answered_correctly = rng.random((n_attempts, n_questions)) < p_correct
+        wrong = (correct + rng.integers(1, n_choices, (n_attempts, n_questions))) % n_choices
+        positions = np.where(answered_correctly, correct, wrong)
+
+        # Drop ~2% of answers to simulate skipped questions, then flatten
+        # into the (attempt, question, choice) rows the ORM would return
+        kept = rng.random((n_attempts, n_questions)) >= 0.02
+        rows, cols = np.nonzero(kept)
+        answer_attempts = attempt_ids[rows]
+        answer_questions = question_ids[cols]
+        answer_choices = choice_ids[cols * n_choices + positions[rows, cols]]
+
+        self.stdout.write(
+            f"{n_attempts} attempts x {n_questions} questions "
+            f"({len(answer_attempts)} answers), best of {options['repeat']}"
+        )
+
+        timings = {"build_matrix": [], "statistics": [], "percentiles": []}
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            responses = build_response_matrix(
+                attempt_ids, question_ids, choice_ids, choice_positions,
+                answer_attempts, answer_questions, answer_choices
+            )
+            timings["build_matrix"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            stats = compute_item_statistics(responses, correct, n_choices)
+            timings["statistics"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            _, best = best_score_per_student(students, stats["scores"])
+            percentile_ranks(best)
+            timings["percentiles"].append(time.perf_counter() - start)
+
+        total = 0
+        for stage, values in timings.items():
+            best_time = min(values)
+            total += best_time
+            self.stdout.write(f"  {stage:<14} {best_time * 1000:8.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"  {'total':<14} {total * 1000:8.2f} ms"))
@@ -0,0 +1,21 @@
+"""
+Submit attempts whose deadline has passed.
+
+Intended to run every minute from cron so that abandoned timed attempts
+are scored with their last autosaved answers.
+
+Usage:
+    python manage.py close_expired_exams
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.assessments.exam_sessions import close_expired_attempts
+
+
+class Command(BaseCommand):
+    help = "Submit timed attempts that are past their deadline"
+
+    def handle(self, *args, **options):
+        closed = close_expired_attempts()
+        self.stdout.write(self.style.SUCCESS(f"Closed {closed} expired attempts"))
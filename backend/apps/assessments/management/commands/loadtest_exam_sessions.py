@@ -0,0 +1,173 @@
+"""
+Load test for the exam session service.
+
+Creates a throwaway timed assessment and students, then has a pool of
+threads play concurrent exam takers autosaving every few seconds. Reports
+autosave latency percentiles, throughput, the database rows written by the
+batched flusher and submit latency. Everything created is removed at the
+end unless --keep is given.
+
+Usage:
+    python manage.py loadtest_exam_sessions --takers 3000 --duration 30
+"""
+
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.assessments import exam_sessions
+from apps.assessments.models import Assessment, AssessmentAttempt, AttemptAnswer, Choice, Question
+from apps.courses.models import Course
+from apps.users.models import User
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = "Simulate concurrent exam takers against the exam session service"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--takers', type=int, default=2000)
+        parser.add_argument('--questions', type=int, default=30)
+        parser.add_argument('--duration', type=int, default=20, help="Seconds of autosave traffic")
+        parser.add_argument('--interval', type=float, default=3.0, help="Seconds between autosaves per taker")
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--keep', action='store_true', help="Keep generated data")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        n_takers = options['takers']
+        run_id = int(time.time())
+
+        self.stdout.write(f"Preparing {n_takers} takers x {options['questions']} questions...")
+        teacher = User.objects.create(
+            username=f"loadtest_teacher_{run_id}",
+            role='teacher',
+            teacher_status='approved',
+            password=make_password(None)
+        )
+        course = Course.objects.create(title="Load test", description="Load test", instructor=teacher)
+        assessment = Assessment.objects.create(course=course, title="Load test", time_limit_minutes=60)
+        questions = Question.objects.bulk_create([
+            Question(assessment=assessment, text=f"Q{i}", order=i)
+            for i in range(options['questions'])
+        ])
+        Choice.objects.bulk_create([
+            Choice(question=q, text=f"C{j}", is_correct=(j == 0), order=j)
+            for q in questions for j in range(4)
+        ])
+        choices = {}
+        for choice_id, question_id in Choice.objects.filter(
+            question__assessment=assessment
+        ).values_list('id', 'question_id'):
+            choices.setdefault(question_id, []).append(choice_id)
+
+        unusable = make_password(None)
+        User.objects.bulk_create([
+            User(username=f"loadtest_{run_id}_{i}", role='student', password=unusable)
+            for i in range(n_takers)
+        ], batch_size=1000)
+        students = list(User.objects.filter(username__startswith=f"loadtest_{run_id}_"))
+
+        sessions = [exam_sessions.start_session(assessment, s) for s in students]
+
+        latencies = []
+        latencies_lock = threading.Lock()
+        stop_at = time.perf_counter() + options['duration']
+
+        def take_exams(takers):
+            local = []
+            seqs = {s["attempt_id"]: 0 for s in takers}
+            answers = {s["attempt_id"]: {} for s in takers}
+            next_save = {
+                s["attempt_id"]: time.perf_counter() + rng.random() * options['interval']
+                for s in takers
+            }
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    break
+                due = [a for a, t in next_save.items() if t <= now]
+                if not due:
+                    time.sleep(0.01)
+                    continue
+                for attempt_id in due:
+                    # Answer one more question per save, like a real taker
+                    question_id = rng.choice(list(choices))
+                    answers[attempt_id][question_id] = rng.choice(choices[question_id])
+                    seqs[attempt_id] += 1
+                    start = time.perf_counter()
+                    exam_sessions.autosave(
+                        attempt_id, takers_by_attempt[attempt_id],
+                        answers[attempt_id], seqs[attempt_id]
+                    )
+                    local.append(time.perf_counter() - start)
+                    next_save[attempt_id] = start + options['interval']
+            with latencies_lock:
+                latencies.extend(local)
+            connection.close()
+
+        takers_by_attempt = {s["attempt_id"]: s["student_id"] for s in sessions}
+        n_threads = options['threads']
+        groups = [sessions[i::n_threads] for i in range(n_threads)]
+
+        queries_before = AttemptAnswer.objects.filter(attempt__assessment=assessment).count()
+        self.stdout.write(f"Running autosave traffic for {options['duration']}s on {n_threads} threads...")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            list(pool.map(take_exams, groups))
+        elapsed = time.perf_counter() - started
+
+        flush_start = time.perf_counter()
+        exam_sessions.flush_autosaves()
+        final_flush = time.perf_counter() - flush_start
+        rows = AttemptAnswer.objects.filter(attempt__assessment=assessment).count() - queries_before
+
+        latencies.sort()
+        self.stdout.write("Autosave:")
+        self.stdout.write(f"  requests      {len(latencies)}")
+        self.stdout.write(f"  throughput    {len(latencies) / elapsed:,.0f}/s")
+        self.stdout.write(f"  mean          {statistics.mean(latencies) * 1000 if latencies else 0:.3f} ms")
+        for pct in (50, 95, 99):
+            self.stdout.write(f"  p{pct:<12} {percentile(latencies, pct) * 1000:.3f} ms")
+        self.stdout.write(f"  answer rows   {rows} (final flush {final_flush * 1000:.1f} ms)")
+
+        submit_latencies = []
+
+        def submit(session):
+            start = time.perf_counter()
+            first = exam_sessions.submit_session(session["attempt_id"], session["student_id"])
+            submit_latencies.append(time.perf_counter() - start)
+            # Idempotency: a retried submit must not change the result
+            again = exam_sessions.submit_session(session["attempt_id"], session["student_id"])
+            connection.close()
+            return first.score == again.score and first.submitted_at == again.submitted_at
+
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            consistent = all(pool.map(submit, sessions))
+
+        submit_latencies.sort()
+        self.stdout.write("Submit:")
+        self.stdout.write(f"  p50 {percentile(submit_latencies, 50) * 1000:.1f} ms, "
+                          f"p99 {percentile(submit_latencies, 99) * 1000:.1f} ms")
+        submitted = AssessmentAttempt.objects.filter(
+            assessment=assessment, submitted_at__isnull=False
+        ).count()
+        self.stdout.write(f"  submitted {submitted}/{len(sessions)}, idempotent: {consistent}")
+
+        if not options['keep']:
+            course.delete()
+            User.objects.filter(username__startswith=f"loadtest_{run_id}_").delete()
+            teacher.delete()
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='time_limit_minutes',
+            field=models.PositiveIntegerField(default=0, help_text='Time allowed per attempt in minutes. 0 means untimed'),
+        ),
+        migrations.AddField(
+            model_name='assessmentattempt',
+            name='deadline',
+            field=models.DateTimeField(blank=True, help_text='Server-side cut-off for answers. Empty for untimed assessments', null=True),
+        ),
+    ]
@@ -0,0 +1,116 @@
+from django.db import models
+from apps.users.models import User
+from apps.courses.models import Course
+
+
+class Assessment(models.Model):
+    """
+    A multiple-choice quiz attached to a course.
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='assessments'
+    )
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    time_limit_minutes = models.PositiveIntegerField(
+        default=0,
+        help_text="Time allowed per attempt in minutes. 0 means untimed"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} - {self.course.title}"
+
+
+class Question(models.Model):
+    assessment = models.ForeignKey(
+        Assessment,
+        on_delete=models.CASCADE,
+        related_name='questions'
+    )
+    text = models.TextField()
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order', 'id']
+
+    def __str__(self):
+        return f"Q{self.order} - {self.assessment.title}"
+
+
+class Choice(models.Model):
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='choices'
+    )
+    text = models.CharField(max_length=255)
+    is_correct = models.BooleanField(default=False)
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order', 'id']
+
+    def __str__(self):
+        return self.text
+
+
+class AssessmentAttempt(models.Model):
+    """
+    One student's attempt at an assessment.
+
+    Score is the number of correctly answered questions and is
+    filled in when the attempt is submitted.
+    """
+    assessment = models.ForeignKey(
+        Assessment,
+        on_delete=models.CASCADE,
+        related_name='attempts'
+    )
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='assessment_attempts'
+    )
+    score = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    deadline = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Server-side cut-off for answers. Empty for untimed assessments"
+    )
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.student.username} - {self.assessment.title}"
+
+
+class AttemptAnswer(models.Model):
+    attempt = models.ForeignKey(
+        AssessmentAttempt,
+        on_delete=models.CASCADE,
+        related_name='answers'
+    )
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='answers'
+    )
+    choice = models.ForeignKey(
+        Choice,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='answers'
+    )
+
+    class Meta:
+        unique_together = ('attempt', 'question')
+
+    def __str__(self):
+        return f"{self.attempt} - {self.question}"
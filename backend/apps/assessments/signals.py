@@ -0,0 +1,30 @@
+"""
+Cache invalidation for assessment analytics and exam sessions.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .analytics import invalidate_item_analysis
+from .models import AssessmentAttempt, Choice, Question
+
+
+@receiver(post_save, sender=AssessmentAttempt)
+@receiver(post_delete, sender=AssessmentAttempt)
+def attempt_changed(sender, instance, **kwargs):
+    """Recompute item analysis after an attempt is submitted or removed."""
+    if instance.submitted_at is not None:
+        invalidate_item_analysis(instance.assessment_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def answer_key_changed(sender, instance, **kwargs):
+    """Drop the cached answer key used to validate autosaves."""
+    from .exam_sessions import invalidate_answer_key
+
+    question = instance if sender is Question else instance.question
+    invalidate_answer_key(question.assessment_id)
+    invalidate_item_analysis(question.assessment_id)
@@ -0,0 +1,236 @@
+from unittest import mock
+
+import numpy as np
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.courses.models import Course
+from apps.enrollments.models import Enrollment
+from apps.users.models import User
+
+from . import analytics, exam_sessions
+from .models import Assessment, AttemptAnswer, Choice, Question
+
+
+class ExamSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        course = Course.objects.create(title='Course', description='', instructor=teacher)
+        self.assessment = Assessment.objects.create(course=course, title='Quiz', time_limit_minutes=30)
+        self.question = Question.objects.create(assessment=self.assessment, text='Q1', order=1)
+        self.choice = Choice.objects.create(question=self.question, text='A', is_correct=True, order=1)
+        Choice.objects.create(question=self.question, text='B', order=2)
+        self.student = User.objects.create_user(username='student', password='x', role='student')
+        Enrollment.objects.create(student=self.student, course=course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        # Don't leave autosaves for the exit-time flush to write after the test database is gone
+        self.addCleanup(exam_sessions._dirty.clear)
+
+    def autosave(self, attempt_id, answers, seq):
+        return self.client.put(
+            f"/api/assessments/attempts/{attempt_id}/autosave/",
+            {'answers': answers, 'seq': seq},
+            format='json'
+        )
+
+    def start(self):
+        response = self.client.post(f"/api/assessments/{self.assessment.id}/start/")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_resume_returns_saved_answers(self):
+        attempt_id = self.start()['attempt_id']
+        response = self.autosave(attempt_id, {str(self.question.id): self.choice.id}, 1)
+        self.assertEqual(response.status_code, 202, response.content)
+
+        resumed = self.start()
+        self.assertEqual(resumed['attempt_id'], attempt_id)
+        self.assertEqual(resumed['answers'], {str(self.question.id): self.choice.id})
+        self.assertEqual(resumed['seq'], 1)
+
+    def test_older_snapshot_is_ignored(self):
+        attempt_id = self.start()['attempt_id']
+        self.autosave(attempt_id, {str(self.question.id): self.choice.id}, 2)
+        response = self.autosave(attempt_id, {str(self.question.id): None}, 1)
+        self.assertEqual(response.json()['seq'], 2)
+        self.assertEqual(self.start()['answers'], {str(self.question.id): self.choice.id})
+
+    def test_autosave_waits_for_the_attempt_lock(self):
+        attempt_id = self.start()['attempt_id']
+        cache.add(exam_sessions._lock_key(attempt_id), 1)
+        with mock.patch.object(exam_sessions, 'LOCK_WAIT', 0.05):
+            response = self.autosave(attempt_id, {str(self.question.id): self.choice.id}, 1)
+        self.assertEqual(response.status_code, 409)
+
+        cache.delete(exam_sessions._lock_key(attempt_id))
+        response = self.autosave(attempt_id, {str(self.question.id): self.choice.id}, 1)
+        self.assertEqual(response.status_code, 202)
+
+    def test_expired_lock_holder_keeps_the_new_lock(self):
+        attempt_id = self.start()['attempt_id']
+        key = exam_sessions._lock_key(attempt_id)
+        with exam_sessions._locked(attempt_id):
+            # Our lock timed out and another worker took it
+            cache.set(key, 'other')
+        self.assertEqual(cache.get(key), 'other')
+
+    def test_flush_skips_busy_attempts(self):
+        attempt_id = self.start()['attempt_id']
+        self.autosave(attempt_id, {str(self.question.id): self.choice.id}, 1)
+        key = exam_sessions._lock_key(attempt_id)
+        cache.add(key, 'submit')
+
+        self.assertEqual(exam_sessions.flush_autosaves(), 0)
+        self.assertIn(attempt_id, exam_sessions._dirty)
+
+        cache.delete(key)
+        self.assertEqual(exam_sessions.flush_autosaves(), 1)
+        self.assertEqual(
+            AttemptAnswer.objects.get(attempt_id=attempt_id).choice_id, self.choice.id
+        )
+
+    def test_flush_after_submit_keeps_the_scored_answers(self):
+        attempt_id = self.start()['attempt_id']
+        self.autosave(attempt_id, {str(self.question.id): None}, 1)
+        stale = cache.get(exam_sessions._state_key(attempt_id))
+
+        url = f"/api/assessments/attempts/{attempt_id}/submit/"
+        response = self.client.post(url, {'answers': {str(self.question.id): self.choice.id}}, format='json')
+        self.assertEqual(response.json()['score'], 1)
+
+        # A flush that picked the attempt up before the submit, holding the
+        # state it read back then
+        exam_sessions._dirty.add(attempt_id)
+        cache.set(exam_sessions._state_key(attempt_id), stale)
+        self.assertEqual(exam_sessions.flush_autosaves(), 0)
+        self.assertEqual(
+            AttemptAnswer.objects.get(attempt_id=attempt_id).choice_id, self.choice.id
+        )
+
+    @override_settings(EXAM_SESSIONS_ENABLED=False)
+    def test_sessions_need_a_shared_cache(self):
+        response = self.client.post(f"/api/assessments/{self.assessment.id}/start/")
+        self.assertEqual(response.status_code, 503)
+
+    def test_submit(self):
+        attempt_id = self.start()['attempt_id']
+        self.autosave(attempt_id, {str(self.question.id): None}, 5)
+
+        url = f"/api/assessments/attempts/{attempt_id}/submit/"
+        response = self.client.post(url, {'answers': {}, 'seq': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        # A final snapshot without seq counts over earlier autosaves
+        response = self.client.post(url, {'answers': {str(self.question.id): self.choice.id}}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['score'], 1)
+        self.assertEqual(self.autosave(attempt_id, {}, 6).status_code, 409)
+
+
+class ItemStatisticsTests(TestCase):
+    # Four attempts over three questions; correct positions 0, 1, 0.
+    # Scores are 3, 2, 1, 0 and the last question is skipped twice
+    RESPONSES = np.array([
+        [0, 1, 0],
+        [0, 1, 2],
+        [0, 0, -1],
+        [1, 2, -1],
+    ], dtype=np.int16)
+    CORRECT = np.array([0, 1, 0], dtype=np.int16)
+
+    def test_statistics(self):
+        stats = analytics.compute_item_statistics(self.RESPONSES, self.CORRECT, n_choices=3)
+
+        self.assertEqual(stats["scores"].tolist(), [3, 2, 1, 0])
+        np.testing.assert_allclose(stats["difficulty"], [0.75, 0.5, 0.25])
+        # 27% of four attempts rounds to groups of one: the best and worst
+        np.testing.assert_allclose(stats["discrimination"], [1, 1, 1])
+        # (mean score if correct - if wrong) / std * sqrt(p * q), std = sqrt(1.25)
+        np.testing.assert_allclose(
+            stats["point_biserial"], [np.sqrt(0.6), np.sqrt(0.8), np.sqrt(0.6)]
+        )
+        # Last column counts unanswered
+        self.assertEqual(
+            stats["choice_counts"].tolist(),
+            [[3, 1, 0, 0], [1, 2, 1, 0], [1, 0, 1, 2]]
+        )
+
+    def test_discrimination_groups(self):
+        stats = analytics.compute_item_statistics(
+            self.RESPONSES, self.CORRECT, n_choices=3, group_fraction=0.5
+        )
+        # Upper group scored 3 and 2, lower group 1 and 0
+        np.testing.assert_allclose(stats["discrimination"], [0.5, 1, 0.5])
+
+    def test_zero_variance(self):
+        responses = np.array([[0, 1], [0, 1]], dtype=np.int16)
+        stats = analytics.compute_item_statistics(responses, np.array([0, 0]), n_choices=2)
+        np.testing.assert_allclose(stats["difficulty"], [1, 0])
+        np.testing.assert_allclose(stats["discrimination"], [0, 0])
+        np.testing.assert_allclose(stats["point_biserial"], [0, 0])
+
+    def test_single_attempt(self):
+        responses = np.array([[0, -1]], dtype=np.int16)
+        stats = analytics.compute_item_statistics(responses, np.array([0, 0]), n_choices=2)
+        np.testing.assert_allclose(stats["difficulty"], [1, 0])
+        np.testing.assert_allclose(stats["discrimination"], [0, 0])
+        np.testing.assert_allclose(stats["point_biserial"], [0, 0])
+        self.assertEqual(stats["choice_counts"].tolist(), [[1, 0, 0], [0, 0, 1]])
+
+    def test_no_attempts(self):
+        responses = np.empty((0, 2), dtype=np.int16)
+        stats = analytics.compute_item_statistics(responses, np.array([0, 0]), n_choices=2)
+        np.testing.assert_allclose(stats["difficulty"], [0, 0])
+        self.assertEqual(stats["choice_counts"].tolist(), [[0, 0, 0], [0, 0, 0]])
+
+    def test_percentile_ranks(self):
+        # Share strictly below plus half the ties
+        ranks = analytics.percentile_ranks(np.array([3, 2, 2, 0]))
+        np.testing.assert_allclose(ranks, [87.5, 50, 50, 12.5])
+
+    def test_best_score_per_student(self):
+        students, best = analytics.best_score_per_student(np.array([5, 7, 5]), np.array([1, 3, 2]))
+        self.assertEqual((students.tolist(), best.tolist()), ([5, 7], [2, 3]))
+
+
+class ItemAnalysisEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        course = Course.objects.create(title='Course', description='', instructor=self.teacher)
+        self.assessment = Assessment.objects.create(course=course, title='Quiz')
+        question = Question.objects.create(assessment=self.assessment, text='Q1', order=1)
+        self.choice = Choice.objects.create(question=question, text='A', is_correct=True, order=1)
+        self.question = question
+        self.student = User.objects.create_user(username='student', password='x', role='student')
+        Enrollment.objects.create(student=self.student, course=course)
+        self.url = f"/api/courses/teacher/{course.id}/assessments/{self.assessment.id}/item-analysis/"
+        self.client = APIClient()
+        self.addCleanup(exam_sessions._dirty.clear)
+
+    def get(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get(self.url)
+
+    def test_only_the_instructor_can_view(self):
+        other = User.objects.create_user(username='other', password='x', role='teacher')
+        self.assertEqual(self.get(other).status_code, 403)
+        self.assertEqual(self.get(self.student).status_code, 403)
+        self.assertEqual(self.get(self.teacher).status_code, 200)
+
+    def test_submit_refreshes_the_report(self):
+        self.assertEqual(self.get(self.teacher).json()['total_attempts'], 0)
+
+        state = exam_sessions.start_session(self.assessment, self.student)
+        exam_sessions.submit_session(
+            state["attempt_id"], self.student.id, {self.question.id: self.choice.id}
+        )
+
+        report = self.get(self.teacher).json()
+        self.assertEqual(report['total_attempts'], 1)
+        self.assertEqual(report['questions'][0]['difficulty'], 1)
+        self.assertEqual(report['students'][0]['percentile_rank'], 50)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import start_exam, autosave_exam, submit_exam
+
+urlpatterns = [
+    path('<int:assessment_id>/start/', start_exam, name='start-exam'),
+    path('attempts/<int:attempt_id>/autosave/', autosave_exam, name='autosave-exam'),
+    path('attempts/<int:attempt_id>/submit/', submit_exam, name='submit-exam'),
+]
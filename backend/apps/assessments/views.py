@@ -0,0 +1,164 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.users.permissions import IsStudent
+from apps.enrollments.models import Enrollment
+from .models import Assessment
+from .exam_sessions import (
+    ExamSessionError,
+    autosave,
+    is_enabled,
+    remaining_seconds,
+    start_session,
+    submit_session,
+)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsStudent])
+def start_exam(request, assessment_id):
+    """
+    Start or resume a timed attempt - student must be enrolled.
+
+    Returns the attempt id, server deadline and any saved answers.
+    """
+    if not is_enabled():
+        return Response(
+            {"error": "Timed exams are unavailable"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    assessment = get_object_or_404(Assessment, pk=assessment_id, course__deleted_at__isnull=True)
+
+    # Check if student is enrolled in the course
+    is_enrolled = Enrollment.objects.filter(
+        student=request.user,
+        course_id=assessment.course_id
+    ).exists()
+
+    if not is_enrolled:
+        return Response(
+            {"error": "You are not enrolled in this course"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    state = start_session(assessment, request.user)
+
+    return Response(
+        {
+            "attempt_id": state["attempt_id"],
+            "assessment_id": assessment.id,
+            "deadline": (
+                datetime.fromtimestamp(state["deadline"], tz=dt_timezone.utc)
+                if state["deadline"] else None
+            ),
+            "remaining_seconds": remaining_seconds(state),
+            "answers": state["answers"],
+            "seq": state["seq"],
+        },
+        status=status.HTTP_200_OK
+    )
+
+
+@api_view(["PUT"])
+@permission_classes([IsAuthenticated, IsStudent])
+def autosave_exam(request, attempt_id):
+    """
+    Autosave answers for an in-progress attempt.
+
+    Accepts:
+    - answers: full snapshot, {question_id: choice_id or null}
+    - seq: increasing client sequence number
+
+    Answers are buffered in the cache and written to the database in batches.
+    """
+    if not is_enabled():
+        return Response(
+            {"error": "Timed exams are unavailable"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    answers = request.data.get('answers')
+    seq = request.data.get('seq')
+
+    if not isinstance(answers, dict):
+        return Response(
+            {"error": "answers must be an object of question_id: choice_id"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        seq = int(seq)
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "seq is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        state = autosave(attempt_id, request.user.id, answers, seq)
+    except ExamSessionError as e:
+        return Response({"error": e.message}, status=e.status_code)
+
+    return Response(
+        {
+            "saved": True,
+            "seq": state["seq"],
+            "remaining_seconds": remaining_seconds(state),
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsStudent])
+def submit_exam(request, attempt_id):
+    """
+    Submit an attempt. Repeated submits return the original result.
+
+    Accepts an optional final answers snapshot, applied if the deadline
+    has not passed.
+    """
+    if not is_enabled():
+        return Response(
+            {"error": "Timed exams are unavailable"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    answers = request.data.get('answers')
+    seq = request.data.get('seq')
+
+    if answers is not None and not isinstance(answers, dict):
+        return Response(
+            {"error": "answers must be an object of question_id: choice_id"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        seq = int(seq) if seq is not None else None
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "seq must be an integer"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        attempt = submit_session(attempt_id, request.user.id, answers, seq)
+    except ExamSessionError as e:
+        return Response({"error": e.message}, status=e.status_code)
+
+    return Response(
+        {
+            "message": "Assessment submitted",
+            "attempt_id": attempt.id,
+            "score": attempt.score,
+            "total_questions": attempt.assessment.questions.count(),
+            "submitted_at": attempt.submitted_at,
+        },
+        status=status.HTTP_200_OK
+    )
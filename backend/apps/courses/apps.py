@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.courses'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.courses.signals  # noqa
@@ -0,0 +1,96 @@
+"""
+Background Work Helpers
+
+Per-process background threads, so slow work never runs on the request:
+
+- start_periodic() runs a flush function every few seconds in one daemon
+  thread per process; used by the write-behind buffers.
+- submit() runs a job on a small bounded worker pool; used for media
+  processing such as video transcoding.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+_periodic = {}
+_periodic_lock = threading.Lock()
+
+
+def start_periodic(name, interval, func):
+    """
+    Run func every interval seconds in a daemon thread, once per process.
+
+    Calling again with the same name is a no-op, so buffers can call this
+    on every write. func is also run at interpreter exit so buffered data
+    is not lost on a clean shutdown.
+    """
+    if name in _periodic:
+        return
+    with _periodic_lock:
+        if name in _periodic:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    func()
+                except Exception:
+                    # Keep the thread alive; the buffer retries next round
+                    logger.exception("Periodic task %s failed", name)
+
+        thread = threading.Thread(target=loop, name=name, daemon=True)
+        thread.start()
+        atexit.register(func)
+        _periodic[name] = thread
+
+
+# ===== BOUNDED WORKER POOL =====
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(getattr(settings, 'BACKGROUND_QUEUE_SIZE', 50))
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                    thread_name_prefix="background-worker"
+                )
+    return _pool
+
+
+def submit(func, *args):
+    """
+    Run func(*args) on the shared worker pool without blocking the caller.
+
+    At most BACKGROUND_QUEUE_SIZE jobs may be running or waiting per
+    process. When the pool is saturated the job is not queued and False is
+    returned; callers leave the work marked pending for the management
+    command that sweeps it up.
+    """
+    if not _slots.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Background job %s failed", getattr(func, '__name__', func))
+        finally:
+            _slots.release()
+
+    _get_pool().submit(run)
+    return True
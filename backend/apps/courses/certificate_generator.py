@@ -15,7 +15,10 @@ from io import BytesIO
 from datetime import datetime
 import os
 
+from eduvillage_backend.metrics import CERTIFICATE_RENDER_SECONDS
 
+
+@CERTIFICATE_RENDER_SECONDS.time()
 def generate_certificate_pdf(student_name, course_title, issued_date):
     """
     Generate a course completion certificate as PDF.
@@ -0,0 +1,152 @@
+"""
+Chunked Course and User Deletion
+
+Calling .delete() on a course or user makes Django's collector load every
+cascaded row (enrollments, progress, submissions, certificates, attempts)
+into memory and delete them in one long transaction. Uploaded files are
+left behind on disk.
+
+Deletion here happens in two steps:
+
+1. delete_course()/delete_user() soft-delete right away. They set
+   deleted_at, which hides the course from Course.objects (and from the
+   search index), or deactivate the user and revoke their tokens.
+2. purge_course()/purge_user() then run on the background pool. They
+   walk the CASCADE relations, deepest first, and delete matching rows
+   DELETION_BATCH_SIZE at a time, each batch in its own short
+   transaction. Files of deleted rows are removed after each batch.
+   Preview derivatives are shared by identical uploads and are only
+   removed once no remaining content uses them.
+
+Purges are idempotent; `python manage.py purge_deleted` finishes any that
+were interrupted or never started (pool saturated, process restarted).
+"""
+
+import os
+import shutil
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.utils import timezone
+
+from apps.users.models import User
+from apps.users.revocation import revoke_tokens
+
+from .background import submit
+from .models import Course, CourseContent
+from .signals import schedule_reindex
+
+
+BATCH_SIZE = getattr(settings, 'DELETION_BATCH_SIZE', 1000)
+
+
+def cascade_plan(model, lookup='pk', _path=()):
+    """
+    Models that cascade from `model`, each with the lookup that selects the
+    rows belonging to one parent, children before their parents.
+    """
+    plan = []
+    for relation in model._meta.related_objects:
+        if relation.many_to_many or relation.on_delete is not models.CASCADE:
+            continue
+        child = relation.related_model
+        if child in _path or child is model:
+            continue
+        plan += cascade_plan(child, f"{relation.field.name}__{lookup}", _path + (model,))
+    plan.append((model, lookup))
+    return plan
+
+
+def _release_files(names):
+    for name in set(names):
+        directory = os.path.dirname(name)
+        if name.startswith('previews/'):
+            # Derivatives are shared by every upload with the same bytes
+            if CourseContent._base_manager.filter(thumbnail=name).exists():
+                continue
+            shutil.rmtree(os.path.join(settings.MEDIA_ROOT, directory), ignore_errors=True)
+        elif name.startswith('hls/'):
+            # The manifest and poster sit next to the renditions' segments
+            shutil.rmtree(os.path.join(settings.MEDIA_ROOT, directory), ignore_errors=True)
+        else:
+            default_storage.delete(name)
+
+
+def delete_in_batches(model, lookup, value, batch_size=BATCH_SIZE):
+    """
+    Delete the rows of `model` matching lookup=value, batch_size at a time.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    manager = model._base_manager
+    file_fields = [
+        field.attname for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+    deleted = 0
+    while True:
+        rows = list(
+            manager.filter(**{lookup: value}).order_by().values('pk', *file_fields)[:batch_size]
+        )
+        if not rows:
+            return deleted
+        with transaction.atomic():
+            manager.filter(pk__in=[row['pk'] for row in rows]).delete()
+        deleted += len(rows)
+        _release_files([row[field] for row in rows for field in file_fields if row[field]])
+
+
+def _purge(model, pk, batch_size):
+    deleted = {}
+    for child, lookup in cascade_plan(model):
+        count = delete_in_batches(child, lookup, pk, batch_size)
+        if count:
+            deleted[child._meta.label] = deleted.get(child._meta.label, 0) + count
+    return deleted
+
+
+def purge_course(course_id, batch_size=BATCH_SIZE):
+    """
+    Delete a soft-deleted course and everything that cascades from it.
+
+    Returns:
+        dict: Rows deleted per model label
+    """
+    if not Course.all_objects.filter(pk=course_id, deleted_at__isnull=False).exists():
+        return {}
+    return _purge(Course, course_id, batch_size)
+
+
+def purge_user(user_id, batch_size=BATCH_SIZE):
+    """Delete a soft-deleted user, their courses and everything below."""
+    if not User.objects.filter(pk=user_id, deleted_at__isnull=False).exists():
+        return {}
+    return _purge(User, user_id, batch_size)
+
+
+def delete_course(course):
+    """Hide the course now and purge it in the background."""
+    course.deleted_at = timezone.now()
+    course.save(update_fields=['deleted_at'])
+    # If the pool is saturated `manage.py purge_deleted` picks it up
+    transaction.on_commit(lambda: submit(purge_course, course.id))
+
+
+@transaction.atomic
+def delete_user(user):
+    """Lock the user out now and purge them in the background."""
+    now = timezone.now()
+    user.is_active = False
+    user.deleted_at = now
+    user.save(update_fields=['is_active', 'deleted_at'])
+    revoke_tokens(user.id)
+
+    # A teacher's courses go with them
+    course_ids = list(Course.objects.filter(instructor=user).values_list('id', flat=True))
+    Course.objects.filter(id__in=course_ids).update(deleted_at=now)
+    for course_id in course_ids:
+        schedule_reindex(course_id)
+
+    transaction.on_commit(lambda: submit(purge_user, user.id))
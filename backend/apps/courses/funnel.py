@@ -0,0 +1,139 @@
+"""
+Content Drop-off Funnel
+
+For each content item of a course, in order, the number of students who
+have completed it. Counting this live means grouping every progress row
+of the course, which is millions of rows for a course with 100k
+students. The counts are kept in the cache instead:
+
+- One counter per content item, plus a marker per course saying the
+  counters were built. A read is one get_many() for the course.
+- The counters are built with one grouped query on the
+  (course, completed, content) index when the marker is missing. A
+  counter missing while the marker is present (new content, or an
+  evicted key) is recounted on its own.
+- Writers call record_completions() once a not-yet-completed row becomes
+  completed: mark_content_complete, and the progress and heartbeat
+  flushers. The counters are incremented after the transaction commits.
+
+Increments can drift: a completion of the same content racing in two
+workers is counted twice, deleted users are not subtracted, and an
+increment landing while the counters are being built is lost. The marker
+expires after FUNNEL_REBUILD_INTERVAL seconds, so the counters are
+rebuilt from the database at least that often.
+
+Completions still in the write-behind queue show up once flushed.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from . import progress_bitmaps
+from .models import StudentCourseProgress
+
+
+REBUILD_INTERVAL = getattr(settings, 'FUNNEL_REBUILD_INTERVAL', 6 * 60 * 60)
+
+
+def _marker_key(course_id):
+    return f"funnel:{course_id}"
+
+
+def _counter_key(course_id, content_id):
+    return f"funnel:{course_id}:{content_id}"
+
+
+def _count(course_id, content_ids=None):
+    """Completions per content id, from the database."""
+    if progress_bitmaps.reads_enabled():
+        return progress_bitmaps.content_counts(course_id, content_ids)
+    rows = StudentCourseProgress.objects.filter(course_id=course_id, completed=True)
+    if content_ids is not None:
+        rows = rows.filter(content_id__in=content_ids)
+    return dict(rows.order_by().values('content_id').annotate(total=Count('pk')).values_list('content_id', 'total'))
+
+
+def completion_counts(course_id, content_ids):
+    """
+    Students who completed each of content_ids.
+
+    Returns:
+        dict: content id -> completed count
+    """
+    marker = _marker_key(course_id)
+    keys = {_counter_key(course_id, content_id): content_id for content_id in content_ids}
+    found = cache.get_many([marker, *keys])
+
+    if marker not in found:
+        totals = _count(course_id)
+        counts = {content_id: totals.get(content_id, 0) for content_id in content_ids}
+        cache.set_many({key: counts[content_id] for key, content_id in keys.items()}, REBUILD_INTERVAL)
+        cache.set(marker, 1, REBUILD_INTERVAL)
+        return counts
+
+    counts = {content_id: found[key] for key, content_id in keys.items() if key in found}
+    missing = [content_id for content_id in content_ids if content_id not in counts]
+    if missing:
+        totals = _count(course_id, missing)
+        for content_id in missing:
+            counts[content_id] = totals.get(content_id, 0)
+            # add() keeps an increment that beat this recount
+            cache.add(_counter_key(course_id, content_id), counts[content_id], REBUILD_INTERVAL)
+    return counts
+
+
+def _increment(completions):
+    for (course_id, content_id), count in completions.items():
+        try:
+            cache.incr(_counter_key(course_id, content_id), count)
+        except ValueError:
+            # Not built; the next read counts it from the database
+            pass
+
+
+def record_completions(completions):
+    """
+    Count new completions once the current transaction commits.
+
+    Args:
+        completions (iterable): (course_id, content_id) per row that went
+            from not completed to completed
+    """
+    completions = Counter(completions)
+    if completions:
+        transaction.on_commit(lambda: _increment(completions))
+
+
+def funnel(course, enrolled):
+    """
+    The course's content in order with completion counts and shares.
+
+    Args:
+        course (Course): The course
+        enrolled (int): Enrolled students, the funnel's 100%
+
+    Returns:
+        list: [{'content_id', 'title', 'content_type', 'completed',
+        'completion_rate', 'drop_off'}]; drop_off is the share of the
+        previous step's completers who did not complete this one
+    """
+    contents = list(course.content.order_by('id').values_list('id', 'title', 'content_type'))
+    counts = completion_counts(course.id, [content_id for content_id, _, _ in contents])
+    steps = []
+    previous = enrolled
+    for content_id, title, content_type in contents:
+        completed = counts[content_id]
+        steps.append({
+            'content_id': content_id,
+            'title': title,
+            'content_type': content_type,
+            'completed': completed,
+            'completion_rate': round(completed / enrolled * 100, 2) if enrolled else 0,
+            'drop_off': round(max(previous - completed, 0) / previous * 100, 2) if previous else 0,
+        })
+        previous = completed
+    return steps
@@ -0,0 +1,280 @@
+"""
+Video Watch-Progress Heartbeats
+
+The video player reports its playback position every few seconds. Each
+heartbeat only updates an in-process dict holding the furthest position
+per (student, content); a background thread flushes that dict every
+VIDEO_HEARTBEAT_FLUSH_INTERVAL seconds with two bulk upserts. Content
+watched past VIDEO_COMPLETE_THRESHOLD percent is marked completed.
+
+Heartbeat validation needs the content's course and type and the
+student's enrollments. Both are cached, so a batch of heartbeats costs no
+database queries once the caches are warm.
+
+A batch the database rejects is retried row by row and rows that still
+fail are dropped, so one bad row cannot hold the rest back. Only when
+the database is unreachable is the whole queue kept for the next flush.
+"""
+
+import logging
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, transaction
+from django.utils import timezone
+
+from apps.enrollments.models import Enrollment
+from . import funnel, progress_bitmaps
+from .background import start_periodic
+from .models import CourseContent, StudentCourseProgress
+
+
+FLUSH_INTERVAL = getattr(settings, 'VIDEO_HEARTBEAT_FLUSH_INTERVAL', 10)
+FLUSH_BATCH_SIZE = getattr(settings, 'VIDEO_HEARTBEAT_BATCH_SIZE', 1000)
+COMPLETE_THRESHOLD = getattr(settings, 'VIDEO_COMPLETE_THRESHOLD', 90)
+MAX_BATCH = getattr(settings, 'VIDEO_HEARTBEAT_MAX_BATCH', 500)
+
+CONTENT_CACHE_TIMEOUT = 60 * 60
+ENROLLMENT_CACHE_TIMEOUT = 5 * 60
+
+logger = logging.getLogger(__name__)
+
+
+# (student_id, content_id) -> [course_id, position_seconds, duration_seconds]
+_positions = {}
+_positions_lock = threading.Lock()
+
+
+def _content_key(content_id):
+    return f"heartbeat:content:{content_id}"
+
+
+def _enrollment_key(student_id):
+    return f"heartbeat:enrolled:{student_id}"
+
+
+def _content_meta(content_ids):
+    """content id -> (course_id, content_type), from cache or one query."""
+    keys = {_content_key(c): c for c in content_ids}
+    meta = {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+
+    missing = [c for c in content_ids if c not in meta]
+    if missing:
+        fetched = {
+            content_id: (course_id, content_type)
+            for content_id, course_id, content_type in CourseContent.objects.filter(
+                id__in=missing
+            ).values_list('id', 'course_id', 'content_type')
+        }
+        cache.set_many(
+            {_content_key(c): v for c, v in fetched.items()},
+            CONTENT_CACHE_TIMEOUT
+        )
+        meta.update(fetched)
+    return meta
+
+
+def _enrolled_course_ids(student_id):
+    key = _enrollment_key(student_id)
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = set(
+            Enrollment.objects.filter(
+                student_id=student_id, course__deleted_at__isnull=True
+            ).values_list('course_id', flat=True)
+        )
+        cache.set(key, course_ids, ENROLLMENT_CACHE_TIMEOUT)
+    return course_ids
+
+
+def ingest(student_id, heartbeats):
+    """
+    Record a batch of heartbeats for one student.
+
+    Args:
+        student_id (int): Authenticated student
+        heartbeats (list): dicts with content_id, position and duration
+            (seconds)
+
+    Returns:
+        tuple: (number accepted, list of rejected content ids)
+    """
+    parsed = []
+    rejected = []
+    for beat in heartbeats:
+        try:
+            content_id = int(beat['content_id'])
+            position = float(beat['position'])
+            duration = float(beat['duration'])
+        except (KeyError, TypeError, ValueError):
+            rejected.append(beat.get('content_id') if isinstance(beat, dict) else None)
+            continue
+        # float() accepts "nan" and "inf"
+        if not (math.isfinite(position) and math.isfinite(duration)) or position < 0 or duration <= 0:
+            rejected.append(content_id)
+            continue
+        parsed.append((content_id, min(position, duration), duration))
+
+    if not parsed:
+        return 0, rejected
+
+    meta = _content_meta({content_id for content_id, _, _ in parsed})
+    enrolled = _enrolled_course_ids(student_id)
+
+    accepted = 0
+    with _positions_lock:
+        for content_id, position, duration in parsed:
+            content = meta.get(content_id)
+            if content is None or content[1] != 'video' or content[0] not in enrolled:
+                rejected.append(content_id)
+                continue
+            entry = _positions.get((student_id, content_id))
+            if entry is None:
+                _positions[(student_id, content_id)] = [content[0], position, duration]
+            elif position > entry[1]:
+                entry[1] = position
+                entry[2] = duration
+            accepted += 1
+
+    start_periodic("video-heartbeat-flusher", FLUSH_INTERVAL, flush)
+    return accepted, rejected
+
+
+def flush():
+    """
+    Write the furthest positions seen since the last flush.
+
+    Positions never move backwards and completion is never cleared: existing
+    rows are read once per batch and only improvements are written.
+
+    Returns:
+        int: Number of progress rows written
+    """
+    with _positions_lock:
+        if not _positions:
+            return 0
+        pending = dict(_positions)
+        _positions.clear()
+
+    items = list(pending.items())
+    written = 0
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        batch = dict(items[start:start + FLUSH_BATCH_SIZE])
+        try:
+            written += _write(batch)
+        except OperationalError:
+            # Database unavailable: keep what is left for the next flush
+            _requeue(dict(items[start:]))
+            raise
+    return written
+
+
+def _write(batch):
+    """Write a batch; if it fails, write it one row at a time, dropping rows that fail alone."""
+    try:
+        return _flush_batch(batch)
+    except OperationalError:
+        raise
+    except Exception:
+        logger.warning("Heartbeat batch failed, writing its rows one by one", exc_info=True)
+    written = 0
+    for key, value in batch.items():
+        try:
+            written += _flush_batch({key: value})
+        except OperationalError:
+            raise
+        except Exception:
+            logger.exception("Dropping watch progress %s for student %s", value, key[0])
+    return written
+
+
+def _requeue(pending):
+    """Put positions back, keeping any further position recorded meanwhile."""
+    with _positions_lock:
+        for key, value in pending.items():
+            entry = _positions.get(key)
+            if entry is None or value[1] > entry[1]:
+                _positions[key] = value
+
+
+def _flush_batch(batch):
+    student_ids = {student_id for student_id, _ in batch}
+    content_ids = {content_id for _, content_id in batch}
+    existing = {
+        (student_id, content_id): (position, completed)
+        for student_id, content_id, position, completed in StudentCourseProgress.objects.filter(
+            student_id__in=student_ids,
+            content_id__in=content_ids
+        ).values_list('student_id', 'content_id', 'position_seconds', 'completed')
+    }
+
+    # Content deleted since the heartbeat would fail the foreign key
+    live = set(CourseContent.objects.filter(id__in=content_ids).values_list('id', flat=True))
+
+    now = timezone.now()
+    progressed = []
+    completed = []
+    for (student_id, content_id), (course_id, position, duration) in batch.items():
+        if content_id not in live:
+            continue
+        stored_position, stored_completed = existing.get((student_id, content_id), (-1, False))
+        furthest = max(position, stored_position)
+        percent = round(furthest / duration * 100, 2)
+        reaches_threshold = percent >= COMPLETE_THRESHOLD and not stored_completed
+        if position <= stored_position and not reaches_threshold:
+            continue
+
+        row = StudentCourseProgress(
+            student_id=student_id,
+            course_id=course_id,
+            content_id=content_id,
+            position_seconds=furthest,
+            percent_watched=percent,
+            completed=reaches_threshold or stored_completed,
+            completed_at=now if reaches_threshold else None
+        )
+        (completed if reaches_threshold else progressed).append(row)
+
+    with transaction.atomic():
+        # Plain progress never touches the completion columns, so a
+        # concurrent mark_content_complete is not overwritten
+        StudentCourseProgress.objects.bulk_create(
+            progressed,
+            update_conflicts=True,
+            unique_fields=['student', 'content'],
+            update_fields=['position_seconds', 'percent_watched']
+        )
+        StudentCourseProgress.objects.bulk_create(
+            completed,
+            update_conflicts=True,
+            unique_fields=['student', 'content'],
+            update_fields=['position_seconds', 'percent_watched', 'completed', 'completed_at']
+        )
+        funnel.record_completions((row.course_id, row.content_id) for row in completed)
+        if progress_bitmaps.writes_enabled():
+            progress_bitmaps.set_completed((row.student_id, row.content_id) for row in completed)
+    return len(progressed) + len(completed)
+
+
+def watch_positions(student_id, course_id):
+    """
+    Resume positions for a student's videos in a course, as of the last
+    flush.
+
+    Returns:
+        dict: content id -> (position_seconds, percent_watched)
+    """
+    return {
+        content_id: (position, percent)
+        for content_id, position, percent in StudentCourseProgress.objects.filter(
+            student_id=student_id,
+            course_id=course_id,
+            content__content_type='video'
+        ).values_list('content_id', 'position_seconds', 'percent_watched')
+    }
+
+
+def invalidate_enrollments(student_id):
+    cache.delete(_enrollment_key(student_id))
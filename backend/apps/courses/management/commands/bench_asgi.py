@@ -0,0 +1,278 @@
+"""
+Compare how many concurrent connections WSGI and ASGI deployments sustain.
+
+Starts the project on a free port with the current settings, once per
+server, with the same number of worker processes:
+
+- wsgi: gunicorn eduvillage_backend.wsgi with gthread workers, each
+  running --threads threads
+- asgi: gunicorn eduvillage_backend.asgi with uvicorn workers
+
+Each server is then driven at every --connections level for --duration
+seconds. Each connection is a keep-alive client that signs in as a seed
+student and downloads one of their certificates (download_certificate)
+over and over. Clients behave like slow mobile ones: each request's
+headers arrive --send-delay-ms after its request line, and responses are
+read at --read-kbps (0 reads as fast as possible). --path requests
+another endpoint as the same students instead.
+
+For every server and level the report has completed requests per
+second, p50/p95/p99 latency and failures. A request fails on a
+connection error, a status >= 400 or no response within --timeout.
+Under WSGI a slow client holds a worker thread while its request
+arrives and its response is sent, so latency climbs once connections
+exceed workers x threads. Under ASGI a waiting client holds a coroutine.
+
+Needs gunicorn and uvicorn, and the data from `manage.py seed_dataset`.
+The servers use this command's settings and database.
+
+Usage:
+    python manage.py bench_asgi [--connections 50,200,500] [--workers 2] [--threads 8] [--send-delay-ms 100]
+"""
+
+import asyncio
+import importlib.util
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.models import Certificate
+from apps.users.serializers import CustomTokenObtainPairSerializer
+
+from .loadtest_api import PREFIX, percentile
+
+
+SERVERS = ('wsgi', 'asgi')
+MODULES = {'wsgi': ('gunicorn',), 'asgi': ('gunicorn', 'uvicorn')}
+READ_CHUNK = 4096
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Client:
+    """One keep-alive connection downloading certificates in a loop."""
+
+    def __init__(self, port, path, token, options, samples):
+        self.port = port
+        self.path = path
+        self.token = token
+        self.send_delay = options['send_delay_ms'] / 1000
+        self.read_rate = options['read_kbps'] * 1024
+        self.timeout = options['timeout']
+        self.samples = samples
+        self.reader = self.writer = None
+        self.responded = False
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = self.writer = None
+
+    async def read_body(self, headers):
+        if 'content-length' in headers:
+            remaining = int(headers['content-length'])
+            while remaining:
+                chunk = await self.reader.read(min(READ_CHUNK, remaining))
+                if not chunk:
+                    raise ConnectionError("Connection closed mid-body")
+                remaining -= len(chunk)
+                await self.throttle(len(chunk))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                await self.throttle(size)
+                if size == 0:
+                    break
+
+    async def throttle(self, size):
+        if self.read_rate:
+            await asyncio.sleep(size / self.read_rate)
+
+    async def request(self):
+        if self.writer is not None:
+            try:
+                return await self.exchange()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if self.responded:
+                    raise
+                # The server closed the idle keep-alive connection; retry like browsers do
+                await self.close()
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        return await self.exchange()
+
+    async def exchange(self):
+        self.responded = False
+        self.writer.write(f"GET {self.path} HTTP/1.1\r\n".encode())
+        await self.writer.drain()
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.writer.write((
+            f"Host: 127.0.0.1:{self.port}\r\n"
+            f"Authorization: Bearer {self.token}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        self.responded = True
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        await self.read_body(headers)
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status
+
+    async def run(self, stop_at):
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(self.request(), self.timeout)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                status = 0
+                await self.close()
+            self.samples.append((time.perf_counter() - start, status))
+        await self.close()
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent-connection capacity of the WSGI and ASGI deployments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='wsgi,asgi')
+        parser.add_argument('--connections', default='50,200,500', help="Concurrent connections per level")
+        parser.add_argument('--duration', type=int, default=15, help="Seconds per level")
+        parser.add_argument('--workers', type=int, default=2, help="Worker processes per server")
+        parser.add_argument('--threads', type=int, default=8, help="Threads per gunicorn worker")
+        parser.add_argument('--send-delay-ms', type=float, default=100.0,
+                            help="Pause between a request's first line and its headers")
+        parser.add_argument('--read-kbps', type=float, default=0.0, help="Client read speed; 0 for unlimited")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Seconds before a request counts as failed")
+        parser.add_argument('--students', type=int, default=100, help="Seed students to spread requests over")
+        parser.add_argument('--path', help="Request this path instead of certificate downloads")
+
+    def handle(self, *args, **options):
+        servers = options['servers'].split(',')
+        for server in servers:
+            if server not in SERVERS:
+                raise CommandError(f"Unknown server {server!r}; choose from {', '.join(SERVERS)}")
+            for module in MODULES[server]:
+                if importlib.util.find_spec(module) is None:
+                    raise CommandError(f"{module} is not installed")
+        levels = [int(level) for level in options['connections'].split(',')]
+
+        # Client and server sockets both count against the open file limit
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = max(levels) * 2 + 256
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+        targets = self.targets(options['students'])
+        if options['path']:
+            targets = [(options['path'], token) for _, token in targets]
+        read = f"{options['read_kbps']:.0f} KB/s" if options['read_kbps'] else "unlimited"
+        self.stdout.write(
+            f"{options['workers']} workers per server, {options['threads']} threads per WSGI worker, "
+            f"send delay {options['send_delay_ms']:.0f} ms, read {read}"
+        )
+        self.stdout.write(
+            f"{'server':<6} {'conns':>6} {'reqs':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'failed':>7}"
+        )
+        for name in servers:
+            process, port = self.start(name, options)
+            try:
+                for level in levels:
+                    self.report(name, level, self.drive(port, targets, level, options), options['duration'])
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    def targets(self, count):
+        """[(download path, access token)] for up to count seed students."""
+        certificates = {}
+        for certificate in Certificate.objects.filter(
+            student__username__startswith=PREFIX, student__is_active=True
+        ).select_related('student').order_by('student_id').iterator():
+            certificates.setdefault(certificate.student_id, certificate)
+            if len(certificates) >= count:
+                break
+        if not certificates:
+            raise CommandError(f"No certificates of {PREFIX} students; run `manage.py seed_dataset` first")
+        return [
+            (
+                f"/api/courses/student/certificates/{certificate.id}/download/",
+                str(CustomTokenObtainPairSerializer.get_token(certificate.student).access_token),
+            )
+            for certificate in certificates.values()
+        ]
+
+    def start(self, name, options):
+        port = _free_port()
+        command = [
+            sys.executable, '-m', 'gunicorn', f"eduvillage_backend.{name}",
+            '--bind', f"127.0.0.1:{port}", '--workers', str(options['workers']),
+            '--timeout', '120', '--log-level', 'warning',
+        ]
+        if name == 'wsgi':
+            command += ['--worker-class', 'gthread', '--threads', str(options['threads'])]
+        else:
+            command += ['--worker-class', 'uvicorn.workers.UvicornWorker']
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"The {name} server exited during startup: {' '.join(command)}")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                # Give every worker time to boot
+                time.sleep(2)
+                return process, port
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f"The {name} server did not start within 30s")
+
+    def drive(self, port, targets, connections, options):
+        samples = []
+
+        async def run():
+            stop_at = time.monotonic() + options['duration']
+            clients = [
+                Client(port, *targets[i % len(targets)], options, samples)
+                for i in range(connections)
+            ]
+            await asyncio.gather(*(client.run(stop_at) for client in clients))
+
+        asyncio.run(run())
+        return samples
+
+    def report(self, name, connections, samples, duration):
+        ok = sorted(latency for latency, status in samples if 0 < status < 400)
+        failed = len(samples) - len(ok)
+        line = (
+            f"{name:<6} {connections:>6} {len(ok):>7} {len(ok) / duration:>8.1f} "
+            f"{percentile(ok, 50) * 1000:>9.1f} {percentile(ok, 95) * 1000:>9.1f} "
+            f"{percentile(ok, 99) * 1000:>9.1f} {failed:>7}"
+        )
+        self.stdout.write(self.style.ERROR(line) if failed else line)
@@ -0,0 +1,103 @@
+"""
+Benchmark response compression.
+
+Compresses list-endpoint-shaped JSON (course rows as the course list and
+browse endpoints return them) with each available encoding at a range of
+levels. For every combination it prints:
+
+- compressed size and ratio, i.e. bytes on the wire
+- compression time and throughput, i.e. CPU per response
+- the time to send the bytes at --mbps, so size and CPU can be compared
+  in the same unit
+
+Usage:
+    python manage.py bench_compression [--rows 100,1000,10000] [--mbps 10]
+
+Levels are set with COMPRESSION_ZSTD_LEVEL, COMPRESSION_BROTLI_QUALITY and
+COMPRESSION_GZIP_LEVEL. The sweet spot is where compress + transfer time is
+lowest for the bandwidth clients actually have.
+"""
+
+import random
+import time
+
+import orjson
+from django.core.management.base import BaseCommand
+
+from eduvillage_backend.compression import AVAILABLE, LEVELS, compress
+
+
+BENCH_LEVELS = {
+    'zstd': (1, 3, 6, 10, 19),
+    'br': (1, 4, 6, 9, 11),
+    'gzip': (1, 6, 9),
+}
+
+WORDS = (
+    "introduction advanced python django data science machine learning web "
+    "development design patterns algorithms databases networks security "
+    "cloud testing deployment analytics statistics calculus physics history"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Compare compressed size and CPU time per encoding and level"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='100,1000,10000')
+        parser.add_argument('--mbps', type=float, default=10.0, help="Client bandwidth in Mbit/s")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for rows in (int(rows) for rows in options['rows'].split(',')):
+            body = self.payload(rows)
+            self.stdout.write(f"\n{rows} rows, {len(body) / 1024:.0f} KB of JSON")
+            self.stdout.write(
+                f"{'encoding':<8} {'level':>5} {'KB':>8} {'ratio':>6} {'ms':>8} {'MB/s':>7} {'send ms':>8} {'total ms':>9}"
+            )
+            self.row('identity', '-', body, body, 0.0, options['mbps'])
+            for encoding in AVAILABLE:
+                for level in BENCH_LEVELS[encoding]:
+                    elapsed, compressed = self.time(encoding, body, level, options['repeat'])
+                    marker = ' *' if level == LEVELS[encoding] else ''
+                    self.row(encoding, f"{level}{marker}", body, compressed, elapsed, options['mbps'])
+        self.stdout.write("\n* configured level")
+
+    def payload(self, rows):
+        # Seeded, so runs are comparable
+        rng = random.Random(rows)
+        return orjson.dumps([
+            {
+                'id': i,
+                'title': ' '.join(rng.choice(WORDS) for _ in range(4)).title(),
+                'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))),
+                'duration': rng.randint(1, 40),
+                'status': rng.choice(('draft', 'published')),
+                'created_at': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T"
+                              f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.{rng.randint(0, 999999):06d}Z",
+                'instructor': rng.randint(1, 500),
+                'instructor_name': f"teacher{rng.randint(1, 500)}",
+                'is_enrolled': rng.random() < 0.1,
+            }
+            for i in range(1, rows + 1)
+        ])
+
+    def time(self, encoding, body, level, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compressed = compress(encoding, body, level)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+            # Slow levels are stable enough; don't repeat them
+            if elapsed > 2000:
+                break
+        return best, compressed
+
+    def row(self, encoding, level, body, compressed, elapsed, mbps):
+        send_ms = len(compressed) * 8 / (mbps * 1000)
+        throughput = len(body) / 1e6 / (elapsed / 1000) if elapsed else float('inf')
+        self.stdout.write(
+            f"{encoding:<8} {level:>5} {len(compressed) / 1024:>8.1f} {len(body) / len(compressed):>5.1f}x "
+            f"{elapsed:>8.2f} {throughput:>7.0f} {send_ms:>8.1f} {elapsed + send_ms:>9.1f}"
+        )
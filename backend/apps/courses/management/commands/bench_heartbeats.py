@@ -0,0 +1,94 @@
+"""
+Benchmark video heartbeat ingestion.
+
+Plays S students watching V videos, sending batched heartbeats from a pool
+of threads, and reports ingest throughput and the database rows written
+by the periodic flush. Generated data is removed at the end.
+
+Usage:
+    python manage.py bench_heartbeats --students 2000 --videos 10 --beats 50
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from apps.courses import heartbeats
+from apps.courses.models import Course, CourseContent, StudentCourseProgress
+from apps.enrollments.models import Enrollment
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Measure video heartbeat ingestion throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--videos', type=int, default=10)
+        parser.add_argument('--beats', type=int, default=50, help="Heartbeats per student per video")
+        parser.add_argument('--batch', type=int, default=10, help="Heartbeats per request")
+        parser.add_argument('--threads', type=int, default=8)
+
+    def handle(self, *args, **options):
+        run_id = int(time.time())
+        unusable = make_password(None)
+        teacher = User.objects.create(
+            username=f"bench_teacher_{run_id}", role='teacher', password=unusable
+        )
+        course = Course.objects.create(title="Bench", description="Bench", instructor=teacher)
+        videos = CourseContent.objects.bulk_create([
+            CourseContent(course=course, title=f"Video {i}", content_type='video')
+            for i in range(options['videos'])
+        ])
+        User.objects.bulk_create([
+            User(username=f"bench_{run_id}_{i}", role='student', password=unusable)
+            for i in range(options['students'])
+        ], batch_size=1000)
+        student_ids = list(
+            User.objects.filter(username__startswith=f"bench_{run_id}_").values_list('id', flat=True)
+        )
+        Enrollment.objects.bulk_create(
+            [Enrollment(student_id=s, course=course) for s in student_ids],
+            batch_size=1000
+        )
+
+        duration = 600.0
+        n_beats = options['beats']
+        batch_size = options['batch']
+
+        def watch(student_id):
+            # One request per batch of heartbeats across the student's videos
+            beats = [
+                {"content_id": video.id, "position": duration * (i + 1) / n_beats, "duration": duration}
+                for i in range(n_beats)
+                for video in videos
+            ]
+            for start in range(0, len(beats), batch_size):
+                heartbeats.ingest(student_id, beats[start:start + batch_size])
+            return len(beats)
+
+        try:
+            total = options['students'] * options['videos'] * n_beats
+            self.stdout.write(f"{total} heartbeats from {len(student_ids)} students on {options['threads']} threads")
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                sent = sum(pool.map(watch, student_ids))
+            ingest_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            written = heartbeats.flush()
+            flush_time = time.perf_counter() - start
+
+            completed = StudentCourseProgress.objects.filter(course=course, completed=True).count()
+            self.stdout.write(f"  ingest   {ingest_time:7.2f} s  {sent / ingest_time:10,.0f} heartbeats/s")
+            self.stdout.write(f"  flush    {flush_time:7.2f} s  {written} rows written")
+            self.stdout.write(self.style.SUCCESS(
+                f"  {sent / max(written, 1):,.0f} heartbeats per DB row, {completed} auto-completed"
+            ))
+        finally:
+            course.delete()
+            User.objects.filter(username__startswith=f"bench_{run_id}_").delete()
+            teacher.delete()
@@ -0,0 +1,122 @@
+"""
+Benchmark content completion writes under concurrent load.
+
+Simulates a class finishing lessons at the same time: every student marks
+every content item complete from a pool of threads. Compares the direct
+path used by mark_content_complete (get_or_create + save per click) with the
+write-behind buffer (queue per click, batched upsert). Generated data is
+removed at the end.
+
+Usage:
+    python manage.py bench_progress_writes --students 500 --contents 20 --threads 16
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+from apps.courses import progress_buffer
+from apps.courses.models import Course, CourseContent, StudentCourseProgress
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compare direct and write-behind completion write throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--contents', type=int, default=20)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--seed', type=int, default=3)
+
+    def handle(self, *args, **options):
+        run_id = int(time.time())
+        unusable = make_password(None)
+        teacher = User.objects.create(
+            username=f"bench_teacher_{run_id}", role='teacher', password=unusable
+        )
+        course = Course.objects.create(title="Bench", description="Bench", instructor=teacher)
+        contents = CourseContent.objects.bulk_create([
+            CourseContent(course=course, title=f"Lesson {i}", content_type='other')
+            for i in range(options['contents'])
+        ])
+        User.objects.bulk_create([
+            User(username=f"bench_{run_id}_{i}", role='student', password=unusable)
+            for i in range(options['students'])
+        ], batch_size=1000)
+        student_ids = list(
+            User.objects.filter(username__startswith=f"bench_{run_id}_").values_list('id', flat=True)
+        )
+
+        events = [(s, c.id) for s in student_ids for c in contents]
+        random.Random(options['seed']).shuffle(events)
+        self.stdout.write(
+            f"{len(events)} completions ({len(student_ids)} students x "
+            f"{len(contents)} contents) on {options['threads']} threads"
+        )
+
+        try:
+            direct = self.run(events, options['threads'], self.direct_write(course))
+            StudentCourseProgress.objects.filter(course=course).delete()
+            buffered = self.run(events, options['threads'], self.buffered_write(course), flush=True)
+            self.report("direct", direct, len(events))
+            self.report("write-behind", buffered, len(events))
+            if direct[0]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"  speedup {direct[0] / buffered[0]:.1f}x"
+                ))
+        finally:
+            course.delete()
+            User.objects.filter(username__startswith=f"bench_{run_id}_").delete()
+            teacher.delete()
+
+    def direct_write(self, course):
+        def write(student_id, content_id):
+            progress, _ = StudentCourseProgress.objects.get_or_create(
+                student_id=student_id,
+                content_id=content_id,
+                defaults={'course': course}
+            )
+            progress.completed = True
+            progress.completed_at = timezone.now()
+            progress.save()
+        return write
+
+    def buffered_write(self, course):
+        def write(student_id, content_id):
+            progress_buffer.record_completion(student_id, course.id, content_id, timezone.now())
+        return write
+
+    def run(self, events, n_threads, write, flush=False):
+        errors = []
+        errors_lock = threading.Lock()
+
+        def worker(chunk):
+            for student_id, content_id in chunk:
+                try:
+                    write(student_id, content_id)
+                except OperationalError:
+                    # SQLite "database is locked" under contention
+                    with errors_lock:
+                        errors.append((student_id, content_id))
+            connection.close()
+
+        chunks = [events[i::n_threads] for i in range(n_threads)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            list(pool.map(worker, chunks))
+        if flush:
+            progress_buffer.flush()
+        return time.perf_counter() - start, len(errors)
+
+    def report(self, label, result, total):
+        elapsed, errors = result
+        self.stdout.write(
+            f"  {label:<13} {elapsed:7.2f} s  {total / elapsed:9,.0f} writes/s  errors: {errors}"
+        )
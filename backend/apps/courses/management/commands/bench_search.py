@@ -0,0 +1,104 @@
+"""
+Benchmark course search.
+
+Creates N synthetic courses with a few content items each, builds the
+index and reports query latency for single-word, multi-word, prefix,
+very common word and deep-page queries. Word frequencies follow a Zipf
+distribution so term selectivity resembles real text. Generated data is removed at the end.
+
+Usage:
+    python manage.py bench_search --courses 100000 --queries 200
+"""
+
+import itertools
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from apps.courses import search
+from apps.courses.models import Course, CourseContent
+from apps.users.models import User
+
+
+SYLLABLES = [consonant + vowel for consonant in "bcdfghjklmnprstvwz" for vowel in "aeiou"]
+
+
+def zipf_vocabulary(rng, size):
+    """Synthetic words with Zipf-distributed frequencies, like real text."""
+    words = sorted({
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(size)
+    })
+    rng.shuffle(words)
+    return words, list(itertools.accumulate(1 / (i + 1) for i in range(len(words))))
+
+
+class Command(BaseCommand):
+    help = "Measure course search latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=100000)
+        parser.add_argument('--contents', type=int, default=3, help="Content items per course")
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--vocabulary', type=int, default=30000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        run_id = int(time.time())
+        teacher = User.objects.create(
+            username=f"bench_teacher_{run_id}", role='teacher', password=make_password(None)
+        )
+
+        words, cum_weights = zipf_vocabulary(rng, options['vocabulary'])
+
+        def phrase(n):
+            return ' '.join(rng.choices(words, cum_weights=cum_weights, k=n))
+
+        try:
+            start = time.perf_counter()
+            courses = Course.objects.bulk_create([
+                Course(title=phrase(4), description=phrase(40), instructor=teacher)
+                for _ in range(options['courses'])
+            ], batch_size=1000)
+            course_ids = list(Course.objects.filter(instructor=teacher).values_list('id', flat=True))
+            CourseContent.objects.bulk_create([
+                CourseContent(course_id=course_id, title=phrase(3), content_type='pdf',
+                              extracted_text=phrase(200))
+                for course_id in course_ids
+                for _ in range(options['contents'])
+            ], batch_size=1000)
+            self.stdout.write(f"{len(courses)} courses created in {time.perf_counter() - start:.1f} s")
+
+            start = time.perf_counter()
+            search.rebuild()
+            self.stdout.write(f"index built in {time.perf_counter() - start:.1f} s")
+
+            # Query words follow the same distribution as the text
+            cases = {
+                'one word': lambda: (phrase(1), 0),
+                'two words': lambda: (phrase(2), 0),
+                'prefix': lambda: (phrase(1)[:4], 0),
+                'common': lambda: (words[rng.randrange(10)], 0),
+                'page 50': lambda: (phrase(1), 49 * 20),
+            }
+            for name, make_query in cases.items():
+                timings = []
+                for _ in range(options['queries']):
+                    query, offset = make_query()
+                    start = time.perf_counter()
+                    search.search_courses(query, limit=20, offset=offset)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f"  {name:10} p50 {statistics.median(timings):7.2f} ms   "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms   "
+                    f"max {timings[-1]:7.2f} ms"
+                )
+        finally:
+            Course.objects.filter(instructor=teacher).delete()
+            teacher.delete()
+            search.rebuild()
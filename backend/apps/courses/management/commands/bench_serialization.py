@@ -0,0 +1,147 @@
+"""
+Benchmark list endpoint serialization.
+
+For each size, builds that many courses, enrollments and certificates for
+one student inside a transaction that is rolled back at the end. It then
+times each list endpoint's serialization both ways:
+
+- before: the DRF ModelSerializer and the stdlib JSON renderer
+- after: the view itself, with its .values() projection and ORJSONRenderer
+  (this includes DRF's per-request overhead)
+
+Both outputs are parsed and compared, so a fast path that drifts from
+the serializer's fields shows up as "differs".
+
+Usage:
+    python manage.py bench_serialization [--sizes 1000,10000,100000] [--repeat 3]
+
+The "before" paths issue a query per row, so 100k rows take minutes.
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.courses.models import Certificate, Course
+from apps.courses.serializers import CertificateSerializer, CourseSerializer
+from apps.courses.views import CourseListCreateView, get_student_certificates
+from apps.enrollments.models import Enrollment
+from apps.enrollments.serializers import CourseEnrollmentSerializer, EnrollmentSerializer
+from apps.enrollments.views import EnrollmentView, browse_courses
+from apps.users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer + JSONRenderer with .values() + ORJSONRenderer"
+
+    factory = APIRequestFactory()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        self.stdout.write(
+            f"{'endpoint':<14} {'rows':>7} {'before ms':>10} {'after ms':>9} {'speedup':>8} {'KB':>8}  output"
+        )
+        for size in sizes:
+            try:
+                with transaction.atomic():
+                    self.bench_size(size, options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def bench_size(self, size, repeat):
+        unusable = make_password(None)
+        teacher = User.objects.create(username="bench_serialization_teacher", role='teacher', password=unusable)
+        student = User.objects.create(
+            username="bench_serialization_student", role='student', password=unusable,
+            first_name="Bench", last_name="Student"
+        )
+        courses = Course.objects.bulk_create([
+            Course(title=f"Course {i}", description=f"Description of course {i}", duration=i % 40, instructor=teacher)
+            for i in range(size)
+        ], batch_size=5000)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course) for course in courses
+        ], batch_size=5000)
+        Certificate.objects.bulk_create([
+            Certificate(student=student, course=course, certificate_file=f"certificates/bench/{course.id}.pdf")
+            for course in courses
+        ], batch_size=5000)
+
+        request = SimpleNamespace(user=student)
+        cases = {
+            'courses': (
+                lambda: CourseSerializer(Course.objects.all(), many=True).data,
+                lambda: self.call(CourseListCreateView.as_view(), student),
+            ),
+            'enrollments': (
+                lambda: EnrollmentSerializer(Enrollment.objects.filter(student=student), many=True).data,
+                lambda: self.call(EnrollmentView.as_view(), student),
+            ),
+            'browse': (
+                lambda: CourseEnrollmentSerializer(
+                    Course.objects.select_related('instructor'), many=True, context={'request': request}
+                ).data,
+                lambda: self.call(browse_courses, student),
+            ),
+            'certificates': (
+                lambda: CertificateSerializer(
+                    Certificate.objects.filter(student=student).select_related('course'), many=True
+                ).data,
+                lambda: self.call(get_student_certificates, student),
+            ),
+        }
+
+        for name, (before, after) in cases.items():
+            before_ms, before_body = self.time(lambda: JSONRenderer().render(before()), repeat)
+            after_ms, after_body = self.time(after, repeat)
+            same = self.normalize(json.loads(before_body)) == self.normalize(json.loads(after_body))
+            self.stdout.write(
+                f"{name:<14} {size:>7} {before_ms:>10.0f} {after_ms:>9.0f} "
+                f"{before_ms / after_ms:>7.1f}x {len(after_body) / 1024:>8.0f}  "
+                + (self.style.SUCCESS("same") if same else self.style.ERROR("differs"))
+            )
+
+    def call(self, view, user):
+        request = self.factory.get('/', HTTP_ACCEPT='application/json')
+        force_authenticate(request, user=user)
+        response = view(request)
+        response.render()
+        return response.content
+
+    def time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = func()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+            # Runs this slow are stable enough; don't repeat them
+            if elapsed > 5000:
+                break
+        return best, body
+
+    def normalize(self, data):
+        # Some endpoints wrap the list with a total; compare rows by id
+        if isinstance(data, dict):
+            data = next(value for value in data.values() if isinstance(value, list))
+        # Signed URLs expire on a step, which a slow run can cross
+        for row in data:
+            for key, value in row.items():
+                if isinstance(value, str) and '?expires=' in value:
+                    row[key] = value.split('?')[0]
+        return sorted(data, key=lambda row: row['id'])
@@ -0,0 +1,28 @@
+"""
+Rebuild co-enrollment course recommendations.
+
+Recomputes each course's most similar courses from all enrollments and
+replaces the CourseSimilarity table (see apps/enrollments/recommendations.py).
+Run it from cron, e.g. hourly or nightly.
+
+Usage:
+    python manage.py build_recommendations
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.enrollments import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute similar courses from co-enrollments"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        result = recommendations.build()
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['enrollments']} enrollments in {result['courses']} courses: "
+            f"stored {result['pairs']} similar-course pairs ({time.monotonic() - started:.1f}s)"
+        ))
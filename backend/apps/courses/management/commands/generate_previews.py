@@ -0,0 +1,45 @@
+"""
+Generate previews for PDFs and documents that are still pending or failed.
+
+Uploads schedule preview generation on the background pool; this command
+sweeps up items left pending (pool saturated, process restarted) or stuck
+in processing past PREVIEW_STALE_AFTER (worker killed mid-job). Failures
+are retried with --retry-failed. Run it from cron or by hand.
+
+Usage:
+    python manage.py generate_previews [--retry-failed] [--content-id 12]
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.models import CourseContent
+from apps.courses.previews import PREVIEW_CONTENT_TYPES, claimable, generate_preview
+
+
+class Command(BaseCommand):
+    help = "Render thumbnails and linearize pending PDF/document content"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true')
+        parser.add_argument('--content-id', type=int)
+
+    def handle(self, *args, **options):
+        retry_failed = options['retry_failed']
+        items = CourseContent.objects.filter(
+            claimable(('pending', 'failed') if retry_failed else ('pending',)),
+            content_type__in=PREVIEW_CONTENT_TYPES
+        ).exclude(file='')
+        if options['content_id']:
+            items = items.filter(pk=options['content_id'])
+
+        for content_id in items.values_list('id', flat=True):
+            generate_preview(content_id, retry_failed=retry_failed)
+            content = CourseContent.objects.get(pk=content_id)
+            if content.preview_status == 'ready':
+                self.stdout.write(self.style.SUCCESS(
+                    f"{content_id}: ready ({content.page_count} pages)"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"{content_id}: {content.preview_status} {content.preview_error}"
+                ))
@@ -0,0 +1,374 @@
+"""
+Load test the HTTP API with a realistic mix of students, teachers and admins.
+
+Runs against the data from `manage.py seed_dataset`. Unless --url is
+given it boots the project on a free port (`runserver --noreload`) with
+the current settings and stops it at the end. Pass --url to test a
+production-like server (gunicorn, uvicorn) instead. In both cases the
+server must use the same database as this command, since virtual users
+are picked from it.
+
+Each virtual user signs in through api/token/ with the seed password,
+then loops over its role's scenario until --duration is up, pausing an
+exponentially distributed think time (mean --think) between requests:
+
+- students browse and search the catalogue, open their courses, check
+  progress and mark content complete
+- teachers open their courses, rosters (students-progress), submissions
+  and dashboards
+- admins view dashboard stats and the user and course lists
+
+Every request is timed from send to the last byte. For each endpoint the
+report has request count, throughput, error rate (status >= 400 or
+connection failure) and mean/p50/p95/p99/max latency. It is printed and
+saved as JSON to --output. With --baseline, the p95 change against an
+earlier run's JSON is printed alongside.
+
+Usage:
+    python manage.py seed_dataset
+    python manage.py loadtest_api --users 50 --duration 60 [--mix 80,15,5] [--baseline old.json]
+"""
+
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.models import Course, CourseContent
+from apps.enrollments.models import Enrollment
+from apps.users.models import User
+
+
+PREFIX = 'seed_'
+
+# (weight, method, path template) per role; templates are filled from the
+# virtual user's own courses and contents
+SCENARIOS = {
+    'student': [
+        (2, 'GET', '/api/enrollments/courses/browse/'),
+        (1, 'GET', '/api/courses/'),
+        (1, 'GET', '/api/courses/search/?q={word}'),
+        (2, 'GET', '/api/courses/student/my-courses/'),
+        (1, 'GET', '/api/enrollments/'),
+        (1, 'GET', '/api/dashboard/student/my-enrollments/'),
+        (3, 'GET', '/api/courses/student/{course_id}/contents/'),
+        (2, 'GET', '/api/courses/student/{course_id}/progress/'),
+        (2, 'POST', '/api/courses/student/{content_id}/complete/'),
+        (1, 'GET', '/api/courses/student/certificates/'),
+    ],
+    'teacher': [
+        (2, 'GET', '/api/courses/teacher/my-courses/'),
+        (3, 'GET', '/api/courses/teacher/{course_id}/students-progress/'),
+        (2, 'GET', '/api/courses/teacher/{course_id}/submissions/'),
+        (1, 'GET', '/api/enrollments/courses/{course_id}/students-count/'),
+        (1, 'GET', '/api/dashboard/teacher/summary/'),
+        (1, 'GET', '/api/dashboard/teacher/course-stats/'),
+    ],
+    'admin': [
+        (3, 'GET', '/api/dashboard/admin/stats/'),
+        (1, 'GET', '/api/users/admin/users/?role=teacher'),
+        (1, 'GET', '/api/users/admin/teachers/approved/'),
+        (1, 'GET', '/api/courses/admin/courses/'),
+    ],
+}
+
+SEARCH_WORDS = ('python', 'data', 'design', 'security', 'history', 'statistics')
+
+# Sent like a browser would, so responses are compressed as in production
+HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate, br, zstd',
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Thread-safe per-endpoint samples: (latency seconds, status)."""
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, latency, status):
+        with self._lock:
+            self._samples.setdefault(endpoint, []).append((latency, status))
+
+    def report(self, elapsed):
+        endpoints = {}
+        all_samples = []
+        for endpoint, samples in sorted(self._samples.items()):
+            endpoints[endpoint] = self.summarize(samples, elapsed)
+            all_samples += samples
+        return self.summarize(all_samples, elapsed), endpoints
+
+    @staticmethod
+    def summarize(samples, elapsed):
+        latencies = sorted(latency for latency, _ in samples)
+        statuses = {}
+        for _, status in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(1 for _, status in samples if status == 0 or status >= 400)
+        return {
+            'requests': len(samples),
+            'throughput': round(len(samples) / elapsed, 2),
+            'errors': errors,
+            'error_rate': round(errors / len(samples), 4) if samples else 0,
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0,
+            'statuses': statuses,
+        }
+
+
+class VirtualUser:
+    def __init__(self, base_url, role, username, password, courses, contents, recorder, rng):
+        self.base = urlsplit(base_url)
+        self.role = role
+        self.username = username
+        self.password = password
+        self.courses = courses
+        self.contents = contents
+        self.recorder = recorder
+        self.rng = rng
+        self.token = None
+        self.connection = None
+        self.scenario = [entry for entry in SCENARIOS[role] if self.can_fill(entry[2])]
+        self.weights = [weight for weight, _, _ in self.scenario]
+
+    def can_fill(self, template):
+        if '{course_id}' in template and not self.courses:
+            return False
+        if '{content_id}' in template and not self.contents:
+            return False
+        return True
+
+    def request(self, method, path, endpoint, body=None):
+        headers = dict(HEADERS)
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.base.hostname, self.base.port, timeout=60)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+            if response.getheader('Connection', '').lower() == 'close':
+                self.close()
+        except (OSError, http.client.HTTPException):
+            data, status = b'', 0
+            self.close()
+        self.recorder.add(endpoint, time.perf_counter() - start, status)
+        return status, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def sign_in(self):
+        status, data = self.request(
+            'POST', '/api/token/', 'POST /api/token/',
+            {'username': self.username, 'password': self.password}
+        )
+        self.token = json.loads(data)['access'] if status == 200 else None
+        return self.token is not None
+
+    def run(self, stop_at, think):
+        try:
+            if not self.sign_in():
+                return
+            while time.perf_counter() < stop_at:
+                _, method, template = self.rng.choices(self.scenario, self.weights)[0]
+                path = template.format(
+                    course_id=self.rng.choice(self.courses) if self.courses else '',
+                    content_id=self.rng.choice(self.contents) if self.contents else '',
+                    word=self.rng.choice(SEARCH_WORDS),
+                )
+                status, _ = self.request(method, path, f"{method} {template}")
+                if status == 401:
+                    self.sign_in()
+                if think:
+                    time.sleep(min(self.rng.expovariate(1 / think), max(0, stop_at - time.perf_counter())))
+        finally:
+            self.close()
+
+
+class Command(BaseCommand):
+    help = "Drive the API with concurrent students, teachers and admins and report latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Server to test; by default one is started with runserver")
+        parser.add_argument('--users', type=int, default=50, help="Concurrent virtual users")
+        parser.add_argument('--mix', default='80,15,5', help="Student,teacher,admin percentages")
+        parser.add_argument('--duration', type=int, default=60, help="Seconds of traffic")
+        parser.add_argument('--ramp-up', type=float, default=5.0, help="Seconds over which users start")
+        parser.add_argument('--think', type=float, default=0.5, help="Mean seconds between a user's requests")
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--seed', type=int, default=11)
+        parser.add_argument('--output', help="JSON results path (default loadtest-<time>.json)")
+        parser.add_argument('--baseline', help="Earlier results JSON to compare p95 against")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users = self.pick_users(options, rng)
+
+        server = None
+        url = options['url']
+        if not url:
+            server, url = self.start_server()
+        try:
+            elapsed, recorder = self.run(url, users, options, rng)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        total, endpoints = recorder.report(elapsed)
+        results = {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'url': url,
+            'config': {
+                key: options[key]
+                for key in ('users', 'mix', 'duration', 'ramp_up', 'think', 'seed')
+            },
+            'elapsed_seconds': round(elapsed, 2),
+            'total': total,
+            'endpoints': endpoints,
+        }
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                previous = json.load(f)
+            baseline = {**previous['endpoints'], 'TOTAL': previous['total']}
+        self.print_report(total, endpoints, baseline)
+
+        output = options['output'] or f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json"
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(f"Saved {output}")
+
+    def pick_users(self, options, rng):
+        """[(role, username, course ids, content ids)] for --users virtual users."""
+        mix = [int(part) for part in options['mix'].split(',')]
+        if len(mix) != 3 or sum(mix) <= 0:
+            raise CommandError("--mix takes three percentages: students,teachers,admins")
+        counts = [options['users'] * share // sum(mix) for share in mix]
+        counts[0] += options['users'] - sum(counts)
+
+        seed_users = User.objects.filter(username__startswith=PREFIX, is_active=True, deleted_at__isnull=True)
+        picked = []
+        for role, count in zip(('student', 'teacher', 'admin'), counts):
+            if not count:
+                continue
+            candidates = list(seed_users.filter(role=role).values_list('id', 'username'))
+            if not candidates:
+                raise CommandError(f"No {PREFIX}{role} users; run `manage.py seed_dataset` first")
+            # Admins are few, so several virtual users may share one
+            chosen = rng.sample(candidates, count) if count <= len(candidates) else rng.choices(candidates, k=count)
+            for user_id, username in chosen:
+                if role == 'student':
+                    courses = list(Enrollment.objects.filter(
+                        student_id=user_id, course__deleted_at__isnull=True
+                    ).values_list('course_id', flat=True))
+                elif role == 'teacher':
+                    courses = list(Course.objects.filter(instructor_id=user_id).values_list('id', flat=True))
+                else:
+                    courses = []
+                contents = list(CourseContent.objects.filter(
+                    course_id__in=courses
+                ).values_list('id', flat=True)) if role == 'student' else []
+                picked.append((role, username, courses, contents))
+        return picked
+
+    def start_server(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        server = subprocess.Popen(
+            [sys.executable, manage, 'runserver', f"127.0.0.1:{port}", '--noreload'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("The server exited during startup; run it yourself and pass --url")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                self.stdout.write(f"Started runserver on port {port}")
+                return server, f"http://127.0.0.1:{port}"
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("The server did not start within 30s")
+
+    def run(self, url, users, options, rng):
+        recorder = Recorder()
+        ramp_step = options['ramp_up'] / max(1, len(users))
+        roles = {}
+        for role, *_ in users:
+            roles[role] = roles.get(role, 0) + 1
+        self.stdout.write(
+            f"{len(users)} users ({', '.join(f'{n} {role}s' for role, n in roles.items())}) "
+            f"for {options['duration']}s against {url}"
+        )
+
+        started = time.perf_counter()
+        stop_at = started + options['ramp_up'] + options['duration']
+        threads = []
+        for i, (role, username, courses, contents) in enumerate(users):
+            user = VirtualUser(
+                url, role, username, options['password'], courses, contents,
+                recorder, random.Random(rng.random())
+            )
+            thread = threading.Thread(target=user.run, args=(stop_at, options['think']), daemon=True)
+            # Stagger starts so sign-ins don't all land at once
+            time.sleep(ramp_step)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, recorder
+
+    def print_report(self, total, endpoints, baseline):
+        header = f"{'endpoint':<62} {'reqs':>6} {'req/s':>7} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}"
+        if baseline is not None:
+            header += f" {'p95 vs base':>12}"
+        self.stdout.write(header)
+        for endpoint, stats in list(endpoints.items()) + [('TOTAL', total)]:
+            line = (
+                f"{endpoint:<62} {stats['requests']:>6} {stats['throughput']:>7.1f} "
+                f"{stats['error_rate'] * 100:>5.1f}% {stats['p50_ms']:>8.1f} "
+                f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+            )
+            if baseline is not None:
+                before = baseline.get(endpoint, {}).get('p95_ms')
+                line += f" {(stats['p95_ms'] / before - 1) * 100:>+11.0f}%" if before else f" {'-':>12}"
+            style = self.style.ERROR if stats['error_rate'] > 0.01 else (lambda text: text)
+            self.stdout.write(style(line))
+        self.stdout.write("Latencies in ms")
@@ -0,0 +1,99 @@
+"""
+Backfill CourseProgressBitmap from StudentCourseProgress rows.
+
+Gives content without one a bit position, then ORs each student's
+completed rows into their bitmap, --batch-size students per transaction.
+Bits set meanwhile by PROGRESS_BITMAP_WRITES are kept, so the command
+can run while completions come in and can be re-run safely. --verify
+compares every bitmap with the rows instead and lists the courses that
+differ. See apps/courses/progress_bitmaps.py for the rollout.
+
+Usage:
+    python manage.py migrate_progress_bitmaps [--course 12 --course 13] [--batch-size 1000] [--verify]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Length
+
+from apps.courses import progress_bitmaps
+from apps.courses.models import Course, CourseProgressBitmap, StudentCourseProgress
+
+
+def completed_rows(course_id, positions):
+    """student id -> bitset built from the course's completed rows."""
+    bits_by_student = {}
+    for student_id, content_id in StudentCourseProgress.objects.filter(
+        course_id=course_id, completed=True
+    ).values_list('student_id', 'content_id').iterator(chunk_size=10000):
+        if content_id in positions:
+            bits_by_student[student_id] = bits_by_student.get(student_id, 0) | 1 << positions[content_id]
+    return bits_by_student
+
+
+class Command(BaseCommand):
+    help = "Build progress bitmaps from progress rows, or compare the two"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', help="Only this course (repeatable)")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Students per transaction")
+        parser.add_argument('--verify', action='store_true', help="Compare bitmaps with rows instead of writing them")
+
+    def handle(self, *args, **options):
+        course_ids = options['course'] or list(
+            Course.all_objects.order_by('id').values_list('id', flat=True)
+        )
+        started = time.monotonic()
+        if options['verify']:
+            self.verify(course_ids)
+        else:
+            self.backfill(course_ids, options['batch_size'])
+
+        rows = StudentCourseProgress.objects.filter(course_id__in=course_ids).count()
+        bitmaps = CourseProgressBitmap.objects.filter(course_id__in=course_ids)
+        size = bitmaps.aggregate(total=Sum(Length('completed')))['total'] or 0
+        self.stdout.write(
+            f"{len(course_ids)} courses: {rows} progress rows, {bitmaps.count()} bitmaps "
+            f"holding {size} bytes ({time.monotonic() - started:.1f}s)"
+        )
+
+    def backfill(self, course_ids, batch_size):
+        for course_id in course_ids:
+            bits_by_student = completed_rows(course_id, progress_bitmaps.positions(course_id))
+            student_ids = sorted(bits_by_student)
+            for start in range(0, len(student_ids), batch_size):
+                with transaction.atomic():
+                    progress_bitmaps.merge(
+                        course_id,
+                        {student_id: bits_by_student[student_id] for student_id in student_ids[start:start + batch_size]}
+                    )
+            self.stdout.write(f"course {course_id}: {len(student_ids)} students")
+
+    def verify(self, course_ids):
+        mismatched = 0
+        for course_id in course_ids:
+            positions = progress_bitmaps.positions(course_id)
+            live = progress_bitmaps.mask(positions.values())
+            expected = completed_rows(course_id, positions)
+            stored = {
+                student_id: progress_bitmaps.to_int(data) & live
+                for student_id, data in CourseProgressBitmap.objects.filter(
+                    course_id=course_id
+                ).values_list('student_id', 'completed').iterator(chunk_size=10000)
+            }
+            differing = [
+                student_id for student_id in expected.keys() | stored.keys()
+                if expected.get(student_id, 0) != stored.get(student_id, 0)
+            ]
+            if differing:
+                mismatched += 1
+                self.stdout.write(self.style.ERROR(
+                    f"course {course_id}: {len(differing)} students differ, e.g. {sorted(differing)[:10]}"
+                ))
+        if mismatched:
+            self.stdout.write(self.style.ERROR(f"{mismatched} of {len(course_ids)} courses differ"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"All {len(course_ids)} courses match"))
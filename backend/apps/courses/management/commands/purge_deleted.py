@@ -0,0 +1,40 @@
+"""
+Purge soft-deleted courses and users (see apps/courses/deletion.py).
+
+Deleting a course or user schedules its purge on the background pool; this
+command finishes purges that were interrupted or never started. Run it
+from cron or by hand.
+
+Usage:
+    python manage.py purge_deleted [--batch-size 1000]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.deletion import BATCH_SIZE, purge_course, purge_user
+from apps.courses.models import Course
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Delete the rows and files of soft-deleted courses and users in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        targets = [
+            ('course', purge_course, Course.all_objects.filter(deleted_at__isnull=False)),
+            ('user', purge_user, User.objects.filter(deleted_at__isnull=False)),
+        ]
+        for label, purge, queryset in targets:
+            for pk in queryset.values_list('id', flat=True):
+                started = time.monotonic()
+                deleted = purge(pk, batch_size)
+                summary = ', '.join(f"{count} {model}" for model, count in deleted.items())
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label} {pk}: {summary or 'nothing left'} ({time.monotonic() - started:.1f}s)"
+                ))
@@ -0,0 +1,48 @@
+"""
+Show the hottest SQL statements from the slow-query log.
+
+Merges the per-statement totals every web worker on this host writes to
+QUERY_STATS_DIR (see eduvillage_backend/query_log.py) and ranks them.
+
+Usage:
+    python manage.py query_report [--minutes 15] [--top 20] [--order total|calls|mean|max] [--slow] [--json]
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from eduvillage_backend import query_log
+
+
+class Command(BaseCommand):
+    help = "Rank normalized SQL statements by total time across workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=query_log.WINDOW_MINUTES)
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--order', choices=('total', 'calls', 'mean', 'max'), default='total')
+        parser.add_argument('--slow', action='store_true', help="Also list recent slow queries")
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        report = query_log.report(options['minutes'], options['top'], options['order'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Last {options['minutes']} minutes, {report['workers']} worker(s)")
+        self.stdout.write(f"{'total ms':>10} {'share':>6} {'calls':>8} {'mean ms':>9} {'max ms':>9}  statement")
+        for row in report['statements']:
+            self.stdout.write(
+                f"{row['total_ms']:>10.1f} {row['share'] * 100:>5.1f}% {row['calls']:>8} "
+                f"{row['mean_ms']:>9.2f} {row['max_ms']:>9.1f}  {row['sql'][:200]}"
+            )
+
+        if options['slow']:
+            self.stdout.write(f"\nSlow queries (>= {query_log.THRESHOLD * 1000:.0f} ms), newest first")
+            for record in report['slow']:
+                self.stdout.write(
+                    f"{record['at']} {record['ms']:>9.1f} ms  {record['view']}  {record['source']}\n"
+                    f"    {record['sql'][:300]}"
+                )
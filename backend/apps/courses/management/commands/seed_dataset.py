@@ -0,0 +1,320 @@
+"""
+Generate a synthetic dataset for load and scale testing.
+
+Builds, from a fixed seed so every run produces the same data:
+
+- one admin, N approved teachers and K students (usernames seed_*), all
+  with the same --password so load tests can sign in as any of them
+- M published courses with --contents items each, cycling through every
+  CourseContent.CONTENT_TYPE_CHOICES type
+- enrollments with power-law course popularity (a few courses hold most
+  students) and a long-tailed number of courses per student
+- partial StudentCourseProgress: each enrollment has completed a prefix
+  of the course, and the next video is partly watched
+- a submission for every completed assignment and a certificate for every
+  fully completed course
+
+Timestamps are spread over the last --days days. Rows are written in
+batches of --batch-size: bulk_create for users, courses, contents,
+enrollments and certificates, and a raw executemany() for the two big
+tables, progress and submissions. Every file field points at one of
+a few tiny placeholder files under MEDIA_ROOT/seed/. The defaults give
+about 1M progress rows.
+
+Usage:
+    python manage.py seed_dataset [--students 24000] [--courses 1000] [--seed 1]
+    python manage.py seed_dataset --clear    # remove seed_* users and their data first
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.courses import search
+from apps.courses.deletion import cascade_plan, delete_in_batches
+from apps.courses.models import AssignmentSubmission, Certificate, Course, CourseContent, StudentCourseProgress
+from apps.enrollments.models import Enrollment
+from apps.users.models import User
+
+
+PREFIX = 'seed_'
+
+PLACEHOLDERS = {
+    'video': ('seed/placeholder.mp4', b'\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom'),
+    'pdf': ('seed/placeholder.pdf', b'%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n'),
+    'document': ('seed/placeholder.txt', b'Seed document\n'),
+    'assignment': ('seed/assignment.txt', b'Seed assignment\n'),
+    'other': ('seed/other.txt', b'Seed file\n'),
+    'submission': ('seed/submission.txt', b'Seed submission\n'),
+}
+
+WORDS = (
+    "introduction advanced applied python django data science machine learning "
+    "web development design patterns algorithms databases networks security "
+    "cloud testing analytics statistics calculus physics history writing"
+).split()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the auto_now/auto_now_add values we set."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic dataset with bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=200)
+        parser.add_argument('--courses', type=int, default=1000)
+        parser.add_argument('--contents', type=int, default=20, help="Content items per course")
+        parser.add_argument('--students', type=int, default=24000)
+        parser.add_argument('--max-enrollments', type=int, default=40, help="Courses per student, at most")
+        parser.add_argument('--days', type=int, default=180, help="History to spread timestamps over")
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--clear', action='store_true')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        if options['clear']:
+            self.clear()
+        elif User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"{PREFIX}* users already exist; run with --clear to replace them")
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.days = options['days']
+        started = time.perf_counter()
+
+        self.write_placeholders()
+        with explicit_timestamps(Course, CourseContent, Enrollment, AssignmentSubmission, Certificate):
+            teacher_ids, student_ids = self.create_users(options)
+            courses = self.create_courses(teacher_ids, options['courses'])
+            contents = self.create_contents(courses, options['contents'])
+            enrollments = self.create_enrollments(student_ids, courses, options['max_enrollments'])
+            self.create_progress(enrollments, contents)
+
+        self.step("search index", lambda: search.index_courses(list(courses)) or len(courses))
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
+
+    def clear(self):
+        start = time.perf_counter()
+        deleted = 0
+        for model, lookup in cascade_plan(User, 'username__startswith'):
+            deleted += delete_in_batches(model, lookup, PREFIX, self.batch_size)
+        self.stdout.write(f"Cleared {deleted} rows in {time.perf_counter() - start:.1f}s")
+
+    def step(self, name, func):
+        start = time.perf_counter()
+        count = func()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{name:<14} {count:>9} rows  {elapsed:6.1f}s  {count / max(elapsed, 1e-9):>9.0f} rows/s")
+        return count
+
+    def bulk(self, model, rows):
+        """bulk_create an iterable of instances batch by batch; returns the count."""
+        count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return count
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            count += len(batch)
+
+    def insert(self, model, fields, rows):
+        """
+        executemany() tuples of database values into `fields` of `model`.
+
+        bulk_create prepares every value through its field, which costs
+        ~80us a row; the big tables are inserted directly instead.
+        """
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        sql = f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+        count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return count
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            count += len(batch)
+
+    def moment(self, after=None):
+        """A random time in the history window, after `after` if given."""
+        start = after or self.now - timedelta(days=self.days)
+        return start + (self.now - start) * self.rng.random()
+
+    def write_placeholders(self):
+        for name, data in PLACEHOLDERS.values():
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(data))
+        # Certificates are PDFs too
+        self.certificate_file = PLACEHOLDERS['pdf'][0]
+
+    def create_users(self, options):
+        # Hashing is slow on purpose; every seed user shares one hash
+        password = make_password(options['password'])
+        joined = self.now - timedelta(days=self.days)
+
+        def users():
+            yield User(username=f"{PREFIX}admin", role='admin', is_staff=True, password=password,
+                       teacher_status=None, date_joined=joined)
+            for i in range(options['teachers']):
+                yield User(
+                    username=f"{PREFIX}teacher_{i}", role='teacher', teacher_status='approved',
+                    password=password, first_name="Teacher", last_name=str(i),
+                    subject=self.rng.choice(WORDS).title(), date_joined=joined,
+                )
+            for i in range(options['students']):
+                yield User(
+                    username=f"{PREFIX}student_{i}", role='student', teacher_status=None,
+                    password=password, first_name="Student", last_name=str(i),
+                    email=f"{PREFIX}student_{i}@example.com", date_joined=self.moment(),
+                )
+
+        self.step("users", lambda: self.bulk(User, users()))
+        seed_users = User.objects.filter(username__startswith=PREFIX).order_by('id')
+        teacher_ids = list(seed_users.filter(role='teacher').values_list('id', flat=True))
+        student_ids = list(seed_users.filter(role='student').values_list('id', flat=True))
+        return teacher_ids, student_ids
+
+    def create_courses(self, teacher_ids, count):
+        """Returns {course_id: created_at}."""
+        oldest = self.now - timedelta(days=self.days)
+        rows = [
+            Course(
+                title=' '.join(self.rng.choice(WORDS) for _ in range(3)).title() + f" {i}",
+                description=' '.join(self.rng.choice(WORDS) for _ in range(self.rng.randint(20, 60))),
+                duration=self.rng.randint(1, 40),
+                status='published',
+                instructor_id=self.rng.choice(teacher_ids),
+                # Courses exist for the first half of the window at least
+                created_at=oldest + (self.now - oldest) / 2 * self.rng.random(),
+            )
+            for i in range(count)
+        ]
+        self.step("courses", lambda: len(Course.objects.bulk_create(rows, batch_size=self.batch_size)))
+        return {course.id: course.created_at for course in rows}
+
+    def create_contents(self, courses, per_course):
+        """Returns {course_id: [(content_id, content_type), ...]} in course order."""
+        types = [choice for choice, _ in CourseContent.CONTENT_TYPE_CHOICES]
+        rows = []
+        for course_id, created_at in courses.items():
+            # Every type at least once per course when there's room
+            course_types = types[:per_course] + [self.rng.choice(types) for _ in range(per_course - len(types))]
+            self.rng.shuffle(course_types)
+            for position, content_type in enumerate(course_types):
+                content = CourseContent(
+                    course_id=course_id,
+                    title=f"Lesson {position + 1}",
+                    content_type=content_type,
+                    created_at=created_at,
+                )
+                if content_type == 'link':
+                    content.file_url = f"https://example.com/seed/{course_id}/{position}"
+                else:
+                    content.file = PLACEHOLDERS[content_type][0]
+                    content.file_size = len(PLACEHOLDERS[content_type][1])
+                rows.append(content)
+
+        self.step("contents", lambda: len(CourseContent.objects.bulk_create(rows, batch_size=self.batch_size)))
+        contents = {}
+        for content in rows:
+            contents.setdefault(content.course_id, []).append((content.id, content.content_type))
+        return contents
+
+    def create_enrollments(self, student_ids, courses, max_enrollments):
+        """Returns [(student_id, course_id, enrolled_at), ...]."""
+        course_ids = list(courses)
+        # Zipf-like popularity: the course at rank r is picked ~1/r as often
+        self.rng.shuffle(course_ids)
+        weights = [1 / rank for rank in range(1, len(course_ids) + 1)]
+        limit = min(max_enrollments, len(course_ids))
+
+        enrollments = []
+        for student_id in student_ids:
+            # Pareto-distributed course count: most take a few, some take many
+            wanted = min(limit, int(self.rng.paretovariate(1.2)) + 1)
+            picked = set()
+            while len(picked) < wanted:
+                picked.update(self.rng.choices(course_ids, weights, k=wanted - len(picked)))
+            for course_id in picked:
+                enrollments.append((student_id, course_id, self.moment(courses[course_id])))
+
+        self.step("enrollments", lambda: self.bulk(Enrollment, (
+            Enrollment(student_id=student_id, course_id=course_id, enrolled_at=enrolled_at)
+            for student_id, course_id, enrolled_at in enrollments
+        )))
+        return enrollments
+
+    def create_progress(self, enrollments, contents):
+        submissions = []
+        certificates = []
+        db_time = connection.ops.adapt_datetimefield_value
+
+        def progress():
+            for student_id, course_id, enrolled_at in enrollments:
+                items = contents[course_id]
+                roll = self.rng.random()
+                if roll < 0.2:
+                    done = 0
+                elif roll < 0.4:
+                    done = len(items)
+                else:
+                    done = self.rng.randint(1, len(items) - 1) if len(items) > 1 else 0
+
+                completed_at = enrolled_at
+                for content_id, content_type in items[:done]:
+                    completed_at = self.moment(completed_at)
+                    watched = 100.0 if content_type == 'video' else 0.0
+                    yield (student_id, course_id, content_id, True, db_time(completed_at),
+                           6.0 * watched, watched)
+                    if content_type == 'assignment':
+                        submissions.append((
+                            student_id, course_id, content_id, PLACEHOLDERS['submission'][0],
+                            db_time(completed_at), db_time(completed_at),
+                        ))
+
+                if done == len(items) and items:
+                    certificates.append(Certificate(
+                        student_id=student_id, course_id=course_id,
+                        certificate_file=self.certificate_file, issued_at=completed_at,
+                    ))
+                elif done < len(items) and items[done][1] == 'video' and self.rng.random() < 0.5:
+                    # Stopped partway through the next video
+                    percent = self.rng.uniform(5, 90)
+                    yield (student_id, course_id, items[done][0], False, None, 6.0 * percent, percent)
+
+        self.step("progress", lambda: self.insert(StudentCourseProgress, (
+            'student', 'course', 'content', 'completed', 'completed_at', 'position_seconds', 'percent_watched'
+        ), progress()))
+        self.step("submissions", lambda: self.insert(AssignmentSubmission, (
+            'student', 'course', 'assignment', 'file', 'submitted_at', 'updated_at'
+        ), submissions))
+        self.step("certificates", lambda: self.bulk(Certificate, certificates))
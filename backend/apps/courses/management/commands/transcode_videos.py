@@ -0,0 +1,43 @@
+"""
+Transcode videos that are still pending or failed.
+
+Uploads schedule transcoding on the background pool; this command sweeps
+up videos left pending (pool saturated, process restarted) or stuck in
+processing past TRANSCODE_STALE_AFTER (worker killed mid-job). Failures
+are retried with --retry-failed. Run it from cron or by hand.
+
+Usage:
+    python manage.py transcode_videos [--retry-failed] [--content-id 12]
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.models import CourseContent
+from apps.courses.transcoding import claimable, transcode
+
+
+class Command(BaseCommand):
+    help = "Transcode pending uploaded videos to HLS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true')
+        parser.add_argument('--content-id', type=int)
+
+    def handle(self, *args, **options):
+        retry_failed = options['retry_failed']
+        videos = CourseContent.objects.filter(
+            claimable(('pending', 'failed') if retry_failed else ('pending',)),
+            content_type='video'
+        ).exclude(file='')
+        if options['content_id']:
+            videos = videos.filter(pk=options['content_id'])
+
+        for content_id in videos.values_list('id', flat=True):
+            transcode(content_id, retry_failed=retry_failed)
+            content = CourseContent.objects.get(pk=content_id)
+            if content.transcode_status == 'ready':
+                self.stdout.write(self.style.SUCCESS(f"{content_id}: ready"))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"{content_id}: {content.transcode_status} {content.transcode_error}"
+                ))
@@ -0,0 +1,137 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('duration', models.PositiveIntegerField(default=0, help_text='Duration in hours')),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published'), ('archived', 'Archived')], default='draft', help_text='Course publication status', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('deleted_at', models.DateTimeField(blank=True, db_index=True, help_text='Set when the course is deleted; rows are purged in the background', null=True)),
+                ('progress_bits', models.PositiveIntegerField(default=0, help_text="Progress bitmap positions handed out to the course's content so far")),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='courses', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('content_type', models.CharField(choices=[('video', 'Video'), ('pdf', 'PDF'), ('assignment', 'Assignment'), ('document', 'Document'), ('link', 'Link'), ('other', 'Other')], max_length=20)),
+                ('file', models.FileField(blank=True, null=True, upload_to='course_content/%Y/%m/%d/')),
+                ('file_url', models.URLField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('transcode_status', models.CharField(blank=True, choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], help_text='HLS transcoding status. Only set for uploaded videos', max_length=20, null=True)),
+                ('transcode_error', models.TextField(blank=True, default='')),
+                ('transcode_started_at', models.DateTimeField(blank=True, help_text='When the current transcode claimed the video; stale claims are retried', null=True)),
+                ('hls_manifest', models.FileField(blank=True, null=True, upload_to='hls/')),
+                ('poster', models.FileField(blank=True, null=True, upload_to='hls/')),
+                ('preview_status', models.CharField(blank=True, choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], help_text='Preview generation status. Only set for uploaded PDFs and documents', max_length=20, null=True)),
+                ('preview_error', models.TextField(blank=True, default='')),
+                ('preview_started_at', models.DateTimeField(blank=True, help_text='When the current preview job claimed the item; stale claims are retried', null=True)),
+                ('thumbnail', models.FileField(blank=True, null=True, upload_to='previews/')),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('file_size', models.PositiveBigIntegerField(blank=True, help_text='Size of the uploaded file in bytes', null=True)),
+                ('content_hash', models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 of the uploaded file, used to reuse previews', max_length=64)),
+                ('extracted_text', models.TextField(blank=True, default='', help_text='Plain text of uploaded PDFs/documents, for course search')),
+                ('progress_bit', models.PositiveIntegerField(blank=True, help_text='Position of this content in CourseProgressBitmap.completed. Never reused', null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content', to='courses.course')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssignmentSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='submissions/%Y/%m/%d/')),
+                ('submitted_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignment_submissions', to=settings.AUTH_USER_MODEL)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_submissions', to='courses.course')),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='courses.coursecontent')),
+            ],
+            options={
+                'ordering': ['-submitted_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseProgressBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed', models.BinaryField(default=b'', help_text='Little-endian bitset: bit n is byte n // 8, bit n % 8')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_bitmaps', to='courses.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_bitmaps', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentCourseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed', models.BooleanField(default=False)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('position_seconds', models.FloatField(default=0, help_text='Furthest playback position reached, in seconds')),
+                ('percent_watched', models.FloatField(default=0, help_text='Furthest position as a percentage of the video duration')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_progress', to='courses.coursecontent')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_progress', to='courses.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Certificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issued_at', models.DateTimeField(auto_now_add=True)),
+                ('certificate_file', models.FileField(upload_to='certificates/%Y/%m/%d/')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificates', to=settings.AUTH_USER_MODEL)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_certificates', to='courses.course')),
+            ],
+            options={
+                'ordering': ['-issued_at'],
+                'indexes': [models.Index(fields=['issued_at'], name='courses_cer_issued__20c35d_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='coursecontent',
+            constraint=models.UniqueConstraint(fields=('course', 'progress_bit'), name='unique_content_progress_bit'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['submitted_at'], name='courses_ass_submitt_ad53f3_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='assignmentsubmission',
+            unique_together={('student', 'assignment')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='courseprogressbitmap',
+            unique_together={('student', 'course')},
+        ),
+        migrations.AddIndex(
+            model_name='studentcourseprogress',
+            index=models.Index(fields=['completed_at'], name='courses_stu_complet_427cf7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentcourseprogress',
+            index=models.Index(fields=['course', 'completed', 'content'], name='courses_stu_course__6fa2c4_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='studentcourseprogress',
+            unique_together={('student', 'content')},
+        ),
+    ]
@@ -1,6 +1,14 @@
 from django.db import models
 from apps.users.models import User
 
+
+class CourseManager(models.Manager):
+    """Hides deleted courses while their rows are purged (see deletion.py)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Course(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -26,6 +34,19 @@ class Course(models.Model):
         related_name='courses'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Set when the course is deleted; rows are purged in the background"
+    )
+    progress_bits = models.PositiveIntegerField(
+        default=0,
+        help_text="Progress bitmap positions handed out to the course's content so far"
+    )
+
+    objects = CourseManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.title
@@ -52,6 +73,76 @@ class CourseContent(models.Model):
     file_url = models.URLField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # HLS transcoding of uploaded videos
+    TRANSCODE_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    transcode_status = models.CharField(
+        max_length=20,
+        choices=TRANSCODE_STATUS_CHOICES,
+        null=True,
+        blank=True,
+        help_text="HLS transcoding status. Only set for uploaded videos"
+    )
+    transcode_error = models.TextField(blank=True, default='')
+    transcode_started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the current transcode claimed the video; stale claims are retried"
+    )
+    hls_manifest = models.FileField(upload_to='hls/', null=True, blank=True)
+    poster = models.FileField(upload_to='hls/', null=True, blank=True)
+
+    # Previews for uploaded PDFs and documents
+    PREVIEW_STATUS_CHOICES = TRANSCODE_STATUS_CHOICES
+
+    preview_status = models.CharField(
+        max_length=20,
+        choices=PREVIEW_STATUS_CHOICES,
+        null=True,
+        blank=True,
+        help_text="Preview generation status. Only set for uploaded PDFs and documents"
+    )
+    preview_error = models.TextField(blank=True, default='')
+    preview_started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the current preview job claimed the item; stale claims are retried"
+    )
+    thumbnail = models.FileField(upload_to='previews/', null=True, blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    file_size = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Size of the uploaded file in bytes"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text="SHA-256 of the uploaded file, used to reuse previews"
+    )
+    extracted_text = models.TextField(
+        blank=True,
+        default='',
+        help_text="Plain text of uploaded PDFs/documents, for course search"
+    )
+    progress_bit = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Position of this content in CourseProgressBitmap.completed. Never reused"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'progress_bit'], name='unique_content_progress_bit')
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.course.title}"
 
@@ -74,14 +165,58 @@ class StudentCourseProgress(models.Model):
     )
     completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
-    
+
+    # Video watch progress, reported by player heartbeats
+    position_seconds = models.FloatField(
+        default=0,
+        help_text="Furthest playback position reached, in seconds"
+    )
+    percent_watched = models.FloatField(
+        default=0,
+        help_text="Furthest position as a percentage of the video duration"
+    )
+
     class Meta:
         unique_together = ('student', 'content')
+        indexes = [
+            # Daily rollups (apps/dashboard/rollups.py) scan recent completions
+            models.Index(fields=['completed_at']),
+            # Funnel counts (funnel.py) group a course's completions by content
+            models.Index(fields=['course', 'completed', 'content']),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.content.title}"
 
 
+class CourseProgressBitmap(models.Model):
+    """
+    A student's completed content in one course as a bitset (see
+    progress_bitmaps.py). Bit n is set when the content with
+    progress_bit n is completed.
+    """
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='progress_bitmaps'
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='progress_bitmaps'
+    )
+    completed = models.BinaryField(
+        default=b'',
+        help_text="Little-endian bitset: bit n is byte n // 8, bit n % 8"
+    )
+
+    class Meta:
+        unique_together = ('student', 'course')
+
+    def __str__(self):
+        return f"{self.student_id} - {self.course_id}"
+
+
 class AssignmentSubmission(models.Model):
     """
     Model to track student assignment submissions.
@@ -115,6 +250,7 @@ class AssignmentSubmission(models.Model):
     class Meta:
         unique_together = ('student', 'assignment')
         ordering = ['-submitted_at']
+        indexes = [models.Index(fields=['submitted_at'])]
     
     def __str__(self):
         return f"{self.student.username} - {self.assignment.title}"
@@ -142,6 +278,7 @@ class Certificate(models.Model):
     class Meta:
         unique_together = ('student', 'course')
         ordering = ['-issued_at']
+        indexes = [models.Index(fields=['issued_at'])]
     
     def __str__(self):
         return f"Certificate - {self.student.username} - {self.course.title}"
\ No newline at end of file
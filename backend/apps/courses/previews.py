@@ -0,0 +1,235 @@
+"""
+PDF and Document Previews
+
+For uploaded pdf/document content, generates in the background:
+
+- a first-page PNG thumbnail
+- the page count
+- the document's plain text, for the course search index (search.py)
+- a linearized ("fast web view") copy of PDFs, replacing the upload in
+  place so browsers can show the first page before the whole file arrives
+
+Derivatives are keyed by the SHA-256 of the stored (linearized) bytes and
+stored in
+MEDIA_ROOT/previews/<hash>/, so the same handout uploaded to several
+courses is rendered once. Non-PDF documents are converted to PDF with
+LibreOffice first. Uses the locally installed poppler (pdftoppm, pdfinfo),
+qpdf and soffice binaries.
+
+CourseContent.preview_status moves pending -> processing -> ready/failed;
+`python manage.py generate_previews` sweeps up pending items, and items
+left processing for more than PREVIEW_STALE_AFTER seconds (worker killed
+mid-job). Failed items are only retried with --retry-failed.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import search
+from .background import submit
+from .models import CourseContent
+
+
+PDFTOPPM_BINARY = getattr(settings, 'PDFTOPPM_BINARY', 'pdftoppm')
+PDFINFO_BINARY = getattr(settings, 'PDFINFO_BINARY', 'pdfinfo')
+PDFTOTEXT_BINARY = getattr(settings, 'PDFTOTEXT_BINARY', 'pdftotext')
+QPDF_BINARY = getattr(settings, 'QPDF_BINARY', 'qpdf')
+SOFFICE_BINARY = getattr(settings, 'SOFFICE_BINARY', 'soffice')
+THUMBNAIL_WIDTH = getattr(settings, 'PREVIEW_THUMBNAIL_WIDTH', 480)
+COMMAND_TIMEOUT = 5 * 60
+# A job runs up to five tools, each up to COMMAND_TIMEOUT
+STALE_AFTER = getattr(settings, 'PREVIEW_STALE_AFTER', 30 * 60)
+
+PREVIEW_CONTENT_TYPES = ('pdf', 'document')
+
+
+class PreviewError(Exception):
+    """Raised when a preview tool fails."""
+
+
+def claimable(statuses=('pending',)):
+    """Items in statuses, or whose processing claim has gone stale."""
+    stale = Q(preview_started_at__isnull=True) | Q(
+        preview_started_at__lt=timezone.now() - timedelta(seconds=STALE_AFTER)
+    )
+    return Q(preview_status__in=statuses) | (Q(preview_status='processing') & stale)
+
+
+def enqueue(content_id):
+    """
+    Schedule preview generation once the current transaction commits.
+
+    Never blocks: if the worker pool is saturated the item stays pending.
+    """
+    transaction.on_commit(lambda: submit(generate_preview, content_id))
+
+
+def _run(command, timeout=COMMAND_TIMEOUT):
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except FileNotFoundError:
+        raise PreviewError(f"{command[0]} not found")
+    except subprocess.TimeoutExpired:
+        raise PreviewError(f"{command[0]} timed out after {timeout}s")
+    return result
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_count(pdf_path):
+    result = _run([PDFINFO_BINARY, pdf_path])
+    if result.returncode != 0:
+        raise PreviewError(f"pdfinfo failed: {result.stderr.strip()[-500:]}")
+    match = re.search(r'^Pages:\s+(\d+)', result.stdout, re.MULTILINE)
+    if not match:
+        raise PreviewError("pdfinfo did not report a page count")
+    return int(match.group(1))
+
+
+def render_thumbnail(pdf_path, output_png):
+    """Render the first page, scaled to THUMBNAIL_WIDTH pixels wide."""
+    output_base = output_png[:-len('.png')]
+    result = _run([
+        PDFTOPPM_BINARY, '-png', '-singlefile',
+        '-f', '1', '-l', '1',
+        '-scale-to-x', str(THUMBNAIL_WIDTH), '-scale-to-y', '-1',
+        pdf_path, output_base,
+    ])
+    if result.returncode != 0:
+        raise PreviewError(f"pdftoppm failed: {result.stderr.strip()[-500:]}")
+
+
+def extract_text(pdf_path):
+    """Plain text of the document, truncated for the search index."""
+    result = _run([PDFTOTEXT_BINARY, '-enc', 'UTF-8', '-q', pdf_path, '-'])
+    if result.returncode != 0:
+        raise PreviewError(f"pdftotext failed: {result.stderr.strip()[-500:]}")
+    return ' '.join(result.stdout.split())[:search.MAX_TEXT_CHARS]
+
+
+def linearize(pdf_path):
+    """
+    Rewrite a PDF in place for fast web view, unless it already is.
+
+    Returns:
+        bool: True if the file was rewritten
+    """
+    check = _run([QPDF_BINARY, '--check-linearization', pdf_path])
+    if check.returncode == 0 and 'no linearization errors' in check.stdout:
+        return False
+
+    # qpdf exits with 3 for warnings; the output is still usable.
+    # --deterministic-id makes identical uploads linearize to identical
+    # bytes, so they still share derivatives
+    result = _run([QPDF_BINARY, '--linearize', '--deterministic-id', '--replace-input', pdf_path])
+    if result.returncode not in (0, 3):
+        raise PreviewError(f"qpdf failed: {result.stderr.strip()[-500:]}")
+    return True
+
+
+def convert_to_pdf(path, output_dir):
+    """Convert an office document to PDF with LibreOffice."""
+    result = _run([
+        SOFFICE_BINARY, '--headless', '--convert-to', 'pdf',
+        '--outdir', output_dir, path,
+    ])
+    converted = os.path.join(
+        output_dir, os.path.splitext(os.path.basename(path))[0] + '.pdf'
+    )
+    if result.returncode != 0 or not os.path.exists(converted):
+        raise PreviewError(f"soffice failed: {result.stderr.strip()[-500:]}")
+    return converted
+
+
+def is_pdf(path):
+    with open(path, 'rb') as f:
+        return f.read(5) == b'%PDF-'
+
+
+def _derivatives_dir(content_hash):
+    return os.path.join('previews', content_hash[:2], content_hash)
+
+
+def generate_preview(content_id, retry_failed=False):
+    """
+    Generate the thumbnail and page count for one item and linearize it.
+
+    Safe to call from several workers: only the one that claims the row
+    does the work. Failed items are claimed only with retry_failed.
+    """
+    started_at = timezone.now()
+    claimed = CourseContent.objects.filter(
+        claimable(('pending', 'failed') if retry_failed else ('pending',)),
+        pk=content_id,
+        content_type__in=PREVIEW_CONTENT_TYPES
+    ).update(preview_status='processing', preview_error='', preview_started_at=started_at)
+    if not claimed:
+        return
+
+    content = CourseContent.objects.get(pk=content_id)
+
+    try:
+        if not content.file:
+            raise PreviewError("Content has no uploaded file")
+        path = content.file.path
+        source_is_pdf = is_pdf(path)
+
+        # Before hashing, so content_hash matches the file that is served
+        if source_is_pdf and shutil.which(QPDF_BINARY):
+            linearize(path)
+
+        content_hash = file_sha256(path)
+        relative_dir = _derivatives_dir(content_hash)
+        thumbnail_name = os.path.join(relative_dir, 'thumbnail.png')
+
+        # Reuse derivatives already rendered for identical bytes
+        cached = CourseContent.objects.filter(
+            content_hash=content_hash,
+            preview_status='ready'
+        ).exclude(pk=content_id).values('thumbnail', 'page_count', 'extracted_text').first()
+
+        if cached and cached['thumbnail']:
+            thumbnail_name = cached['thumbnail']
+            pages = cached['page_count']
+            text = cached['extracted_text']
+        else:
+            output_dir = os.path.join(settings.MEDIA_ROOT, relative_dir)
+            os.makedirs(output_dir, exist_ok=True)
+            with tempfile.TemporaryDirectory() as work_dir:
+                pdf_path = path if source_is_pdf else convert_to_pdf(path, work_dir)
+                pages = page_count(pdf_path)
+                text = extract_text(pdf_path)
+                render_thumbnail(pdf_path, os.path.join(settings.MEDIA_ROOT, thumbnail_name))
+    except (PreviewError, OSError) as e:
+        CourseContent.objects.filter(pk=content_id, preview_started_at=started_at).update(
+            preview_status='failed',
+            preview_error=str(e)
+        )
+        return
+
+    # Unless the claim went stale and another worker took the item over
+    CourseContent.objects.filter(pk=content_id, preview_started_at=started_at).update(
+        preview_status='ready',
+        content_hash=content_hash,
+        thumbnail=thumbnail_name,
+        page_count=pages,
+        file_size=os.path.getsize(path),
+        extracted_text=text
+    )
+    search.index_course(content.course_id)
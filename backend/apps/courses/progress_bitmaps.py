@@ -0,0 +1,271 @@
+"""
+Bitmap-encoded Course Progress
+
+StudentCourseProgress has one row per (student, content), so the table
+grows with students x content items. CourseProgressBitmap records the same
+completions in one row per (student, course):
+
+- Each content item gets a bit position, CourseContent.progress_bit,
+  numbered per course from Course.progress_bits. Positions are never
+  reused, so the bits of deleted content are masked out rather than
+  moved. Content gets its position the first time it is needed.
+- The bitmap's bytes are little-endian: bit n is byte n // 8, bit n % 8.
+  A course with 100 content items needs 13 bytes per student.
+
+A student's completed count is a popcount of their bitmap masked with
+the positions of live content. Figures over a cohort (completions per
+content, completed count per student) unpack a course's bitmaps into a
+students x positions numpy matrix and sum its columns or rows.
+
+Rollout:
+
+1. PROGRESS_BITMAP_WRITES = True. mark_content_complete and the
+   write-behind and heartbeat flushers set bits in the transaction that
+   writes the rows.
+2. `manage.py migrate_progress_bitmaps` backfills bitmaps from the rows,
+   OR-ing into bitmaps written meanwhile; --verify compares the two.
+3. PROGRESS_BITMAP_READS = True. progress_buffer's reads, and so the
+   progress endpoints, and the funnel read bitmaps instead of rows.
+
+Completion times and video positions stay in StudentCourseProgress.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Course, CourseContent, CourseProgressBitmap
+
+
+def writes_enabled():
+    return getattr(settings, 'PROGRESS_BITMAP_WRITES', False)
+
+
+def reads_enabled():
+    return getattr(settings, 'PROGRESS_BITMAP_READS', False)
+
+
+# ===== ENCODING =====
+
+def to_int(data):
+    return int.from_bytes(bytes(data), 'little')
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def mask(bit_positions):
+    """Bitset with the given positions set."""
+    bits = 0
+    for position in bit_positions:
+        bits |= 1 << position
+    return bits
+
+
+def packed_matrix(bitmaps, width):
+    """
+    Stack bitmaps into a len(bitmaps) x bytes uint8 matrix covering width positions.
+
+    Longer bitmaps are cut and shorter ones padded with zeros.
+    """
+    row_bytes = (width + 7) // 8
+    data = b''.join(bytes(bitmap)[:row_bytes].ljust(row_bytes, b'\0') for bitmap in bitmaps)
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(bitmaps), row_bytes)
+
+
+def bit_matrix(bitmaps, width):
+    """Unpack bitmaps into a len(bitmaps) x width boolean matrix."""
+    return np.unpackbits(packed_matrix(bitmaps, width), axis=1, count=width, bitorder='little').view(bool)
+
+
+# ===== POSITIONS =====
+
+def positions(course_id, content_ids=None):
+    """
+    Bit positions of a course's live content, assigning missing ones.
+
+    Args:
+        course_id (int): The course
+        content_ids (iterable): Only these items; all of the course's when None
+
+    Returns:
+        dict: content id -> bit position
+    """
+    contents = CourseContent.objects.filter(course_id=course_id)
+    if content_ids is not None:
+        contents = contents.filter(id__in=list(content_ids))
+    found = dict(contents.values_list('id', 'progress_bit'))
+    missing = sorted(content_id for content_id, bit in found.items() if bit is None)
+    if missing:
+        _assign(course_id, missing)
+        found.update(
+            CourseContent.objects.filter(id__in=missing).values_list('id', 'progress_bit')
+        )
+    return {content_id: bit for content_id, bit in found.items() if bit is not None}
+
+
+def _assign(course_id, content_ids):
+    """Give content_ids new positions; items assigned concurrently keep theirs."""
+    with transaction.atomic():
+        # The update locks the course row until commit, so reservations don't overlap
+        Course.all_objects.filter(pk=course_id).update(progress_bits=F('progress_bits') + len(content_ids))
+        end = Course.all_objects.filter(pk=course_id).values_list('progress_bits', flat=True).get()
+        for offset, content_id in enumerate(content_ids):
+            CourseContent.objects.filter(id=content_id, progress_bit__isnull=True).update(
+                progress_bit=end - len(content_ids) + offset
+            )
+
+
+def _positions_by_course(content_ids):
+    """{content_id: (course_id, bit)} across courses."""
+    courses = {}
+    for content_id, course_id in CourseContent.objects.filter(id__in=set(content_ids)).values_list('id', 'course_id'):
+        courses.setdefault(course_id, []).append(content_id)
+    found = {}
+    for course_id, ids in courses.items():
+        for content_id, bit in positions(course_id, ids).items():
+            found[content_id] = (course_id, bit)
+    return found
+
+
+# ===== WRITES =====
+
+def merge(course_id, bits_by_student):
+    """
+    OR bits into students' bitmaps for one course.
+
+    Must run in a transaction; the bitmaps stay locked until it commits.
+
+    Args:
+        course_id (int): The course
+        bits_by_student (dict): student id -> int bitset to add
+    """
+    student_ids = [student_id for student_id, bits in bits_by_student.items() if bits]
+    if not student_ids:
+        return
+    # Missing bitmaps are created with their bits; existing ones are locked and ORed below
+    CourseProgressBitmap.objects.bulk_create(
+        [
+            CourseProgressBitmap(student_id=student_id, course_id=course_id, completed=to_bytes(bits_by_student[student_id]))
+            for student_id in student_ids
+        ],
+        ignore_conflicts=True
+    )
+    changed = []
+    for bitmap in CourseProgressBitmap.objects.select_for_update().filter(
+        course_id=course_id, student_id__in=student_ids
+    ):
+        stored = to_int(bitmap.completed)
+        bits = stored | bits_by_student[bitmap.student_id]
+        if bits != stored:
+            bitmap.completed = to_bytes(bits)
+            changed.append(bitmap)
+    CourseProgressBitmap.objects.bulk_update(changed, ['completed'])
+
+
+def set_completed(completions):
+    """
+    Set the bits of completed content.
+
+    Args:
+        completions (iterable): (student_id, content_id) pairs
+    """
+    completions = list(completions)
+    if not completions:
+        return
+    found = _positions_by_course(content_id for _, content_id in completions)
+    by_course = {}
+    for student_id, content_id in completions:
+        if content_id not in found:
+            # Content deleted meanwhile
+            continue
+        course_id, bit = found[content_id]
+        students = by_course.setdefault(course_id, {})
+        students[student_id] = students.get(student_id, 0) | 1 << bit
+    with transaction.atomic():
+        for course_id in sorted(by_course):
+            merge(course_id, by_course[course_id])
+
+
+# ===== READS =====
+
+def content_ids_by_student(course_id, student_ids):
+    """
+    Completed live content per student.
+
+    Returns:
+        dict: student id -> set of content ids, for each of student_ids
+    """
+    bit_to_content = {bit: content_id for content_id, bit in positions(course_id).items()}
+    completed = {student_id: set() for student_id in student_ids}
+    for student_id, data in CourseProgressBitmap.objects.filter(
+        course_id=course_id, student_id__in=list(completed)
+    ).values_list('student_id', 'completed'):
+        bits = to_int(data)
+        completed[student_id] = {
+            content_id for bit, content_id in bit_to_content.items() if bits >> bit & 1
+        }
+    return completed
+
+
+def completed_content_ids(student_id, course_id):
+    return content_ids_by_student(course_id, [student_id])[student_id]
+
+
+def _cohort(course_id):
+    """(student ids, live content ids, students x content matrix) for a course."""
+    live = positions(course_id)
+    rows = list(CourseProgressBitmap.objects.filter(course_id=course_id).values_list('student_id', 'completed'))
+    width = max(live.values(), default=-1) + 1
+    matrix = bit_matrix([data for _, data in rows], width)
+    content_ids = list(live)
+    return [student_id for student_id, _ in rows], content_ids, matrix[:, [live[c] for c in content_ids]]
+
+
+def completed_counts(course_id, student_ids):
+    """
+    Completed live content count per student, a popcount per bitmap.
+
+    Returns:
+        dict: student id -> completed count, for each of student_ids
+    """
+    counts = {student_id: 0 for student_id in student_ids}
+    found, _, matrix = _cohort(course_id)
+    for student_id, count in zip(found, matrix.sum(axis=1).tolist()):
+        if student_id in counts:
+            counts[student_id] = count
+    return counts
+
+
+def content_counts(course_id, content_ids=None):
+    """
+    Students who completed each live content item, a column sum over
+    every bitmap of the course.
+
+    Returns:
+        dict: content id -> completed count
+    """
+    _, live, matrix = _cohort(course_id)
+    counts = dict(zip(live, matrix.sum(axis=0).tolist()))
+    if content_ids is not None:
+        counts = {content_id: counts.get(content_id, 0) for content_id in content_ids}
+    return counts
+
+
+def completed_all(course_id, content_ids):
+    """
+    Ids of students who completed every one of content_ids, e.g. the
+    cohort that finished a module. One AND over the packed bitmaps.
+    """
+    live = positions(course_id, content_ids)
+    if not live or len(live) != len(set(content_ids)):
+        return []
+    width = max(live.values()) + 1
+    required = np.frombuffer(to_bytes(mask(live.values())).ljust((width + 7) // 8, b'\0'), dtype=np.uint8)
+    rows = list(CourseProgressBitmap.objects.filter(course_id=course_id).values_list('student_id', 'completed'))
+    if not rows:
+        return []
+    hits = ((packed_matrix([data for _, data in rows], width) & required) == required).all(axis=1)
+    return [student_id for (student_id, _), hit in zip(rows, hits.tolist()) if hit]
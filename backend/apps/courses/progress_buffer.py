@@ -0,0 +1,233 @@
+"""
+Write-Behind Buffer for Content Completion
+
+When PROGRESS_WRITE_BEHIND is enabled, mark_content_complete no longer
+writes StudentCourseProgress rows itself. Completions are appended to an
+in-process queue (coalesced per student and content) and mirrored into the
+cache as one "pending" key per completion, plus a marker per (student,
+course) saying there may be some. Each click only adds keys, so clicks
+racing in different workers can't overwrite each other. A background
+thread upserts the queue in batches every PROGRESS_FLUSH_INTERVAL seconds
+and then deletes the pending keys it wrote.
+
+Progress reads go through completed_content_ids() / completed_counts(),
+which merge the database rows with the pending cache entries, so students
+see their own clicks immediately.
+"""
+
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from . import funnel, progress_bitmaps
+from .background import start_periodic
+from .models import CourseContent, StudentCourseProgress
+
+
+FLUSH_INTERVAL = getattr(settings, 'PROGRESS_FLUSH_INTERVAL', 2)
+FLUSH_BATCH_SIZE = getattr(settings, 'PROGRESS_FLUSH_BATCH_SIZE', 1000)
+
+# Pending entries outlive several missed flushes before expiring
+PENDING_TIMEOUT = 60 * 60
+
+
+def is_enabled():
+    return getattr(settings, 'PROGRESS_WRITE_BEHIND', False)
+
+
+def _pending_key(student_id, course_id, content_id):
+    return f"progress:pending:{student_id}:{course_id}:{content_id}"
+
+
+def _marker_key(student_id, course_id):
+    return f"progress:pending:{student_id}:{course_id}"
+
+
+# ===== IN-PROCESS QUEUE =====
+
+# (student_id, content_id) -> (course_id, completed_at)
+_queue = {}
+_queue_lock = threading.Lock()
+
+
+def record_completion(student_id, course_id, content_id, completed_at):
+    """
+    Queue a completion event and expose it to reads through the cache.
+    """
+    with _queue_lock:
+        _queue[(student_id, content_id)] = (course_id, completed_at)
+
+    cache.add(_pending_key(student_id, course_id, content_id), completed_at, PENDING_TIMEOUT)
+    # Markers are left to expire; a stale one only costs readers a lookup
+    cache.set(_marker_key(student_id, course_id), True, PENDING_TIMEOUT)
+
+    start_periodic("progress-flusher", FLUSH_INTERVAL, flush)
+
+
+def flush():
+    """
+    Upsert every queued completion in batches.
+
+    Returns:
+        int: Number of progress rows written
+    """
+    with _queue_lock:
+        if not _queue:
+            return 0
+        events = dict(_queue)
+        _queue.clear()
+
+    try:
+        # Content deleted since the click would fail the foreign key
+        content_ids = {content_id for _, content_id in events}
+        existing = set(
+            CourseContent.objects.filter(id__in=content_ids).values_list('id', flat=True)
+        )
+        rows = [
+            StudentCourseProgress(
+                student_id=student_id,
+                course_id=course_id,
+                content_id=content_id,
+                completed=True,
+                completed_at=completed_at
+            )
+            for (student_id, content_id), (course_id, completed_at) in events.items()
+            if content_id in existing
+        ]
+        with transaction.atomic():
+            # Rows completed before don't add to the funnel
+            already_completed = set(
+                StudentCourseProgress.objects.filter(
+                    student_id__in={row.student_id for row in rows},
+                    content_id__in={row.content_id for row in rows},
+                    completed=True
+                ).values_list('student_id', 'content_id')
+            )
+            StudentCourseProgress.objects.bulk_create(
+                rows,
+                batch_size=FLUSH_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['student', 'content'],
+                update_fields=['completed', 'completed_at']
+            )
+            if progress_bitmaps.writes_enabled():
+                progress_bitmaps.set_completed((row.student_id, row.content_id) for row in rows)
+    except Exception:
+        # Re-queue without overwriting newer events that arrived meanwhile
+        with _queue_lock:
+            for key, value in events.items():
+                _queue.setdefault(key, value)
+        raise
+
+    # Counted once the rows are committed
+    funnel.record_completions(
+        (row.course_id, row.content_id) for row in rows
+        if (row.student_id, row.content_id) not in already_completed
+    )
+    _clear_pending(events)
+    return len(rows)
+
+
+def _clear_pending(events):
+    """
+    Drop flushed events from the cache. A later click on the same content
+    is already complete in the database, so its key can go too.
+    """
+    cache.delete_many([
+        _pending_key(student_id, course_id, content_id)
+        for (student_id, content_id), (course_id, _) in events.items()
+    ])
+
+
+# ===== MERGED READS =====
+
+def _pending_by_student(course_id, student_ids):
+    """Pending completions per student: student id -> {content id: completed_at}."""
+    markers = cache.get_many([_marker_key(s, course_id) for s in student_ids])
+    marked = [s for s in student_ids if _marker_key(s, course_id) in markers]
+    if not marked:
+        return {}
+    content_ids = list(
+        CourseContent.objects.filter(course_id=course_id).values_list('id', flat=True)
+    )
+    keys = {
+        _pending_key(student_id, course_id, content_id): (student_id, content_id)
+        for student_id in marked
+        for content_id in content_ids
+    }
+    pending = {}
+    for key, completed_at in cache.get_many(list(keys)).items():
+        student_id, content_id = keys[key]
+        pending.setdefault(student_id, {})[content_id] = completed_at
+    return pending
+
+
+def pending_completions(student_id, course_id):
+    """Completions not yet flushed: content id -> completed_at."""
+    if not is_enabled():
+        return {}
+    return _pending_by_student(course_id, [student_id]).get(student_id, {})
+
+
+def completed_content_ids(student_id, course_id):
+    """Ids of content the student has completed, including pending clicks."""
+    if progress_bitmaps.reads_enabled():
+        completed = progress_bitmaps.completed_content_ids(student_id, course_id)
+    else:
+        completed = set(
+            StudentCourseProgress.objects.filter(
+                student_id=student_id,
+                course_id=course_id,
+                completed=True
+            ).values_list('content_id', flat=True)
+        )
+    completed.update(pending_completions(student_id, course_id))
+    return completed
+
+
+def completed_counts(course_id, student_ids):
+    """
+    Completed content count per student for one course, including pending
+    clicks.
+
+    Uses one grouped query; students with pending clicks need two more
+    queries, for the course's content ids and to avoid counting content
+    that is both flushed and pending.
+
+    Returns:
+        dict: student id -> completed content count
+    """
+    if progress_bitmaps.reads_enabled():
+        counts = progress_bitmaps.completed_counts(course_id, student_ids)
+    else:
+        counts = {student_id: 0 for student_id in student_ids}
+        rows = StudentCourseProgress.objects.filter(
+            course_id=course_id,
+            completed=True
+        ).values('student_id').annotate(total=Count('id')).values_list('student_id', 'total')
+        for student_id, total in rows:
+            if student_id in counts:
+                counts[student_id] = total
+
+    if not is_enabled():
+        return counts
+
+    pending = _pending_by_student(course_id, student_ids)
+    if pending:
+        if progress_bitmaps.reads_enabled():
+            flushed = progress_bitmaps.content_ids_by_student(course_id, list(pending))
+        else:
+            flushed = {}
+            for student_id, content_id in StudentCourseProgress.objects.filter(
+                course_id=course_id,
+                student_id__in=list(pending),
+                completed=True
+            ).values_list('student_id', 'content_id'):
+                flushed.setdefault(student_id, set()).add(content_id)
+        for student_id, ids in pending.items():
+            counts[student_id] += len(set(ids) - flushed.get(student_id, set()))
+
+    return counts
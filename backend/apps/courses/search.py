@@ -0,0 +1,230 @@
+"""
+Course Search
+
+Full-text index over Course.title, Course.description, the titles of the
+course's content and text extracted from its uploaded PDFs/documents
+(CourseContent.extracted_text, filled in by previews.py). There is one
+index row per course, kept up to date by the signals in signals.py.
+
+Two backends sit behind the same functions:
+
+- SQLite (development): an FTS5 virtual table ranked with bm25()
+- PostgreSQL (production): a tsvector column with a GIN index, ranked
+  with ts_rank_cd()
+
+Title matches rank above description matches, which rank above content
+matches. The last query term is also prefix-matched against titles and
+descriptions, so search-as-you-type works without expanding prefixes over
+the much larger document text.
+
+Ranking and counting cost time linear in the number of matches. To keep
+queries under 50 ms at 100k courses, only the newest SEARCH_MAX_CANDIDATES
+matches of a query are considered and totals are capped there. Broader
+queries are ranked among those on PostgreSQL and returned newest first on
+SQLite, where bm25() has to scan every match to weigh a term. That changes
+nothing for selective queries; it only affects words that appear in nearly
+every course, which say little about relevance anyway.
+
+The index table is created by migration courses.0002_search_index; fill
+it for existing data with `python manage.py rebuild_search_index`. Other
+database backends fall back to unranked icontains matching.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Course, CourseContent
+
+
+INDEX_TABLE = 'courses_search'
+PG_CONFIG = getattr(settings, 'SEARCH_PG_CONFIG', 'english')
+MAX_TEXT_CHARS = getattr(settings, 'SEARCH_MAX_TEXT_CHARS', 100000)
+MAX_CANDIDATES = getattr(settings, 'SEARCH_MAX_CANDIDATES', 2000)
+MAX_TERMS = 10
+
+
+def _vendor():
+    return connection.vendor
+
+
+def parse_terms(query):
+    """Split a user query into at most MAX_TERMS plain word tokens."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _documents(course_ids):
+    """course id -> (title, description, content text) for indexing."""
+    documents = {
+        course_id: [title, description, []]
+        for course_id, title, description in Course.objects.filter(
+            id__in=course_ids
+        ).values_list('id', 'title', 'description')
+    }
+    for course_id, title, text in CourseContent.objects.filter(
+        course_id__in=documents
+    ).values_list('course_id', 'title', 'extracted_text'):
+        documents[course_id][2].extend([title, text])
+
+    return {
+        course_id: (title, description, ' '.join(filter(None, content))[:MAX_TEXT_CHARS])
+        for course_id, (title, description, content) in documents.items()
+    }
+
+
+def _write(cursor, documents):
+    if _vendor() == 'sqlite':
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (rowid, title, description, content) VALUES (%s, %s, %s, %s)",
+            [(course_id, *fields) for course_id, fields in documents.items()]
+        )
+    elif _vendor() == 'postgresql':
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (course_id, document) VALUES (%s, "
+            f"setweight(to_tsvector('{PG_CONFIG}', %s), 'A') || "
+            f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B') || "
+            f"setweight(to_tsvector('{PG_CONFIG}', %s), 'C')) "
+            "ON CONFLICT (course_id) DO UPDATE SET document = EXCLUDED.document",
+            [(course_id, *fields) for course_id, fields in documents.items()]
+        )
+
+
+def _delete(cursor, course_ids):
+    if not course_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(course_ids))
+    if _vendor() == 'sqlite':
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE rowid IN ({placeholders})", list(course_ids))
+    elif _vendor() == 'postgresql':
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE course_id IN ({placeholders})", list(course_ids))
+
+
+def index_courses(course_ids, batch_size=500):
+    """(Re)index the given courses; ids of deleted courses are removed."""
+    course_ids = list(course_ids)
+    if not course_ids or _vendor() not in ('sqlite', 'postgresql'):
+        return
+
+    for start in range(0, len(course_ids), batch_size):
+        batch = course_ids[start:start + batch_size]
+        documents = _documents(batch)
+        with connection.cursor() as cursor:
+            # FTS5 has no upsert, so replace its rows; PostgreSQL upserts
+            _delete(cursor, batch if _vendor() == 'sqlite' else set(batch) - set(documents))
+            _write(cursor, documents)
+
+
+def index_course(course_id):
+    index_courses([course_id])
+
+
+def rebuild(batch_size=1000):
+    """
+    Drop and rebuild the whole index.
+
+    Returns:
+        int: Number of courses indexed
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+
+    indexed = 0
+    course_ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(course_ids), batch_size):
+        batch = course_ids[start:start + batch_size]
+        with connection.cursor() as cursor:
+            _write(cursor, _documents(batch))
+        indexed += len(batch)
+
+    if _vendor() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {INDEX_TABLE} ({INDEX_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+def _candidates_sqlite(terms, limit):
+    # Quote every term so FTS5 operators in user input are plain words
+    *words, last = terms
+    match = ' AND '.join(
+        [f'"{word}"' for word in words]
+        + [f'("{last}" OR {{title description}} : "{last}"*)']
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s "
+            "ORDER BY rowid DESC LIMIT %s",
+            [match, limit]
+        )
+        course_ids = [row[0] for row in cursor.fetchall()]
+        if len(course_ids) == limit:
+            # bm25() scans every match of every term to weigh it, which is
+            # what makes broad queries slow; leave those newest first
+            return [(course_id, 0.0) for course_id in course_ids]
+
+        cursor.execute(
+            f"SELECT rowid, bm25({INDEX_TABLE}, 10.0, 4.0, 1.0) "
+            f"FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s "
+            "ORDER BY rowid DESC",
+            [match]
+        )
+        # bm25() is lower-is-better; flip it so higher ranks first everywhere
+        return [(course_id, -rank) for course_id, rank in cursor.fetchall()]
+
+
+def _candidates_postgresql(terms, limit):
+    # Weights A and B are the title and description
+    *words, last = terms
+    tsquery = ' & '.join(words + [f'({last} | {last}:*AB)'])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT course_id, ts_rank_cd(document, query) "
+            f"FROM {INDEX_TABLE}, to_tsquery('{PG_CONFIG}', %s) query "
+            "WHERE document @@ query "
+            "ORDER BY course_id DESC LIMIT %s",
+            [tsquery, limit]
+        )
+        return cursor.fetchall()
+
+
+def _candidates_fallback(terms, limit):
+    """Unranked substring match for backends without a full-text index."""
+    courses = Course.objects.all()
+    for term in terms:
+        courses = courses.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    ids = courses.order_by('-id').values_list('id', flat=True)[:limit]
+    return [(course_id, 0.0) for course_id in ids]
+
+
+def search_courses(query, limit=20, offset=0):
+    """
+    Search courses.
+
+    Args:
+        query (str): Free-text query; the last word is prefix-matched
+        limit (int): Page size
+        offset (int): Number of results to skip
+
+    Returns:
+        tuple: (total number of matches, capped at MAX_CANDIDATES, whether
+            more matches exist beyond it, list of (course_id, rank) for the
+            requested page, best first)
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return 0, False, []
+
+    # One index scan yields both the capped count and the rows to rank
+    if _vendor() == 'sqlite':
+        candidates = _candidates_sqlite(terms, MAX_CANDIDATES + 1)
+    elif _vendor() == 'postgresql':
+        candidates = _candidates_postgresql(terms, MAX_CANDIDATES + 1)
+    else:
+        candidates = _candidates_fallback(terms, MAX_CANDIDATES + 1)
+
+    capped = len(candidates) > MAX_CANDIDATES
+    candidates = candidates[:MAX_CANDIDATES]
+    # Stable sort: equal ranks stay newest first
+    candidates.sort(key=lambda candidate: candidate[1], reverse=True)
+    return len(candidates), capped, candidates[offset:offset + limit]
@@ -1,10 +1,33 @@
 from rest_framework import serializers
 from .models import Course, CourseContent, AssignmentSubmission, Certificate
+from .signed_media import signed_dir_url, signed_url
+
+
+class SignedFileField(serializers.FileField):
+    """File upload field that is returned as a signed, expiring URL."""
+
+    def to_representation(self, value):
+        return signed_url(value)
 
 class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
-        fields = '__all__'
+        # progress_bits is the bitmap position counter, see progress_bitmaps
+        exclude = ['deleted_at', 'progress_bits']
+
+    def update(self, instance, validated_data):
+        # Write only the edited fields: progress_bits moves forward with
+        # QuerySet.update() (progress_bitmaps._assign), and a full save of
+        # this instance would write its stale copy back
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+
+# Read-only projection of CourseSerializer for list endpoints, see
+# views.CourseListCreateView.get
+COURSE_LIST_FIELDS = ('id', 'title', 'description', 'duration', 'status', 'created_at', 'instructor')
 
 
 class AdminCreateCourseSerializer(serializers.ModelSerializer):
@@ -35,14 +58,41 @@ class AdminCreateCourseSerializer(serializers.ModelSerializer):
 
 
 class CourseContentSerializer(serializers.ModelSerializer):
+    file = SignedFileField(required=False, allow_null=True)
+    hls_manifest_url = serializers.SerializerMethodField()
+    poster_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
     class Meta:
         model = CourseContent
-        fields = ['id', 'course', 'title', 'content_type', 'file', 'file_url', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'course', 'title', 'content_type', 'file', 'file_url', 'created_at',
+                  'transcode_status', 'hls_manifest_url', 'poster_url',
+                  'preview_status', 'thumbnail_url', 'page_count', 'file_size']
+        read_only_fields = ['id', 'created_at', 'transcode_status',
+                            'preview_status', 'page_count', 'file_size']
+
+    def get_hls_manifest_url(self, obj):
+        """HLS master playlist URL once transcoding is done; signed for its renditions too."""
+        if obj.transcode_status == 'ready':
+            return signed_dir_url(obj.hls_manifest)
+        return None
+
+    def get_poster_url(self, obj):
+        """Poster frame URL once transcoding is done."""
+        if obj.transcode_status == 'ready':
+            return signed_url(obj.poster)
+        return None
+
+    def get_thumbnail_url(self, obj):
+        """First-page thumbnail URL once the preview is ready."""
+        if obj.preview_status == 'ready':
+            return signed_url(obj.thumbnail)
+        return None
 
 
 class AssignmentSubmissionSerializer(serializers.ModelSerializer):
     """Serializer for student assignment submissions."""
+    file = SignedFileField()
     
     class Meta:
         model = AssignmentSubmission
@@ -54,6 +104,7 @@ class CertificateSerializer(serializers.ModelSerializer):
     """Serializer for course completion certificates."""
     student_name = serializers.SerializerMethodField()
     course_title = serializers.SerializerMethodField()
+    certificate_file = SignedFileField(read_only=True)
     
     class Meta:
         model = Certificate
@@ -0,0 +1,53 @@
+"""
+Keep the course search index in step with courses and their content.
+
+Indexing runs after the surrounding transaction commits, so a rolled back
+change never reaches the index. Changes within one transaction are batched:
+deleting a course with hundreds of content items reindexes it once.
+"""
+
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import Course, CourseContent
+
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, 'course_ids'):
+        _local.course_ids = set()
+    return _local.course_ids
+
+
+def _flush():
+    pending = _pending()
+    if pending:
+        course_ids = list(pending)
+        pending.clear()
+        search.index_courses(course_ids)
+
+
+def schedule_reindex(course_id):
+    _pending().add(course_id)
+    # Every callback flushes the whole set; all but the first are no-ops
+    transaction.on_commit(_flush)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # Deleted courses are dropped from the index when reindexed
+    schedule_reindex(instance.id)
+
+
+@receiver(post_save, sender=CourseContent)
+@receiver(post_delete, sender=CourseContent)
+def content_changed(sender, instance, **kwargs):
+    """Content titles and extracted text are part of the course's document."""
+    schedule_reindex(instance.course_id)
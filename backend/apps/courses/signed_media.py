@@ -0,0 +1,167 @@
+"""
+Signed, Expiring Media URLs
+
+Uploaded course content, assignment submissions, certificates and the
+video renditions and document previews derived from them live under
+MEDIA_ROOT. Instead of proxying every download through a Python view,
+the API checks permissions once, when it lists the files, and returns URLs
+like
+
+    /media/certificates/2026/10/19/cert.pdf?expires=1792412400&sig=...
+
+The web server serves the bytes after checking the signature, without
+touching Django or the database:
+
+- nginx secure_link (MEDIA_URL_SIGNATURE = 'secure_link'):
+
+      location /media/certificates/ {
+          secure_link $arg_sig,$arg_expires;
+          secure_link_md5 "$secure_link_expires$uri <MEDIA_SIGNING_KEY>";
+          if ($secure_link = "") { return 403; }
+          if ($secure_link = "0") { return 410; }
+      }
+
+- any server with a subrequest hook, e.g. nginx auth_request, calling
+  /api/media/auth/ with the original URI in X-Original-URI. Works with
+  either signature scheme; 'hmac' (HMAC-SHA256) is the default.
+
+An HLS player fetches variant playlists and segments by URLs relative to
+the master playlist, which would drop a query string. signed_dir_url()
+therefore signs the playlist's directory and puts the token in the path:
+
+    /media/hls/12/~1792412400.<sig>/master.m3u8
+    /media/hls/12/~1792412400.<sig>/720p/segment_0003.ts   (resolved by the player)
+
+Any file below the signed directory is allowed. The auth_request route
+checks these tokens too; the web server then drops the token segment to
+find the file, e.g. in nginx:
+
+      location /media/hls/ {
+          auth_request /api/media/auth/;
+          rewrite ^(/media/.+?)/~[^/]+/(.*)$ $1/$2 break;
+      }
+
+In DEBUG the protected prefixes are served by serve_signed_media, which
+checks the same signatures. Expiry is rounded up to MEDIA_URL_EXPIRY_STEP,
+so repeated listings return identical URLs and browsers can cache them.
+"""
+
+import base64
+import hashlib
+import hmac
+import math
+import re
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+
+SIGNING_KEY = getattr(settings, 'MEDIA_SIGNING_KEY', None) or settings.SECRET_KEY
+SIGNATURE_SCHEME = getattr(settings, 'MEDIA_URL_SIGNATURE', 'hmac')
+URL_TTL = getattr(settings, 'MEDIA_URL_TTL', 60 * 60)
+EXPIRY_STEP = getattr(settings, 'MEDIA_URL_EXPIRY_STEP', 5 * 60)
+PROTECTED_PREFIXES = tuple(getattr(
+    settings, 'MEDIA_PROTECTED_PREFIXES',
+    ('course_content/', 'submissions/', 'certificates/', 'hls/', 'previews/')
+))
+
+# <signed directory>/~<expires>.<sig>/<path below it>
+DIR_TOKEN_RE = re.compile(r'^(?P<directory>/.+?)/~(?P<expires>\d+)\.(?P<sig>[\w-]+)/(?P<rest>.+)$')
+
+
+def _b64(digest):
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def signature(path, expires):
+    """
+    Signature for a decoded URL path (as nginx's $uri) and expiry time.
+    """
+    if SIGNATURE_SCHEME == 'secure_link':
+        # nginx: secure_link_md5 "$secure_link_expires$uri <key>"
+        return _b64(hashlib.md5(f"{expires}{path} {SIGNING_KEY}".encode()).digest())
+    return _b64(hmac.new(SIGNING_KEY.encode(), f"{expires}:{path}".encode(), hashlib.sha256).digest())
+
+
+def _expires(ttl):
+    return int(math.ceil((time.time() + (ttl or URL_TTL)) / EXPIRY_STEP) * EXPIRY_STEP)
+
+
+def _signed(url, ttl):
+    expires = _expires(ttl)
+    return f"{url}?expires={expires}&sig={signature(unquote(url), expires)}"
+
+
+def signed_url(field_file, ttl=None):
+    """
+    Time-limited URL for a FileField value, or None if there is no file.
+    """
+    if not field_file:
+        return None
+    return _signed(field_file.url, ttl)
+
+
+def signed_name_url(name, ttl=None):
+    """signed_url() for a stored file name, e.g. from .values()."""
+    if not name:
+        return None
+    return _signed(default_storage.url(name), ttl)
+
+
+def signed_dir_url(field_file, ttl=None):
+    """
+    Time-limited URL for a file and everything beside and below it, such
+    as an HLS master playlist, or None if there is no file.
+    """
+    if not field_file:
+        return None
+    directory, filename = field_file.url.rsplit('/', 1)
+    expires = _expires(ttl)
+    return f"{directory}/~{expires}.{signature(unquote(directory) + '/', expires)}/{filename}"
+
+
+def verify(path, expires, sig):
+    """
+    Check a signature for a decoded URL path.
+
+    Returns:
+        bool: True if the signature matches and has not expired
+    """
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time() or not sig:
+        return False
+    return hmac.compare_digest(signature(path, expires), sig)
+
+
+def authorized_path(uri):
+    """
+    The media path a raw request URI (such as nginx's $request_uri) may
+    read, or None if it is not signed, or expired.
+
+    Returns:
+        str: Decoded URL path, without the token segment of a signed directory
+    """
+    parts = urlsplit(uri)
+    path = unquote(parts.path)
+    match = DIR_TOKEN_RE.match(path)
+    if match:
+        if '..' in match['rest'].split('/'):
+            return None
+        if not verify(match['directory'] + '/', match['expires'], match['sig']):
+            return None
+        return f"{match['directory']}/{match['rest']}"
+
+    query = parse_qs(parts.query)
+    if not verify(path, query.get('expires', [None])[0], query.get('sig', [None])[0]):
+        return None
+    return path
+
+
+def verify_uri(uri):
+    """Check a raw request URI such as nginx's $request_uri."""
+    return authorized_path(uri) is not None
@@ -0,0 +1,584 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.enrollments.models import Enrollment
+from apps.users.models import User
+from apps.users.serializers import CustomTokenObtainPairSerializer
+
+from . import funnel, heartbeats, previews, progress_bitmaps, progress_buffer, search, signed_media, transcoding
+from .models import AssignmentSubmission, Certificate, Course, CourseContent, CourseProgressBitmap, StudentCourseProgress
+from .serializers import CourseSerializer
+
+
+class BitmapEncodingTests(TestCase):
+    def test_round_trip(self):
+        bits = progress_bitmaps.mask([0, 3, 9, 64])
+        data = progress_bitmaps.to_bytes(bits)
+        self.assertEqual(len(data), 9)
+        self.assertEqual(progress_bitmaps.to_int(data), bits)
+        self.assertEqual(progress_bitmaps.to_bytes(0), b'')
+
+    def test_bit_matrix(self):
+        bitmaps = [
+            progress_bitmaps.to_bytes(progress_bitmaps.mask([0, 9])),
+            b'',
+            progress_bitmaps.to_bytes(progress_bitmaps.mask([9, 12])),
+        ]
+        matrix = progress_bitmaps.bit_matrix(bitmaps, 11)
+        self.assertEqual(matrix.shape, (3, 11))
+        self.assertEqual(matrix.sum(axis=1).tolist(), [2, 0, 1])
+        self.assertEqual(matrix.sum(axis=0).tolist(), [1] + [0] * 8 + [2, 0])
+
+
+class ProgressBitmapParityTests(TestCase):
+    """The progress endpoints answer the same from bitmaps as from rows."""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=self.teacher)
+        self.contents = [
+            CourseContent.objects.create(
+                course=self.course, title=f"Lesson {i}", content_type='link', file_url='https://example.com/'
+            )
+            for i in range(10)
+        ]
+        self.students = []
+        for i in range(4):
+            student = User.objects.create_user(username=f"student{i}", password='x', role='student')
+            Enrollment.objects.create(student=student, course=self.course)
+            self.students.append(student)
+        self.client = APIClient()
+
+    def complete(self, student, content):
+        self.client.force_authenticate(student)
+        response = self.client.post(f"/api/courses/student/{content.id}/complete/")
+        self.assertEqual(response.status_code, 200)
+
+    def get(self, user, path):
+        self.client.force_authenticate(user)
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def responses(self):
+        # The funnel is cached; rebuild it from the source being compared
+        cache.clear()
+        course_id = self.course.id
+        data = {
+            'students_progress': self.get(self.teacher, f"/api/courses/teacher/{course_id}/students-progress/"),
+            'funnel': self.get(self.teacher, f"/api/courses/teacher/{course_id}/funnel/"),
+        }
+        for student in self.students:
+            data[f"progress {student.id}"] = self.get(student, f"/api/courses/student/{course_id}/progress/")
+            data[f"contents {student.id}"] = self.get(student, f"/api/courses/student/{course_id}/contents/")
+        return data
+
+    def assertParity(self):
+        with override_settings(PROGRESS_BITMAP_READS=False):
+            from_rows = self.responses()
+        with override_settings(PROGRESS_BITMAP_READS=True):
+            from_bitmaps = self.responses()
+        self.assertEqual(from_rows, from_bitmaps)
+        return from_bitmaps
+
+    @override_settings(PROGRESS_BITMAP_WRITES=True)
+    def test_completions_through_endpoint(self):
+        for i, student in enumerate(self.students):
+            for content in self.contents[:i * 3]:
+                self.complete(student, content)
+        # Completing twice sets the same bit
+        self.complete(self.students[1], self.contents[0])
+
+        data = self.assertParity()
+        self.assertEqual(CourseProgressBitmap.objects.count(), 3)
+        self.assertEqual(
+            [step['completed'] for step in data['funnel']['steps']],
+            [3, 3, 3, 2, 2, 2, 1, 1, 1, 0]
+        )
+        self.assertEqual(data[f"progress {self.students[3].id}"]['completed_content'], 9)
+
+    def test_backfill_from_rows(self):
+        now = timezone.now()
+        StudentCourseProgress.objects.bulk_create([
+            StudentCourseProgress(
+                student=student, course=self.course, content=content, completed=True, completed_at=now
+            )
+            for i, student in enumerate(self.students)
+            for content in self.contents[i::2]
+        ])
+        # Started, not completed
+        StudentCourseProgress.objects.create(
+            student=self.students[0], course=self.course, content=self.contents[1], position_seconds=30
+        )
+
+        out = StringIO()
+        call_command('migrate_progress_bitmaps', '--verify', stdout=out)
+        self.assertIn('1 courses differ', out.getvalue())
+
+        call_command('migrate_progress_bitmaps', stdout=StringIO())
+        # Re-running changes nothing
+        call_command('migrate_progress_bitmaps', stdout=StringIO())
+        out = StringIO()
+        call_command('migrate_progress_bitmaps', '--verify', stdout=out)
+        self.assertIn('All 1 courses match', out.getvalue())
+        self.assertParity()
+
+    @override_settings(PROGRESS_BITMAP_WRITES=True)
+    def test_deleted_content_is_ignored(self):
+        for student in self.students[:2]:
+            for content in self.contents[:4]:
+                self.complete(student, content)
+        deleted_bit = CourseContent.objects.get(pk=self.contents[1].pk).progress_bit
+        self.contents[1].delete()
+        CourseContent.objects.create(
+            course=self.course, title='New lesson', content_type='link', file_url='https://example.com/'
+        )
+
+        data = self.assertParity()
+        self.assertEqual(data[f"progress {self.students[0].id}"]['completed_content'], 3)
+        self.assertEqual(data[f"progress {self.students[0].id}"]['total_content'], 10)
+        # The new content got a fresh position instead of the deleted one's
+        self.assertIsNotNone(deleted_bit)
+        self.assertNotIn(
+            deleted_bit,
+            CourseContent.objects.filter(course=self.course).values_list('progress_bit', flat=True)
+        )
+
+    @override_settings(PROGRESS_BITMAP_WRITES=True)
+    def test_completed_all(self):
+        for content in self.contents[:3]:
+            self.complete(self.students[0], content)
+        for content in self.contents[1:3]:
+            self.complete(self.students[1], content)
+
+        module = [content.id for content in self.contents[1:3]]
+        self.assertEqual(
+            sorted(progress_bitmaps.completed_all(self.course.id, module)),
+            [self.students[0].id, self.students[1].id]
+        )
+        self.assertEqual(
+            progress_bitmaps.completed_all(self.course.id, [self.contents[0].id]),
+            [self.students[0].id]
+        )
+
+    @override_settings(PROGRESS_BITMAP_WRITES=True)
+    def test_position_counter_is_not_writable(self):
+        self.complete(self.students[0], self.contents[0])
+        # self.course still holds the counter from before the completion
+        serializer = CourseSerializer(self.course, data={'progress_bits': 0, 'title': 'Renamed'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.assertNotIn('progress_bits', serializer.data)
+        self.assertEqual(self.course.progress_bits, 0)
+        self.course.refresh_from_db(fields=['progress_bits'])
+        self.assertEqual(self.course.progress_bits, 1)
+        self.assertEqual(Course.objects.get(pk=self.course.pk).title, 'Renamed')
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=True)
+class ProgressBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=teacher)
+        self.contents = [
+            CourseContent.objects.create(
+                course=self.course, title=f"Lesson {i}", content_type='link', file_url='https://example.com/'
+            )
+            for i in range(3)
+        ]
+        self.students = [
+            User.objects.create_user(username=f"student{i}", password='x', role='student')
+            for i in range(2)
+        ]
+        # Flushed by the tests, not the background thread
+        patch = mock.patch.object(progress_buffer, 'start_periodic')
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(progress_buffer._queue.clear)
+
+    def record(self, student, content):
+        progress_buffer.record_completion(student.id, self.course.id, content.id, timezone.now())
+
+    def test_reads_merge_pending_completions_with_the_database(self):
+        student = self.students[0]
+        StudentCourseProgress.objects.create(
+            student=student, course=self.course, content=self.contents[0],
+            completed=True, completed_at=timezone.now()
+        )
+        # Pending, and pending again after being flushed
+        self.record(student, self.contents[1])
+        self.record(student, self.contents[0])
+
+        self.assertEqual(
+            progress_buffer.completed_content_ids(student.id, self.course.id),
+            {self.contents[0].id, self.contents[1].id}
+        )
+        self.assertEqual(
+            progress_buffer.completed_counts(self.course.id, [s.id for s in self.students]),
+            {self.students[0].id: 2, self.students[1].id: 0}
+        )
+
+    def test_flush(self):
+        content_ids = [content.id for content in self.contents]
+        funnel.completion_counts(self.course.id, content_ids)
+        for student in self.students:
+            self.record(student, self.contents[0])
+        self.record(self.students[0], self.contents[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(progress_buffer.flush(), 3)
+        self.assertEqual(progress_buffer.flush(), 0)
+
+        self.assertEqual(StudentCourseProgress.objects.filter(completed=True).count(), 3)
+        self.assertEqual(progress_buffer.pending_completions(self.students[0].id, self.course.id), {})
+        self.assertEqual(
+            progress_buffer.completed_counts(self.course.id, [s.id for s in self.students]),
+            {self.students[0].id: 2, self.students[1].id: 1}
+        )
+        self.assertEqual(
+            funnel.completion_counts(self.course.id, content_ids),
+            {content_ids[0]: 2, content_ids[1]: 1, content_ids[2]: 0}
+        )
+
+
+class FunnelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=teacher)
+        self.contents = [
+            CourseContent.objects.create(
+                course=self.course, title=f"Lesson {i}", content_type='link', file_url='https://example.com/'
+            )
+            for i in range(3)
+        ]
+        students = [
+            User.objects.create_user(username=f"student{i}", password='x', role='student')
+            for i in range(4)
+        ]
+        # Everyone completes the first lesson, two the second, one the third
+        for content, completers in zip(self.contents, (students, students[:2], students[:1])):
+            for student in completers:
+                StudentCourseProgress.objects.create(
+                    student=student, course=self.course, content=content,
+                    completed=True, completed_at=timezone.now()
+                )
+
+    def steps(self):
+        return [
+            (step['completed'], step['completion_rate'], step['drop_off'])
+            for step in funnel.funnel(self.course, 4)
+        ]
+
+    def test_stage_counts(self):
+        self.assertEqual(self.steps(), [(4, 100, 0), (2, 50, 50), (1, 25, 50)])
+
+    def test_counters_follow_new_completions(self):
+        self.steps()
+        with self.captureOnCommitCallbacks(execute=True):
+            funnel.record_completions([(self.course.id, self.contents[2].id)])
+        CourseContent.objects.create(
+            course=self.course, title='Lesson 3', content_type='link', file_url='https://example.com/'
+        )
+        self.assertEqual(self.steps(), [(4, 100, 0), (2, 50, 50), (2, 50, 0), (0, 0, 100)])
+
+
+class SearchIndexTests(TestCase):
+    def test_index_follows_courses(self):
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title='Organic chemistry', description='Carbon compounds', instructor=teacher)
+            Course.objects.create(title='Poetry', description='Verse', instructor=teacher)
+
+        total, capped, page = search.search_courses('organic carb')
+        self.assertEqual((total, capped), (1, False))
+        self.assertEqual(page[0][0], course.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+        self.assertEqual(search.search_courses('organic')[0], 0)
+
+
+class SignedMediaTests(TestCase):
+    def test_directory_token_covers_renditions(self):
+        content = CourseContent(hls_manifest='hls/12/master.m3u8')
+        url = signed_media.signed_dir_url(content.hls_manifest)
+        directory = url.rsplit('/', 1)[0]
+        self.assertRegex(url, r'^/media/hls/12/~\d+\.[\w-]+/master\.m3u8$')
+
+        self.assertEqual(signed_media.authorized_path(url), '/media/hls/12/master.m3u8')
+        self.assertEqual(
+            signed_media.authorized_path(f"{directory}/720p/segment_0003.ts"),
+            '/media/hls/12/720p/segment_0003.ts'
+        )
+        # Not another video's directory, nor above the signed one
+        self.assertIsNone(signed_media.authorized_path(url.replace('/hls/12/', '/hls/13/')))
+        self.assertIsNone(signed_media.authorized_path(f"{directory}/../13/master.m3u8"))
+        self.assertIsNone(signed_media.authorized_path('/media/hls/12/720p/segment_0003.ts'))
+
+    def test_file_signature(self):
+        content = CourseContent(thumbnail='previews/ab/abcd/thumbnail.png')
+        url = signed_media.signed_url(content.thumbnail)
+        self.assertEqual(signed_media.authorized_path(url), '/media/previews/ab/abcd/thumbnail.png')
+        self.assertIsNone(signed_media.authorized_path(url.replace('thumbnail', 'other')))
+
+
+class HeartbeatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=teacher)
+        self.videos = [
+            CourseContent.objects.create(
+                course=self.course, title=f"Video {i}", content_type='video', file_url='https://example.com/'
+            )
+            for i in range(3)
+        ]
+        self.student = User.objects.create_user(username='student', password='x', role='student')
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.addCleanup(heartbeats._positions.clear)
+
+    def test_non_finite_values_are_rejected(self):
+        video = self.videos[0]
+        accepted, rejected = heartbeats.ingest(self.student.id, [
+            {'content_id': video.id, 'position': 'nan', 'duration': 100},
+            {'content_id': video.id, 'position': 10, 'duration': 'inf'},
+            {'content_id': video.id, 'position': '-inf', 'duration': 100},
+            {'content_id': video.id, 'position': 20, 'duration': 100},
+        ])
+        self.assertEqual((accepted, rejected), (1, [video.id] * 3))
+
+    def test_bad_row_does_not_block_the_batch(self):
+        for video in self.videos:
+            heartbeats.ingest(self.student.id, [{'content_id': video.id, 'position': 30, 'duration': 100}])
+        # A row the database rejects (NaN is stored as NULL)
+        heartbeats._positions[(self.student.id, self.videos[1].id)][1] = float('nan')
+
+        with self.assertLogs('apps.courses.heartbeats', 'ERROR'):
+            self.assertEqual(heartbeats.flush(), 2)
+        self.assertEqual(heartbeats._positions, {})
+        self.assertEqual(
+            sorted(StudentCourseProgress.objects.values_list('content_id', flat=True)),
+            [self.videos[0].id, self.videos[2].id]
+        )
+
+
+class DeletedCourseTests(TestCase):
+    """A soft-deleted course is gone for students while it is purged."""
+
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=teacher)
+        self.assignment = CourseContent.objects.create(
+            course=self.course, title='Homework', content_type='assignment', file_url='https://example.com/'
+        )
+        self.student = User.objects.create_user(username='student', password='x', role='student')
+        Enrollment.objects.create(student=self.student, course=self.course)
+        Course.all_objects.filter(pk=self.course.pk).update(deleted_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_student_endpoints(self):
+        response = self.client.get('/api/courses/student/my-courses/')
+        self.assertEqual(response.json(), [])
+
+        assignment_id = self.assignment.id
+        for method, path in [
+            ('post', f"/api/courses/student/{assignment_id}/complete/"),
+            ('post', f"/api/courses/student/assignments/{assignment_id}/submit/"),
+            ('get', f"/api/courses/student/assignments/{assignment_id}/submission/"),
+        ]:
+            response = getattr(self.client, method)(path)
+            self.assertEqual(response.status_code, 404, path)
+        self.assertFalse(StudentCourseProgress.objects.exists())
+
+
+class StaleClaimTests(TestCase):
+    def setUp(self):
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=teacher)
+
+    def test_stale_transcode_is_reclaimed(self):
+        now = timezone.now()
+        stale, running = [
+            CourseContent.objects.create(
+                course=self.course, title='Video', content_type='video', transcode_status='processing',
+                transcode_started_at=started_at
+            )
+            for started_at in (now - timedelta(seconds=transcoding.STALE_AFTER + 60), now)
+        ]
+        for content in (stale, running):
+            transcoding.transcode(content.id)
+
+        # Claimed again, and failed here for want of ffmpeg or an uploaded file
+        stale.refresh_from_db()
+        self.assertEqual(stale.transcode_status, 'failed')
+        self.assertGreater(stale.transcode_started_at, now)
+        running.refresh_from_db()
+        self.assertEqual(running.transcode_status, 'processing')
+
+    def test_failed_transcode_is_retried_on_request(self):
+        video = CourseContent.objects.create(
+            course=self.course, title='Video', content_type='video', transcode_status='failed'
+        )
+        transcoding.transcode(video.id)
+        video.refresh_from_db()
+        self.assertIsNone(video.transcode_started_at)
+
+        transcoding.transcode(video.id, retry_failed=True)
+        video.refresh_from_db()
+        self.assertIsNotNone(video.transcode_started_at)
+
+    def test_poster_offset_fits_short_videos(self):
+        self.assertEqual(transcoding.poster_offset(60), transcoding.POSTER_OFFSET)
+        self.assertEqual(transcoding.poster_offset(2), 1)
+        self.assertEqual(transcoding.poster_offset(None), 0)
+
+    def test_stale_preview_is_reclaimed(self):
+        now = timezone.now()
+        stale, running = [
+            CourseContent.objects.create(
+                course=self.course, title='Handout', content_type='pdf', preview_status='processing',
+                preview_started_at=started_at
+            )
+            for started_at in (now - timedelta(seconds=previews.STALE_AFTER + 60), now)
+        ]
+        for content in (stale, running):
+            previews.generate_preview(content.id)
+
+        # Claimed again, and failed here for want of an uploaded file
+        stale.refresh_from_db()
+        self.assertEqual(stale.preview_status, 'failed')
+        self.assertGreater(stale.preview_started_at, now)
+        running.refresh_from_db()
+        self.assertEqual(running.preview_status, 'processing')
+
+
+class PreviewTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_patch = override_settings(MEDIA_ROOT=media_root.name)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        course = Course.objects.create(title='Course', description='', instructor=teacher)
+        self.content = CourseContent.objects.create(
+            course=course, title='Handout', content_type='pdf', preview_status='pending',
+            file=SimpleUploadedFile('handout.pdf', b'%PDF-1.4 original')
+        )
+
+    def test_hash_matches_the_linearized_file(self):
+        def linearize(path):
+            with open(path, 'ab') as f:
+                f.write(b' linearized')
+            return True
+
+        with mock.patch.object(previews, 'linearize', side_effect=linearize), \
+                mock.patch.object(previews.shutil, 'which', return_value='/usr/bin/qpdf'), \
+                mock.patch.object(previews, 'page_count', return_value=1), \
+                mock.patch.object(previews, 'extract_text', return_value=''), \
+                mock.patch.object(previews, 'render_thumbnail'):
+            previews.generate_preview(self.content.id)
+
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.preview_status, 'ready', self.content.preview_error)
+        self.assertEqual(self.content.content_hash, previews.file_sha256(self.content.file.path))
+        self.assertIn(self.content.content_hash, self.content.thumbnail.name)
+
+    def test_failed_preview_is_not_retried_by_default(self):
+        self.content.preview_status = 'failed'
+        self.content.save()
+        with mock.patch.object(previews, 'is_pdf') as is_pdf:
+            previews.generate_preview(self.content.id)
+            is_pdf.assert_not_called()
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_patch = override_settings(MEDIA_ROOT=media_root.name)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+        self.teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=self.teacher)
+        self.assignment = CourseContent.objects.create(
+            course=self.course, title='Essay', content_type='assignment'
+        )
+        self.student = User.objects.create_user(
+            username='student', password='x', role='student', first_name='Ada', last_name='Lovelace'
+        )
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.client = APIClient()
+
+    def test_authentication_and_permissions(self):
+        urls = [
+            f"/api/courses/teacher/{self.course.id}/content/",
+            f"/api/courses/student/assignments/{self.assignment.id}/submit/",
+        ]
+        for url in urls:
+            self.client.force_authenticate(None)
+            self.assertEqual(self.client.post(url).status_code, 401, url)
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.post(urls[0]).status_code, 403)
+        self.assertEqual(self.client.get(urls[1]).status_code, 405)
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self.client.post(urls[1]).status_code, 403)
+
+    def test_multipart_uploads(self):
+        self.client.force_authenticate(self.teacher)
+        response = self.client.post(
+            f"/api/courses/teacher/{self.course.id}/content/",
+            {'title': 'Notes', 'content_type': 'other', 'file': SimpleUploadedFile('notes.txt', b'notes')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        content = CourseContent.objects.get(pk=response.json()['id'])
+        self.assertEqual((content.file.read(), content.file_size), (b'notes', 5))
+
+        self.client.force_authenticate(self.student)
+        url = f"/api/courses/student/assignments/{self.assignment.id}/submit/"
+        for body, status_code in ((b'first', 201), (b'second', 200)):
+            response = self.client.post(
+                url, {'file': SimpleUploadedFile('essay.txt', body)}, format='multipart'
+            )
+            self.assertEqual(response.status_code, status_code, response.content)
+        submission = AssignmentSubmission.objects.get(student=self.student)
+        self.assertEqual(submission.file.read(), b'second')
+
+    async def test_certificate_download_is_streamed(self):
+        certificate = await Certificate.objects.acreate(
+            student=self.student, course=self.course,
+            certificate_file=SimpleUploadedFile('certificate.pdf', b'%PDF-1.4 certificate')
+        )
+        url = f"/api/courses/student/certificates/{certificate.id}/download/"
+        token = CustomTokenObtainPairSerializer.get_token(self.student).access_token
+        response = await AsyncClient().get(url, headers={'Authorization': f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Length'], '20')
+        self.assertIn('Certificate_Course_Ada_Lovelace.pdf', response['Content-Disposition'])
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content, b'%PDF-1.4 certificate')
+
+        other = await User.objects.acreate(username='other', role='student')
+        token = CustomTokenObtainPairSerializer.get_token(other).access_token
+        response = await AsyncClient().get(url, headers={'Authorization': f"Bearer {token}"})
+        self.assertEqual(response.status_code, 403)
+
@@ -0,0 +1,231 @@
+"""
+Adaptive-Bitrate Video Transcoding
+
+Turns an uploaded video into an HLS ladder: several H.264/AAC renditions
+with aligned keyframes, one media playlist per rendition, a master
+playlist and a poster frame. Output goes to MEDIA_ROOT/hls/<content_id>/.
+
+Jobs run on the shared background pool (see background.py) using the
+locally installed ffmpeg/ffprobe. CourseContent.transcode_status moves
+pending -> processing -> ready/failed. Videos left pending because the
+pool was saturated are picked up by `python manage.py transcode_videos`.
+So are videos left processing for more than TRANSCODE_STALE_AFTER
+seconds, e.g. by a worker that was killed mid-job. Failed videos are only
+retried with --retry-failed.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .background import submit
+from .models import CourseContent
+
+
+FFMPEG_BINARY = getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = getattr(settings, 'FFPROBE_BINARY', 'ffprobe')
+SEGMENT_SECONDS = getattr(settings, 'HLS_SEGMENT_SECONDS', 6)
+TRANSCODE_TIMEOUT = getattr(settings, 'TRANSCODE_TIMEOUT', 60 * 60)
+# A job runs ffmpeg twice (renditions, poster), each up to TRANSCODE_TIMEOUT
+STALE_AFTER = getattr(settings, 'TRANSCODE_STALE_AFTER', 3 * TRANSCODE_TIMEOUT)
+
+# (height, video bitrate, audio bitrate), lowest first
+# Seconds into the video the poster frame is taken from, for videos long enough
+POSTER_OFFSET = 3
+
+RENDITIONS = getattr(settings, 'HLS_RENDITIONS', [
+    (360, '800k', '96k'),
+    (480, '1400k', '128k'),
+    (720, '2800k', '128k'),
+    (1080, '5000k', '192k'),
+])
+
+
+class TranscodeError(Exception):
+    """Raised when ffmpeg or ffprobe fails."""
+
+
+def claimable(statuses=('pending',)):
+    """Videos in statuses, or whose processing claim has gone stale."""
+    stale = Q(transcode_started_at__isnull=True) | Q(
+        transcode_started_at__lt=timezone.now() - timedelta(seconds=STALE_AFTER)
+    )
+    return Q(transcode_status__in=statuses) | (Q(transcode_status='processing') & stale)
+
+
+def enqueue(content_id):
+    """
+    Schedule a pending video once the current transaction commits.
+
+    Never blocks: if the worker pool is saturated the video stays pending.
+    """
+    transaction.on_commit(lambda: submit(transcode, content_id))
+
+
+def probe(path):
+    """
+    Inspect a video file.
+
+    Returns:
+        tuple: (video height in pixels, whether it has an audio stream,
+        duration in seconds or None if unknown)
+    """
+    result = subprocess.run(
+        [
+            FFPROBE_BINARY, '-v', 'error',
+            '-show_entries', 'stream=codec_type,height:format=duration',
+            '-of', 'json', path,
+        ],
+        capture_output=True, text=True, timeout=60
+    )
+    if result.returncode != 0:
+        raise TranscodeError(f"ffprobe failed: {result.stderr.strip()[-500:]}")
+
+    info = json.loads(result.stdout or '{}')
+    streams = info.get('streams', [])
+    heights = [s.get('height') or 0 for s in streams if s.get('codec_type') == 'video']
+    if not heights:
+        raise TranscodeError("File has no video stream")
+    has_audio = any(s.get('codec_type') == 'audio' for s in streams)
+    try:
+        duration = float(info.get('format', {}).get('duration'))
+    except (TypeError, ValueError):
+        duration = None
+    return max(heights), has_audio, duration
+
+
+def ladder_for(source_height):
+    """Renditions no taller than the source; at least the lowest one."""
+    ladder = [r for r in RENDITIONS if r[0] <= source_height]
+    return ladder or RENDITIONS[:1]
+
+
+def build_hls_command(source, output_dir, ladder, has_audio):
+    """Build one ffmpeg invocation that encodes every rendition."""
+    split = f"[0:v]split={len(ladder)}" + ''.join(f"[v{i}]" for i in range(len(ladder)))
+    scales = [f"[v{i}]scale=-2:{height}[v{i}out]" for i, (height, _, _) in enumerate(ladder)]
+
+    command = [
+        FFMPEG_BINARY, '-y', '-hide_banner', '-loglevel', 'error',
+        '-i', source,
+        '-filter_complex', ';'.join([split] + scales),
+    ]
+
+    stream_map = []
+    for i, (height, video_bitrate, audio_bitrate) in enumerate(ladder):
+        bitrate_k = int(video_bitrate.rstrip('k'))
+        command += [
+            '-map', f'[v{i}out]',
+            f'-c:v:{i}', 'libx264',
+            f'-b:v:{i}', video_bitrate,
+            f'-maxrate:v:{i}', f'{int(bitrate_k * 1.07)}k',
+            f'-bufsize:v:{i}', f'{int(bitrate_k * 1.5)}k',
+        ]
+        if has_audio:
+            command += ['-map', '0:a:0', f'-c:a:{i}', 'aac', f'-b:a:{i}', audio_bitrate, f'-ac:a:{i}', '2']
+            stream_map.append(f'v:{i},a:{i},name:{height}p')
+        else:
+            stream_map.append(f'v:{i},name:{height}p')
+
+    command += [
+        '-preset', 'veryfast',
+        '-profile:v', 'main',
+        # Keyframes on segment boundaries so renditions switch cleanly
+        '-force_key_frames', f'expr:gte(t,n_forced*{SEGMENT_SECONDS})',
+        '-sc_threshold', '0',
+        '-f', 'hls',
+        '-hls_time', str(SEGMENT_SECONDS),
+        '-hls_playlist_type', 'vod',
+        '-hls_flags', 'independent_segments',
+        '-hls_segment_filename', os.path.join(output_dir, '%v', 'segment_%04d.ts'),
+        '-master_pl_name', 'master.m3u8',
+        '-var_stream_map', ' '.join(stream_map),
+        os.path.join(output_dir, '%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def poster_offset(duration):
+    """POSTER_OFFSET seconds in, or halfway through shorter videos."""
+    if duration is None:
+        return 0
+    return min(POSTER_OFFSET, duration / 2)
+
+
+def build_poster_command(source, poster_path, duration):
+    """Grab a representative frame a few seconds in."""
+    return [
+        FFMPEG_BINARY, '-y', '-hide_banner', '-loglevel', 'error',
+        '-ss', f'{poster_offset(duration):.3f}', '-i', source,
+        '-frames:v', '1', '-vf', 'thumbnail,scale=-2:720',
+        poster_path,
+    ]
+
+
+def _run(command):
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=TRANSCODE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise TranscodeError(f"ffmpeg timed out after {TRANSCODE_TIMEOUT}s")
+    if result.returncode != 0:
+        raise TranscodeError(f"ffmpeg failed: {result.stderr.strip()[-500:]}")
+
+
+def transcode(content_id, retry_failed=False):
+    """
+    Transcode one video to HLS and record the result on CourseContent.
+
+    Safe to call from several workers: only the one that moves the row from
+    pending (or failed, with retry_failed, or a stale processing claim) to
+    processing does the work.
+    """
+    started_at = timezone.now()
+    claimed = CourseContent.objects.filter(
+        claimable(('pending', 'failed') if retry_failed else ('pending',)),
+        pk=content_id,
+        content_type='video'
+    ).update(transcode_status='processing', transcode_error='', transcode_started_at=started_at)
+    if not claimed:
+        return
+
+    content = CourseContent.objects.get(pk=content_id)
+    relative_dir = os.path.join('hls', str(content.id))
+    output_dir = os.path.join(settings.MEDIA_ROOT, relative_dir)
+
+    try:
+        if shutil.which(FFMPEG_BINARY) is None or shutil.which(FFPROBE_BINARY) is None:
+            raise TranscodeError("ffmpeg/ffprobe not found; set FFMPEG_BINARY and FFPROBE_BINARY")
+        if not content.file:
+            raise TranscodeError("Video has no uploaded file")
+
+        source = content.file.path
+        height, has_audio, duration = probe(source)
+        ladder = ladder_for(height)
+
+        # Start from a clean directory so a retry never mixes old segments
+        shutil.rmtree(output_dir, ignore_errors=True)
+        for rendition_height, _, _ in ladder:
+            os.makedirs(os.path.join(output_dir, f'{rendition_height}p'), exist_ok=True)
+
+        _run(build_hls_command(source, output_dir, ladder, has_audio))
+        _run(build_poster_command(source, os.path.join(output_dir, 'poster.jpg'), duration))
+    except (TranscodeError, OSError, ValueError) as e:
+        CourseContent.objects.filter(pk=content_id, transcode_started_at=started_at).update(
+            transcode_status='failed',
+            transcode_error=str(e)
+        )
+        return
+
+    # Unless the claim went stale and another worker took the video over
+    CourseContent.objects.filter(pk=content_id, transcode_started_at=started_at).update(
+        transcode_status='ready',
+        hls_manifest=os.path.join(relative_dir, 'master.m3u8'),
+        poster=os.path.join(relative_dir, 'poster.jpg')
+    )
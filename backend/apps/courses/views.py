@@ -1,3 +1,6 @@
+import os
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
@@ -6,11 +9,18 @@ from rest_framework.views import APIView
 
 from apps.users.permissions import IsTeacher, IsAdmin, IsStudent
 from .models import Course, CourseContent, StudentCourseProgress, AssignmentSubmission
-from .serializers import CourseSerializer, CourseContentSerializer, AdminCreateCourseSerializer, AssignmentSubmissionSerializer
+from .serializers import CourseSerializer, CourseContentSerializer, AdminCreateCourseSerializer, AssignmentSubmissionSerializer, COURSE_LIST_FIELDS
 from rest_framework.decorators import api_view, permission_classes
 from apps.users.models import User
 from apps.enrollments.models import Enrollment
+from apps.enrollments.stats import student_count
+from django.db import transaction
 from django.utils import timezone
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.static import serve
+from eduvillage_backend.async_views import aget_object_or_404, async_api_view, file_response
+from . import deletion, funnel, heartbeats, previews, progress_bitmaps, progress_buffer, search, signed_media, transcoding
 
 
 class CourseListCreateView(APIView):
@@ -21,9 +31,8 @@ class CourseListCreateView(APIView):
         return [IsAuthenticated(), IsTeacher()]
     
     def get(self, request):
-        courses = Course.objects.all()
-        serializer = CourseSerializer(courses, many=True)
-        return Response(serializer.data)
+        # Plain rows instead of a serializer per course; same output
+        return Response(list(Course.objects.values(*COURSE_LIST_FIELDS)))
 
     def post(self, request):
         # Only teachers can create courses
@@ -66,7 +75,7 @@ class CourseDetailView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        course.delete()
+        deletion.delete_course(course)
         return Response(
             {"message": "Course deleted successfully"},
             status=status.HTTP_204_NO_CONTENT
@@ -131,7 +140,7 @@ class CourseUpdateDeleteView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        course.delete()
+        deletion.delete_course(course)
         return Response(
             {"message": "Course deleted successfully"},
             status=status.HTTP_204_NO_CONTENT
@@ -148,13 +157,78 @@ class CourseDeleteView(APIView):
                 {"detail": "Course not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
-        course.delete()
+        deletion.delete_course(course)
         return Response(
             {"message": "Course deleted successfully"},
             status=status.HTTP_200_OK
         )
     
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search_courses(request):
+    """
+    Full-text search over courses, their content titles and document text.
+    
+    Query params: q (required), page (default 1), page_size (default
+    SEARCH_PAGE_SIZE). Results are ranked best first and the last word of
+    q is prefix-matched. Very broad queries report a capped total, with
+    total_capped set.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not search.parse_terms(query):
+        return Response(
+            {"error": "q is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = int(request.query_params.get('page_size', getattr(settings, 'SEARCH_PAGE_SIZE', 20)))
+    except ValueError:
+        return Response(
+            {"error": "page and page_size must be integers"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    page_size = min(max(page_size, 1), getattr(settings, 'SEARCH_MAX_PAGE_SIZE', 100))
+    
+    total, total_capped, hits = search.search_courses(query, limit=page_size, offset=(page - 1) * page_size)
+    
+    # Fetch the page's courses in one query and keep the ranked order
+    courses = {
+        course['id']: course
+        for course in Course.objects.filter(id__in=[course_id for course_id, _ in hits]).values(
+            'id', 'title', 'description', 'duration', 'status', 'instructor_id',
+            'instructor__username', 'created_at'
+        )
+    }
+    results = []
+    for course_id, rank in hits:
+        course = courses.get(course_id)
+        if course is None:
+            continue
+        results.append({
+            "id": course['id'],
+            "title": course['title'],
+            "description": course['description'],
+            "duration": course['duration'],
+            "status": course['status'],
+            "instructor": course['instructor_id'],
+            "instructor_name": course['instructor__username'],
+            "created_at": course['created_at'],
+            "rank": rank,
+        })
+    
+    return Response({
+        "query": query,
+        "total": total,
+        "total_capped": total_capped,
+        "page": page,
+        "page_size": page_size,
+        "results": results
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdmin])
 def admin_courses_list(request):
@@ -174,7 +248,7 @@ def admin_courses_list(request):
 @permission_classes([IsAuthenticated, IsAdmin])
 def admin_delete_course(request, course_id):
     course = get_object_or_404(Course, id=course_id)
-    course.delete()
+    deletion.delete_course(course)
 
     return Response(
         {"message": "Course deleted successfully"},
@@ -212,7 +286,7 @@ def admin_assign_teacher(request, course_id):
         )
 
     course.instructor = teacher
-    course.save()
+    course.save(update_fields=['instructor'])
 
     return Response(
         {
@@ -234,9 +308,8 @@ def admin_assign_teacher(request, course_id):
 def my_courses(request):
     """Get courses assigned to logged-in teacher"""
     teacher = request.user
-    courses = Course.objects.filter(instructor=teacher)
-    serializer = CourseSerializer(courses, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    courses = Course.objects.filter(instructor=teacher).values(*COURSE_LIST_FIELDS)
+    return Response(list(courses), status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
@@ -269,9 +342,14 @@ def course_detail(request, course_id):
             "id": item.id,
             "title": item.title,
             "content_type": item.content_type,
-            "file": item.file.url if item.file else None,
+            "file": signed_media.signed_url(item.file),
             "file_url": item.file_url,
             "created_at": item.created_at,
+            "transcode_status": item.transcode_status,
+            "hls_manifest_url": signed_media.signed_dir_url(item.hls_manifest) if item.transcode_status == 'ready' else None,
+            "thumbnail_url": signed_media.signed_url(item.thumbnail) if item.preview_status == 'ready' else None,
+            "page_count": item.page_count,
+            "file_size": item.file_size,
         })
     
     # Get enrolled students
@@ -302,9 +380,8 @@ def course_detail(request, course_id):
     return Response(data, status=status.HTTP_200_OK)
 
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated, IsTeacher])
-def add_course_content(request, course_id):
+@async_api_view(["POST"], [IsAuthenticated, IsTeacher])
+async def add_course_content(request, course_id):
     """Upload course content - only assigned teacher can upload
     
     Accepts:
@@ -312,10 +389,10 @@ def add_course_content(request, course_id):
     - content_type: 'video', 'pdf', 'assignment', 'document', 'link', 'other'
     - file: actual file upload (for video, pdf, assignment)
     """
-    course = get_object_or_404(Course, pk=course_id)
+    course = await aget_object_or_404(Course, pk=course_id)
     
     # Check if logged-in user is the course instructor
-    if course.instructor != request.user:
+    if course.instructor_id != request.user.id:
         return Response(
             {"error": "You can only add content to courses you teach"},
             status=status.HTTP_403_FORBIDDEN
@@ -364,16 +441,27 @@ def add_course_content(request, course_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
-    # Create CourseContent object
+    # Create CourseContent object; the upload is written to storage off the event loop
     try:
-        content = CourseContent.objects.create(
+        content = await CourseContent.objects.acreate(
             course=course,
             title=title,
             content_type=content_type,
             file=file if file else None,
-            file_url=file_url if file_url else None
+            file_url=file_url if file_url else None,
+            file_size=file.size if file else None,
+            transcode_status='pending' if content_type == 'video' and file else None,
+            preview_status='pending' if content_type in previews.PREVIEW_CONTENT_TYPES and file else None
         )
         
+        # Transcode uploaded videos to HLS in the background
+        if content.transcode_status == 'pending':
+            await sync_to_async(transcoding.enqueue)(content.id)
+        
+        # Render thumbnails and linearize PDFs in the background
+        if content.preview_status == 'pending':
+            await sync_to_async(previews.enqueue)(content.id)
+        
         serializer = CourseContentSerializer(content)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -390,7 +478,9 @@ def student_my_courses(request):
     """Get courses enrolled by logged-in student"""
     student = request.user
     # Get enrollments for this student and fetch related courses
-    enrollments = student.enrollments.all()
+    enrollments = student.enrollments.filter(
+        course__deleted_at__isnull=True
+    ).select_related('course__instructor')
     courses = [enrollment.course for enrollment in enrollments]
     
     # Build response with id, title, instructor username
@@ -427,18 +517,21 @@ def student_course_contents(request, course_id):
     # Get course content
     content = course.content.all()
     
+    # Completed content ids, including clicks not yet flushed
+    completed_ids = progress_buffer.completed_content_ids(student.id, course.id)
+    
+    # Resume positions for videos
+    positions = heartbeats.watch_positions(student.id, course.id)
+    
     # Build content list with completion status
     contents_data = []
     for item in content:
         content_data = CourseContentSerializer(item).data
-        
-        # Check if student has completed this content
-        progress = StudentCourseProgress.objects.filter(
-            student=student,
-            content=item
-        ).first()
-        
-        content_data['completed'] = progress.completed if progress else False
+        content_data['completed'] = item.id in completed_ids
+        if item.content_type == 'video':
+            position, percent = positions.get(item.id, (0, 0))
+            content_data['position_seconds'] = position
+            content_data['percent_watched'] = percent
         contents_data.append(content_data)
     
     data = {
@@ -455,7 +548,8 @@ def student_course_contents(request, course_id):
 @permission_classes([IsAuthenticated, IsStudent])
 def mark_content_complete(request, content_id):
     """Mark course content as completed by student"""
-    content = get_object_or_404(CourseContent, pk=content_id)
+    # Content of a deleted course is gone as far as students are concerned
+    content = get_object_or_404(CourseContent, pk=content_id, course__deleted_at__isnull=True)
     course = content.course
     student = request.user
     
@@ -471,27 +565,76 @@ def mark_content_complete(request, content_id):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # Create or update progress record
-    progress, created = StudentCourseProgress.objects.get_or_create(
-        student=student,
-        content=content,
-        defaults={'course': course}
-    )
-    
-    progress.completed = True
-    progress.completed_at = timezone.now()
-    progress.save()
+    completed_at = timezone.now()
+    
+    if progress_buffer.is_enabled():
+        # Write-behind: queue the event, it is upserted in the next batch
+        progress_buffer.record_completion(student.id, course.id, content.id, completed_at)
+    else:
+        with transaction.atomic():
+            # Create or update progress record
+            progress, created = StudentCourseProgress.objects.get_or_create(
+                student=student,
+                content=content,
+                defaults={'course': course}
+            )
+            
+            if not progress.completed:
+                funnel.record_completions([(course.id, content.id)])
+            progress.completed = True
+            progress.completed_at = completed_at
+            progress.save()
+            
+            if progress_bitmaps.writes_enabled():
+                progress_bitmaps.set_completed([(student.id, content.id)])
     
     return Response(
         {
             "message": "Content marked as completed",
             "content_id": content.id,
-            "completed_at": progress.completed_at
+            "completed_at": completed_at
         },
         status=status.HTTP_200_OK
     )
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsStudent])
+def record_video_heartbeats(request):
+    """
+    Record video watch-progress heartbeats from the player.
+    
+    Accepts:
+    - heartbeats: list of {content_id, position, duration} in seconds
+    
+    Positions are buffered in memory and written periodically; videos
+    watched past VIDEO_COMPLETE_THRESHOLD percent are marked completed.
+    """
+    beats = request.data.get('heartbeats')
+    
+    if not isinstance(beats, list) or not beats:
+        return Response(
+            {"error": "heartbeats must be a non-empty list"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if len(beats) > heartbeats.MAX_BATCH:
+        return Response(
+            {"error": f"At most {heartbeats.MAX_BATCH} heartbeats per request"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    accepted, rejected = heartbeats.ingest(request.user.id, beats)
+    
+    return Response(
+        {
+            "accepted": accepted,
+            "rejected": rejected
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsStudent])
 def student_course_progress(request, course_id):
@@ -515,11 +658,7 @@ def student_course_progress(request, course_id):
     total_content = course.content.count()
     
     # Count completed content for the student
-    completed_content = StudentCourseProgress.objects.filter(
-        student=student,
-        course=course,
-        completed=True
-    ).count()
+    completed_content = len(progress_buffer.completed_content_ids(student.id, course.id))
     
     # Calculate progress percentage
     progress_percentage = (completed_content / total_content * 100) if total_content > 0 else 0
@@ -559,17 +698,17 @@ def teacher_students_progress(request, course_id):
     # Count total content for the course
     total_content = course.content.count()
     
+    # Completed content per student in one grouped query
+    completed_by_student = progress_buffer.completed_counts(
+        course.id,
+        [enrollment.student_id for enrollment in enrollments]
+    )
+    
     # Build student progress list
     students_data = []
     for enrollment in enrollments:
         student = enrollment.student
-        
-        # Count completed content for this student
-        completed_content = StudentCourseProgress.objects.filter(
-            student=student,
-            course=course,
-            completed=True
-        ).count()
+        completed_content = completed_by_student[student.id]
         
         # Calculate progress
         progress_percentage = (completed_content / total_content * 100) if total_content > 0 else 0
@@ -595,6 +734,59 @@ def teacher_students_progress(request, course_id):
     return Response(data, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsTeacher])
+def teacher_course_funnel(request, course_id):
+    """
+    Drop-off funnel for a course - teacher must be assigned.
+
+    Returns each content item in order with how many enrolled students
+    completed it, as a count, a share of enrollments and the drop-off
+    from the previous item.
+    """
+    course = get_object_or_404(Course, pk=course_id)
+
+    if course.instructor_id != request.user.id:
+        return Response(
+            {"error": "You can only view analytics for courses you teach"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    enrolled = student_count(course.id)
+    return Response({
+        "course_id": course.id,
+        "course_title": course.title,
+        "total_students": enrolled,
+        "steps": funnel.funnel(course, enrolled)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsTeacher])
+def teacher_assessment_item_analysis(request, course_id, assessment_id):
+    """
+    Get item analysis for an assessment - teacher must be assigned.
+
+    Returns per-question difficulty, discrimination index and distractor
+    frequencies, plus each student's percentile rank.
+    """
+    from apps.assessments.models import Assessment
+    from apps.assessments.analytics import get_item_analysis
+
+    course = get_object_or_404(Course, pk=course_id)
+
+    # Check if teacher is assigned to this course
+    if course.instructor != request.user:
+        return Response(
+            {"error": "You can only view assessments in courses you teach"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    assessment = get_object_or_404(Assessment, pk=assessment_id, course=course)
+
+    return Response(get_item_analysis(assessment), status=status.HTTP_200_OK)
+
+
 class AdminCreateCourseView(APIView):
     """Admin-only endpoint to create courses."""
     permission_classes = [IsAuthenticated, IsAdmin]
@@ -623,9 +815,8 @@ class AdminCreateCourseView(APIView):
         )
 
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated, IsStudent])
-def submit_assignment(request, assignment_id):
+@async_api_view(["POST"], [IsAuthenticated, IsStudent])
+async def submit_assignment(request, assignment_id):
     """
     Submit assignment for a student.
     
@@ -637,7 +828,7 @@ def submit_assignment(request, assignment_id):
     - Submission ID, status, and timestamp
     """
     # Get the assignment
-    assignment = get_object_or_404(CourseContent, pk=assignment_id)
+    assignment = await aget_object_or_404(CourseContent, pk=assignment_id, course__deleted_at__isnull=True)
     
     # Verify it's an assignment
     if assignment.content_type != 'assignment':
@@ -646,14 +837,14 @@ def submit_assignment(request, assignment_id):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    course = assignment.course
+    course_id = assignment.course_id
     student = request.user
     
     # Check if student is enrolled in the course
-    is_enrolled = Enrollment.objects.filter(
+    is_enrolled = await Enrollment.objects.filter(
         student=student,
-        course=course
-    ).exists()
+        course_id=course_id
+    ).aexists()
     
     if not is_enrolled:
         return Response(
@@ -670,15 +861,15 @@ def submit_assignment(request, assignment_id):
         )
     
     # Create or update submission
-    submission, created = AssignmentSubmission.objects.get_or_create(
+    submission, created = await AssignmentSubmission.objects.aget_or_create(
         student=student,
         assignment=assignment,
-        defaults={'course': course}
+        defaults={'course_id': course_id}
     )
     
-    # Update file (allows resubmission)
+    # Update file (allows resubmission); written to storage off the event loop
     submission.file = file
-    submission.save()
+    await submission.asave()
     
     serializer = AssignmentSubmissionSerializer(submission)
     
@@ -700,7 +891,7 @@ def get_assignment_submission(request, assignment_id):
     
     Returns submission details if exists, otherwise empty response.
     """
-    assignment = get_object_or_404(CourseContent, pk=assignment_id)
+    assignment = get_object_or_404(CourseContent, pk=assignment_id, course__deleted_at__isnull=True)
     course = assignment.course
     student = request.user
     
@@ -781,7 +972,7 @@ def teacher_course_submissions(request, course_id):
             "submission_id": submission.id,
             "assignment_id": submission.assignment.id,
             "assignment_title": submission.assignment.title,
-            "file_url": submission.file.url if submission.file else None,
+            "file_url": signed_media.signed_url(submission.file),
             "file_name": submission.file.name.split('/')[-1] if submission.file else None,
             "submitted_at": submission.submitted_at,
             "updated_at": submission.updated_at
@@ -841,11 +1032,7 @@ def generate_course_certificate(request, course_id):
     
     # Get student's progress
     total_content = course.content.count()
-    completed_content = StudentCourseProgress.objects.filter(
-        student=student,
-        course=course,
-        completed=True
-    ).count()
+    completed_content = len(progress_buffer.completed_content_ids(student.id, course.id))
     
     # Check if course is completed (100%)
     if total_content == 0 or completed_content != total_content:
@@ -898,41 +1085,51 @@ def get_student_certificates(request):
     Returns list of all courses they have completed and received certificates for.
     """
     from .models import Certificate
-    from .serializers import CertificateSerializer
     
     student = request.user
     
-    certificates = Certificate.objects.filter(
-        student=student
-    ).select_related('course')
-    
-    serializer = CertificateSerializer(certificates, many=True)
+    # One query, no per-certificate lookups; same fields as CertificateSerializer
+    rows = Certificate.objects.filter(student_id=student.id).values(
+        'id', 'student', 'course', 'issued_at', 'certificate_file',
+        'student__first_name', 'student__last_name', 'student__username', 'course__title'
+    )
+    certificates = [
+        {
+            "id": row['id'],
+            "student": row['student'],
+            "student_name": f"{row['student__first_name']} {row['student__last_name']}".strip() or row['student__username'],
+            "course": row['course'],
+            "course_title": row['course__title'],
+            "issued_at": row['issued_at'],
+            "certificate_file": signed_media.signed_name_url(row['certificate_file']),
+        }
+        for row in rows
+    ]
     
     return Response(
         {
             "total_certificates": len(certificates),
-            "certificates": serializer.data
+            "certificates": certificates
         },
         status=status.HTTP_200_OK
     )
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated, IsStudent])
-def download_certificate(request, certificate_id):
+@async_api_view(['GET'], [IsAuthenticated, IsStudent])
+async def download_certificate(request, certificate_id):
     """
     Download a specific certificate file.
     
     Student can only download their own certificates.
     """
     from .models import Certificate
-    from django.http import FileResponse
-    import os
     
-    certificate = get_object_or_404(Certificate, id=certificate_id)
+    certificate = await aget_object_or_404(
+        Certificate.objects.select_related('course', 'student'), id=certificate_id
+    )
     
     # Verify ownership
-    if certificate.student != request.user:
+    if certificate.student_id != request.user.id:
         return Response(
             {"error": "You don't have permission to download this certificate"},
             status=status.HTTP_403_FORBIDDEN
@@ -949,7 +1146,7 @@ def download_certificate(request, certificate_id):
         file_path = certificate.certificate_file.path
         
         # Check if file physically exists
-        if not os.path.exists(file_path):
+        if not await sync_to_async(os.path.exists)(file_path):
             return Response(
                 {"error": "Certificate file does not exist on server"},
                 status=status.HTTP_404_NOT_FOUND
@@ -959,12 +1156,8 @@ def download_certificate(request, certificate_id):
         filename = f"Certificate_{certificate.course.title}_{certificate.student.first_name}_{certificate.student.last_name}.pdf"
         filename = filename.replace(" ", "_").replace("/", "_")
         
-        # Open and return file
-        file = open(file_path, 'rb')
-        response = FileResponse(file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        # Streamed in chunks without blocking the event loop
+        return await file_response(request, file_path, content_type='application/pdf', filename=filename)
         
     except Exception as e:
         return Response(
@@ -972,3 +1165,21 @@ def download_certificate(request, certificate_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+def media_auth(request):
+    """
+    Subrequest check for the web server (e.g. nginx auth_request).
+    
+    Verifies the signed URL in the X-Original-URI header. No authentication
+    or database access: 204 if the signature is valid, 403 otherwise.
+    """
+    uri = request.headers.get('X-Original-URI', '')
+    return HttpResponse(status=204 if signed_media.verify_uri(uri) else 403)
+
+
+def serve_signed_media(request, path):
+    """Serve protected media in development; production uses the web server."""
+    authorized = signed_media.authorized_path(request.get_full_path())
+    if authorized is None:
+        return HttpResponseForbidden()
+    return serve(request, authorized[len(settings.MEDIA_URL):], document_root=settings.MEDIA_ROOT)
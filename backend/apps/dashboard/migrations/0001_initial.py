@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('processed_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0, help_text='Enrollments created that day')),
+                ('completions', models.PositiveIntegerField(default=0, help_text='Content items completed that day')),
+                ('submissions', models.PositiveIntegerField(default=0, help_text='First submissions of assignments that day')),
+                ('certificates', models.PositiveIntegerField(default=0, help_text='Certificates issued that day')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='dashboard_c_date_09aa90_idx')],
+                'unique_together': {('course', 'date')},
+            },
+        ),
+    ]
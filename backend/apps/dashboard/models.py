@@ -0,0 +1,40 @@
+from django.db import models
+
+from apps.courses.models import Course
+
+
+class CourseDailyStats(models.Model):
+    """
+    Per-course, per-day activity, maintained by rollups.py.
+
+    Dashboard time series read only this table: a year of one course is at
+    most 365 rows, however many enrollments and completions it had.
+    Days are UTC.
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    date = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0, help_text="Enrollments created that day")
+    completions = models.PositiveIntegerField(default=0, help_text="Content items completed that day")
+    submissions = models.PositiveIntegerField(default=0, help_text="First submissions of assignments that day")
+    certificates = models.PositiveIntegerField(default=0, help_text="Certificates issued that day")
+
+    class Meta:
+        unique_together = ('course', 'date')
+        indexes = [models.Index(fields=['date'])]
+
+    def __str__(self):
+        return f"{self.course_id} on {self.date}"
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup has processed its source rows."""
+    name = models.CharField(max_length=50, primary_key=True)
+    processed_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} until {self.processed_until}"
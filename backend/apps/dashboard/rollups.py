@@ -0,0 +1,148 @@
+"""
+Daily Analytics Rollups
+
+CourseDailyStats holds per-course, per-day (UTC) counts of enrollments,
+content completions, first assignment submissions and certificates.
+Dashboard time series read only this table. run() keeps it up to date
+incrementally:
+
+- The watermark records how far the previous run counted. Each run
+  recounts only the days from (watermark - ANALYTICS_ROLLUP_LAG) up to
+  now. The lag covers rows that are committed after the time they
+  carry: completions flushed by the write-behind buffers and video
+  heartbeats, and long transactions.
+- Each source is counted with one grouped query over an indexed
+  timestamp range. Recounted days are overwritten, not added to, so a
+  repeated or overlapping run gives the same result.
+- The first run, or one with full=True, counts everything.
+
+Counts are events. Deleting an enrollment does not lower the count of the
+day it was made, unless that day is recounted.
+
+Run `python manage.py rollup_analytics` from cron every few minutes.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.courses.models import AssignmentSubmission, Certificate, StudentCourseProgress
+from apps.enrollments.models import Enrollment
+
+from .models import CourseDailyStats, RollupWatermark
+
+
+LAG = datetime.timedelta(seconds=getattr(settings, 'ANALYTICS_ROLLUP_LAG', 15 * 60))
+BATCH_SIZE = 5000
+WATERMARK = 'course_daily_stats'
+
+METRICS = ('enrollments', 'completions', 'submissions', 'certificates')
+
+
+def _sources():
+    """(metric, queryset, timestamp field) per counted event."""
+    return [
+        ('enrollments', Enrollment.objects.all(), 'enrolled_at'),
+        ('completions', StudentCourseProgress.objects.filter(completed=True), 'completed_at'),
+        ('submissions', AssignmentSubmission.objects.all(), 'submitted_at'),
+        ('certificates', Certificate.objects.all(), 'issued_at'),
+    ]
+
+
+def _start_of_day(moment):
+    return datetime.datetime.combine(moment.date(), datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def run(full=False):
+    """
+    Recount the days changed since the last run.
+
+    Args:
+        full (bool): Recount every day instead
+
+    Returns:
+        dict: since (None for a full run), until, events counted per
+        metric and CourseDailyStats rows written
+    """
+    until = timezone.now()
+    with transaction.atomic():
+        # Locked, so overlapping runs take turns
+        watermark = RollupWatermark.objects.select_for_update().filter(name=WATERMARK).first()
+        since = None
+        if watermark is not None and not full:
+            since = _start_of_day(watermark.processed_until.astimezone(datetime.timezone.utc) - LAG)
+
+        days = {}
+        events = {}
+        for metric, queryset, field in _sources():
+            queryset = queryset.filter(**{f"{field}__lt": until})
+            if since is not None:
+                queryset = queryset.filter(**{f"{field}__gte": since})
+            # order_by() drops default orderings, which would split the groups
+            rows = queryset.order_by().annotate(day=TruncDate(field)).values('course_id', 'day').annotate(
+                count=Count('pk')
+            )
+            events[metric] = 0
+            for row in rows:
+                days.setdefault((row['course_id'], row['day']), {})[metric] = row['count']
+                events[metric] += row['count']
+
+        recounted = CourseDailyStats.objects.all()
+        if since is not None:
+            recounted = recounted.filter(date__gte=since.date())
+        recounted.update(**{metric: 0 for metric in METRICS})
+        CourseDailyStats.objects.bulk_create(
+            [
+                CourseDailyStats(course_id=course_id, date=day, **counts)
+                for (course_id, day), counts in days.items()
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['course', 'date'],
+            update_fields=list(METRICS),
+        )
+        # Days that lost all their events keep no row
+        recounted.filter(**{metric: 0 for metric in METRICS}).delete()
+
+        RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'processed_until': until})
+
+    return {'since': since, 'until': until, 'events': events, 'rows': len(days)}
+
+
+def processed_until():
+    """When the rollups were last brought up to date, or None."""
+    watermark = RollupWatermark.objects.filter(name=WATERMARK).first()
+    return watermark.processed_until if watermark is not None else None
+
+
+def time_series(days, course_ids=None):
+    """
+    Daily totals for the last `days` days, oldest first, with empty days as zeros.
+
+    Args:
+        days (int): Number of days up to and including today (UTC)
+        course_ids: Courses to add up (a list or a values_list queryset);
+            every course when None
+
+    Returns:
+        list: [{'date': 'YYYY-MM-DD', 'enrollments': n, ...}]
+    """
+    end = timezone.now().date()
+    start = end - datetime.timedelta(days=days - 1)
+    stats = CourseDailyStats.objects.filter(date__gte=start, date__lte=end)
+    if course_ids is not None:
+        stats = stats.filter(course_id__in=course_ids)
+    totals = {
+        row['date']: row
+        for row in stats.order_by().values('date').annotate(**{metric: Sum(metric) for metric in METRICS})
+    }
+    series = []
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        row = totals.get(day, {})
+        series.append({'date': day.isoformat(), **{metric: row.get(metric) or 0 for metric in METRICS}})
+    return series
@@ -0,0 +1,133 @@
+import datetime
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.courses.models import Course
+from apps.enrollments.models import Enrollment
+from apps.users.models import User
+from eduvillage_backend import profiling
+
+from . import rollups
+from .models import CourseDailyStats
+
+
+NOON = datetime.datetime(2026, 3, 10, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.courses = [
+            Course.objects.create(title=f"Course {i}", description='', instructor=teacher)
+            for i in range(2)
+        ]
+        self.students = 0
+        self.now = NOON
+        patch = mock.patch.object(rollups.timezone, 'now', lambda: self.now)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def enroll(self, course, enrolled_at):
+        self.students += 1
+        student = User.objects.create_user(username=f"student{self.students}", password='x', role='student')
+        enrollment = Enrollment.objects.create(student=student, course=course)
+        Enrollment.objects.filter(pk=enrollment.pk).update(enrolled_at=enrolled_at)
+        return enrollment
+
+    def counts(self):
+        return {
+            (row.course_id, row.date): row.enrollments
+            for row in CourseDailyStats.objects.all()
+        }
+
+    def test_incremental_runs_recount_the_lag_window(self):
+        course = self.courses[0]
+        yesterday = NOON - datetime.timedelta(days=1)
+        self.enroll(course, yesterday)
+        self.enroll(course, NOON - datetime.timedelta(hours=1))
+        self.assertEqual(rollups.run()['since'], None)
+
+        # Committed late, with a time before the watermark but within the lag
+        self.enroll(course, NOON - rollups.LAG / 2)
+        # Too old for an incremental run to see
+        self.enroll(course, yesterday)
+        self.now = NOON + datetime.timedelta(minutes=5)
+        result = rollups.run()
+
+        self.assertEqual(result['since'], datetime.datetime(2026, 3, 10, tzinfo=datetime.timezone.utc))
+        self.assertEqual(
+            self.counts(),
+            {(course.id, yesterday.date()): 1, (course.id, NOON.date()): 2}
+        )
+
+        rollups.run(full=True)
+        self.assertEqual(
+            self.counts(),
+            {(course.id, yesterday.date()): 2, (course.id, NOON.date()): 2}
+        )
+
+    def test_recounted_days_drop_deleted_events(self):
+        enrollment = self.enroll(self.courses[0], NOON - datetime.timedelta(hours=1))
+        rollups.run()
+        enrollment.delete()
+        self.now = NOON + datetime.timedelta(minutes=5)
+        rollups.run()
+        self.assertEqual(self.counts(), {})
+
+    def test_time_series_fills_gaps(self):
+        first, second = self.courses
+        self.enroll(first, NOON - datetime.timedelta(days=2))
+        self.enroll(first, NOON)
+        self.enroll(second, NOON)
+        self.now = NOON + datetime.timedelta(minutes=5)
+        rollups.run()
+
+        series = rollups.time_series(3)
+        self.assertEqual(
+            [(day['date'], day['enrollments']) for day in series],
+            [('2026-03-08', 1), ('2026-03-09', 0), ('2026-03-10', 2)]
+        )
+        self.assertEqual(series[1], {
+            'date': '2026-03-09', 'enrollments': 0, 'completions': 0, 'submissions': 0, 'certificates': 0,
+        })
+        series = rollups.time_series(3, course_ids=[second.id])
+        self.assertEqual([day['enrollments'] for day in series], [0, 0, 1])
+
+
+class ProfilingCaptureTests(TestCase):
+    CAPTURE_ID = '20260310-120000-abcdef12'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(profiling, 'PROFILING_DIR', directory.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        for name in ('config.json', f"{self.CAPTURE_ID}.json"):
+            with open(os.path.join(directory.name, name), 'w') as f:
+                json.dump({'id': name}, f)
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='x', role='admin'))
+
+    def get(self, capture_id):
+        return self.client.get(f"/api/dashboard/admin/profiling/{capture_id}/?format=json")
+
+    def test_only_capture_ids_are_served(self):
+        response = self.get(self.CAPTURE_ID)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), {'id': f"{self.CAPTURE_ID}.json"})
+        response.close()
+
+        self.assertEqual(self.get('config').status_code, 404)
+        self.assertEqual(self.get('20260310-120000-abcdef99').status_code, 404)
+
+    def test_admins_only(self):
+        self.client.force_authenticate(User.objects.create_user(username='teacher', password='x', role='teacher'))
+        self.assertEqual(self.get(self.CAPTURE_ID).status_code, 403)
+
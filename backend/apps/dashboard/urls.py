@@ -1,5 +1,7 @@
 from django.urls import path
 from .views import TeacherDashboardSummary, TeacherCourseStats, StudentMyEnrollments, admin_dashboard_stats, teacher_dashboard_stats
+from .views import admin_profiling, admin_profiling_token, admin_profiling_capture
+from .views import admin_query_report, admin_timeseries, teacher_timeseries
 
 urlpatterns = [
     path('teacher/summary/', TeacherDashboardSummary.as_view()),
@@ -9,4 +11,10 @@ urlpatterns = [
     path("student/my-enrollments/", StudentMyEnrollments.as_view(), name="student-my-enrollments"),
     path("admin/stats/", admin_dashboard_stats, name="admin-dashboard-stats"),
     path("teacher/stats/", teacher_dashboard_stats, name="teacher-dashboard-stats"),
+    path("admin/profiling/", admin_profiling, name="admin-profiling"),
+    path("admin/profiling/token/", admin_profiling_token, name="admin-profiling-token"),
+    path("admin/profiling/<str:capture_id>/", admin_profiling_capture, name="admin-profiling-capture"),
+    path("admin/queries/", admin_query_report, name="admin-query-report"),
+    path("teacher/timeseries/", teacher_timeseries, name="teacher-timeseries"),
+    path("admin/timeseries/", admin_timeseries, name="admin-timeseries"),
 ]
\ No newline at end of file
@@ -1,5 +1,10 @@
+import os
+import time
+
 from django.shortcuts import render
 from django.core.paginator import Paginator
+from django.conf import settings
+from django.http import FileResponse
 
 # Create your views here.
 
@@ -12,7 +17,11 @@ from rest_framework import status
 from apps.users.permissions import IsTeacher, IsStudent, IsAdmin
 from apps.users.models import User
 from apps.courses.models import Course
+from eduvillage_backend import profiling, query_log
+from eduvillage_backend.caching import cached
 from apps.enrollments.models import Enrollment
+from apps.enrollments.stats import student_count, teacher_totals
+from . import rollups
 from django.contrib.auth import get_user_model
 
 
@@ -21,16 +30,11 @@ class TeacherDashboardSummary(APIView):
     permission_classes = [IsAuthenticated, IsTeacher]
 
     def get(self, request):
-        courses = Course.objects.filter(instructor=request.user)
-        total_courses = courses.count()
-
-        total_enrollments = Enrollment.objects.filter(
-            course__in=courses
-        ).count()
+        totals = teacher_totals(request.user.id)
 
         return Response({
-            "total_courses": total_courses,
-            "total_enrollments": total_enrollments
+            "total_courses": totals["courses"],
+            "total_enrollments": totals["enrollments"]
         })
 
 
@@ -49,11 +53,10 @@ class TeacherCourseStats(APIView):
         data = []
     
         for course in page_obj:
-            count = Enrollment.objects.filter(course=course).count()
             data.append({
                 "course_id": course.id,
                 "course_title": course.title,
-                "enrolled_students": count
+                "enrolled_students": student_count(course.id)
             })
 
         return Response({
@@ -68,7 +71,8 @@ class StudentMyEnrollments(APIView):
 
     def get(self, request):
         enrollments = Enrollment.objects.filter(
-            student=request.user
+            student=request.user,
+            course__deleted_at__isnull=True
         ).order_by("-id")
         paginator = Paginator(enrollments, 5)
         page_number = request.GET.get("page", 1)
@@ -91,6 +95,34 @@ class StudentMyEnrollments(APIView):
 })
 
 
+@cached(ttl=60)
+def platform_counts():
+    """Platform-wide totals; up to a minute old, since every signup and enrollment changes them."""
+    # User counts
+    total_users = User.objects.count()
+    total_students = User.objects.filter(role='student').count()
+    total_teachers = User.objects.filter(role='teacher').count()
+    
+    # Course and enrollment counts
+    total_courses = Course.objects.count()
+    total_enrollments = Enrollment.objects.filter(course__deleted_at__isnull=True).count()
+    
+    # Pending teacher approvals
+    pending_teachers = User.objects.filter(
+        role='teacher',
+        teacher_status='pending'
+    ).count()
+    
+    return {
+        "total_users": total_users,
+        "total_students": total_students,
+        "total_teachers": total_teachers,
+        "total_courses": total_courses,
+        "total_enrollments": total_enrollments,
+        "pending_teachers": pending_teachers
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
 def admin_dashboard_stats(request):
@@ -99,29 +131,7 @@ def admin_dashboard_stats(request):
     Returns: total users, students, teachers, courses, enrollments, pending teachers
     """
     try:
-        # User counts
-        total_users = User.objects.count()
-        total_students = User.objects.filter(role='student').count()
-        total_teachers = User.objects.filter(role='teacher').count()
-        
-        # Course and enrollment counts
-        total_courses = Course.objects.count()
-        total_enrollments = Enrollment.objects.count()
-        
-        # Pending teacher approvals
-        pending_teachers = User.objects.filter(
-            role='teacher',
-            teacher_status='pending'
-        ).count()
-        
-        return Response({
-            "total_users": total_users,
-            "total_students": total_students,
-            "total_teachers": total_teachers,
-            "total_courses": total_courses,
-            "total_enrollments": total_enrollments,
-            "pending_teachers": pending_teachers
-        }, status=status.HTTP_200_OK)
+        return Response(platform_counts(), status=status.HTTP_200_OK)
     
     except Exception as e:
         return Response(
@@ -138,13 +148,171 @@ def teacher_dashboard_stats(request):
     teacher = request.user
 
 
-    courses_count = Course.objects.filter(instructor=teacher).count()
-    students_count = User.objects.filter(
-        enrollments__course__instructor=teacher
-    ).distinct().count()
+    totals = teacher_totals(teacher.id)
+
+    return Response({
+        "courses": totals["courses"],
+        "students": totals["students"],
+        "active": totals["courses"]  # or any logic you want
+    }) 
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def admin_profiling(request):
+    """
+    GET: the sampling switch and stored captures, newest first.
+    POST: switch sampling on or off for every worker on this host.
+
+    Body: {"enabled": true, "sample_rate": 0.05, "path_prefix": "/api/courses/", "minutes": 15}
+    """
+    if request.method == "GET":
+        return Response({
+            "config": profiling.config.get(),
+            "captures": profiling.list_captures()
+        })
+
+    enabled = bool(request.data.get("enabled", True))
+    try:
+        sample_rate = float(request.data.get("sample_rate", 0.01))
+        minutes = float(request.data.get("minutes", 15))
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "sample_rate and minutes must be numbers"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 0 < sample_rate <= 1 or not 0 < minutes <= 24 * 60:
+        return Response(
+            {"error": "sample_rate must be in (0, 1] and minutes in (0, 1440]"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
+    config = {
+        "enabled": enabled,
+        "sample_rate": sample_rate,
+        "path_prefix": request.data.get("path_prefix") or "/",
+        # Sampling switches itself off, so a forgotten switch can't linger
+        "expires_at": time.time() + minutes * 60,
+        "updated_by": request.user.id,
+    }
+    profiling.config.save(config)
+    return Response({"config": config})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def admin_profiling_token(request):
+    """Issue an X-Profile header value that profiles any request carrying it."""
     return Response({
-        "courses": courses_count,
-        "students": students_count,
-        "active": courses_count  # or any logic you want
-    }) 
\ No newline at end of file
+        "header": "X-Profile",
+        "token": profiling.make_token(request.user.id),
+        "expires_in": profiling.TOKEN_MAX_AGE
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def admin_profiling_capture(request, capture_id):
+    """Download a capture: the .prof file, or its JSON summary with ?format=json."""
+    as_json = request.query_params.get("format") == "json"
+    path = profiling.capture_path(capture_id, ".json" if as_json else ".prof")
+    if path is None:
+        return Response({"error": "Capture not found"}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=not as_json,
+        filename=os.path.basename(path),
+        content_type="application/json" if as_json else "application/octet-stream"
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def admin_query_report(request):
+    """
+    Hottest SQL statements across this host's workers, and recent slow queries.
+
+    Query params: minutes (default: whole window), top (20), order (total|calls|mean|max)
+    """
+    order = request.query_params.get("order", "total")
+    if order not in ("total", "calls", "mean", "max"):
+        return Response(
+            {"error": "order must be one of total, calls, mean, max"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        minutes = int(request.query_params.get("minutes", query_log.WINDOW_MINUTES))
+        top = min(int(request.query_params.get("top", 20)), 500)
+    except ValueError:
+        return Response(
+            {"error": "minutes and top must be integers"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(query_log.report(minutes, top, order))
+
+
+def _timeseries_response(request, course_ids):
+    max_days = getattr(settings, "ANALYTICS_MAX_DAYS", 730)
+    try:
+        days = int(request.query_params.get("days", 30))
+    except ValueError:
+        return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= days <= max_days:
+        return Response(
+            {"error": f"days must be between 1 and {max_days}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    series = rollups.time_series(days, course_ids)
+    return Response({
+        "days": days,
+        # Events after this are not counted yet
+        "as_of": rollups.processed_until(),
+        "totals": {metric: sum(day[metric] for day in series) for metric in rollups.METRICS},
+        "series": series
+    })
+
+
+def _course_filter(request, courses):
+    """The ?course_id= course among courses as a one-item list, None if absent, or an error Response."""
+    course_id = request.query_params.get("course_id")
+    if course_id is None:
+        return None
+    try:
+        course_id = int(course_id)
+    except ValueError:
+        return Response({"error": "course_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if not courses.filter(id=course_id).exists():
+        return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
+    return [course_id]
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsTeacher])
+def teacher_timeseries(request):
+    """
+    Daily enrollments, completions, submissions and certificates across the
+    teacher's courses, from the rollup tables.
+
+    Query params: days (default 30), course_id (one of the teacher's courses)
+    """
+    courses = Course.objects.filter(instructor=request.user)
+    course_ids = _course_filter(request, courses)
+    if isinstance(course_ids, Response):
+        return course_ids
+    if course_ids is None:
+        course_ids = list(courses.values_list("id", flat=True))
+    return _timeseries_response(request, course_ids)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def admin_timeseries(request):
+    """
+    Platform-wide daily enrollments, completions, submissions and
+    certificates, from the rollup tables.
+
+    Query params: days (default 30), course_id
+    """
+    course_ids = _course_filter(request, Course.objects.all())
+    if isinstance(course_ids, Response):
+        return course_ids
+    return _timeseries_response(request, course_ids)
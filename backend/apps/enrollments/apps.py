@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EnrollmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.enrollments'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.enrollments.signals  # noqa
@@ -21,6 +21,34 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('student', 'course')
+        # Daily rollups (apps/dashboard/rollups.py) scan recent enrollments
+        indexes = [models.Index(fields=['enrolled_at'])]
 
     def str(self):
-        return f"{self.student.username} enrolled in {self.course.title}"
\ No newline at end of file
+        return f"{self.student.username} enrolled in {self.course.title}"
+
+class CourseSimilarity(models.Model):
+    """
+    One of a course's top similar courses by co-enrollment, rebuilt in
+    batches by recommendations.py. Rank 0 is the most similar.
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='similar_courses'
+    )
+    similar = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField(help_text="Cosine similarity of the two courses' student sets")
+    co_enrolled = models.PositiveIntegerField(help_text="Students enrolled in both courses")
+
+    class Meta:
+        # Also the index "students also took" reads in rank order
+        unique_together = ('course', 'rank')
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.similar_id} ({self.score:.3f})"
@@ -0,0 +1,165 @@
+"""
+Co-enrollment Course Recommendations
+
+build() runs as a batch job (`manage.py build_recommendations` from
+cron) and rewrites CourseSimilarity:
+
+1. Every enrollment in a live course becomes a 1 in a sparse
+   students x courses matrix X.
+2. X.T @ X counts, for every pair of courses, the students enrolled in
+   both. The diagonal holds each course's own enrollment count.
+3. A pair's score is the cosine similarity of the two courses' student
+   sets: co_enrolled / sqrt(size_a * size_b). Pairs sharing fewer than
+   RECOMMENDATIONS_MIN_CO_ENROLLED students are dropped as noise.
+4. Each course keeps its RECOMMENDATIONS_TOP_K best pairs, ranked by
+   one sort over all pairs.
+
+Requests only read the stored table:
+
+- also_took(course_id): the course's similar courses in rank order, one
+  read of the (course, rank) index.
+- suggestions(student_id): similar courses of every course the student
+  is enrolled in, scores summed per course, minus courses they already
+  take. One query.
+
+Recommendations lag enrollments by up to one build interval.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from scipy import sparse
+
+from apps.courses.models import Course
+from eduvillage_backend.caching import cached
+
+from .models import CourseSimilarity, Enrollment
+
+
+TOP_K = getattr(settings, 'RECOMMENDATIONS_TOP_K', 20)
+MIN_CO_ENROLLED = getattr(settings, 'RECOMMENDATIONS_MIN_CO_ENROLLED', 2)
+BATCH_SIZE = 5000
+
+COURSE_FIELDS = ('title', 'description', 'instructor__username')
+
+
+def similarities(student_ids, course_ids, top_k=TOP_K, min_co_enrolled=MIN_CO_ENROLLED):
+    """
+    Top similar courses per course from enrollment pairs.
+
+    Args:
+        student_ids, course_ids (ndarray): One entry per enrollment
+        top_k (int): Similar courses kept per course
+        min_co_enrolled (int): Fewest shared students for a pair to count
+
+    Returns:
+        tuple: ndarrays (course, similar, rank, score, co_enrolled), one
+        entry per kept pair, ordered by course and rank
+    """
+    empty = np.array([], dtype=np.int64)
+    if len(course_ids) == 0:
+        return empty, empty, empty, np.array([]), empty
+    students, student_index = np.unique(student_ids, return_inverse=True)
+    courses, course_index = np.unique(course_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(course_index), dtype=np.int32), (student_index, course_index)),
+        shape=(len(students), len(courses))
+    )
+    # Repeated (student, course) pairs are summed on construction; count each once
+    matrix.data[:] = 1
+
+    co = (matrix.T @ matrix).tocoo()
+    sizes = co.diagonal()
+    keep = (co.row != co.col) & (co.data >= min_co_enrolled)
+    rows, cols, counts = co.row[keep], co.col[keep], co.data[keep]
+    scores = counts / np.sqrt(sizes[rows].astype(float) * sizes[cols])
+
+    # By course, then best score first; ties go to the larger overlap
+    order = np.lexsort((cols, -counts, -scores, rows))
+    rows, cols, counts, scores = rows[order], cols[order], counts[order], scores[order]
+    ranks = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+    top = ranks < top_k
+    return courses[rows[top]], courses[cols[top]], ranks[top], scores[top], counts[top]
+
+
+def build():
+    """
+    Recompute CourseSimilarity from current enrollments.
+
+    Returns:
+        dict: enrollments, courses and stored pairs
+    """
+    pairs = np.array(
+        Enrollment.objects.filter(course__deleted_at__isnull=True).values_list('student_id', 'course_id'),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    course, similar, rank, score, co_enrolled = similarities(pairs[:, 0], pairs[:, 1])
+    rows = [
+        CourseSimilarity(course_id=c, similar_id=s, rank=r, score=round(v, 6), co_enrolled=n)
+        for c, s, r, v, n in zip(
+            course.tolist(), similar.tolist(), rank.tolist(), score.tolist(), co_enrolled.tolist()
+        )
+    ]
+    # Readers keep seeing the previous table until the new one commits
+    with transaction.atomic():
+        CourseSimilarity.objects.all().delete()
+        CourseSimilarity.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return {'enrollments': len(pairs), 'courses': len(np.unique(pairs[:, 1])), 'pairs': len(rows)}
+
+
+def _course(row, prefix):
+    """Pop a course's fields off a values() row, named as in browse_courses."""
+    return {
+        'id': row.pop(f"{prefix}id"),
+        'title': row.pop(f"{prefix}title"),
+        'description': row.pop(f"{prefix}description"),
+        'instructor_name': row.pop(f"{prefix}instructor__username"),
+        **row,
+    }
+
+
+def also_took(course_id, limit=TOP_K):
+    """Courses most often taken with course_id, best first."""
+    rows = CourseSimilarity.objects.filter(
+        course_id=course_id,
+        similar__deleted_at__isnull=True
+    ).order_by('rank').values(
+        'similar__id', 'score', 'co_enrolled', *(f"similar__{field}" for field in COURSE_FIELDS)
+    )[:limit]
+    return [_course(row, 'similar__') for row in rows]
+
+
+def suggestions(student_id, limit=TOP_K):
+    """
+    Courses similar to the student's, best first; popular courses for
+    students with no enrollments yet.
+
+    Each suggestion's score is the sum of its similarity to the student's
+    courses; because_of counts the courses it is similar to.
+    """
+    enrolled = Enrollment.objects.filter(student_id=student_id).values('course_id')
+    rows = CourseSimilarity.objects.filter(
+        course_id__in=enrolled,
+        similar__deleted_at__isnull=True
+    ).exclude(
+        similar_id__in=enrolled
+    ).values(
+        'similar__id', *(f"similar__{field}" for field in COURSE_FIELDS)
+    ).annotate(
+        score=Sum('score'),
+        because_of=Count('course_id')
+    ).order_by('-score', 'similar__id')[:limit]
+    rows = [_course(row, 'similar__') for row in rows]
+    if rows or Enrollment.objects.filter(student_id=student_id).exists():
+        return rows
+    return popular_courses()[:limit]
+
+
+@cached(ttl=60 * 60)
+def popular_courses():
+    """Most enrolled live courses, for students without enrollments."""
+    rows = Course.objects.annotate(
+        students=Count('enrollments')
+    ).order_by('-students', 'id').values('id', 'students', *COURSE_FIELDS)[:TOP_K]
+    return [_course(row, '') for row in rows]
@@ -0,0 +1,74 @@
+"""
+Invalidate cached enrollment counts (stats.py) when enrollments or courses
+change.
+
+Like the search index signals, invalidation runs after the transaction
+commits, and course ids are batched per transaction: purging a course
+with thousands of enrollments bumps its tags once.
+"""
+
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.courses.models import Course
+from eduvillage_backend.caching import invalidate_tags
+
+from .models import Enrollment
+
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, 'course_ids'):
+        _local.course_ids = set()
+    return _local.course_ids
+
+
+def _flush():
+    pending = _pending()
+    if pending:
+        course_ids = list(pending)
+        pending.clear()
+        teacher_ids = set(
+            Course.all_objects.filter(id__in=course_ids).values_list('instructor_id', flat=True)
+        )
+        invalidate_tags(
+            *(f"course:{course_id}" for course_id in course_ids),
+            *(f"teacher:{teacher_id}" for teacher_id in teacher_ids)
+        )
+
+
+def invalidate_course_counts(course_ids):
+    """For writes that skip signals, such as bulk_create()."""
+    _pending().update(course_ids)
+    transaction.on_commit(_flush)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    invalidate_course_counts([instance.course_id])
+
+
+@receiver(pre_save, sender=Course)
+def remember_instructor(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored instructor, so a reassigned course clears both teachers' counts."""
+    instance._stored_instructor_id = None
+    if instance._state.adding or (update_fields is not None and 'instructor' not in update_fields):
+        return
+    instance._stored_instructor_id = Course.all_objects.filter(
+        pk=instance.pk
+    ).values_list('instructor_id', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # A deleted course is gone by the time _flush() looks up its teacher
+    invalidate_course_counts([instance.id])
+    teacher_ids = {instance.instructor_id, getattr(instance, '_stored_instructor_id', None)} - {None}
+    transaction.on_commit(lambda: invalidate_tags(*(f"teacher:{teacher_id}" for teacher_id in teacher_ids)))
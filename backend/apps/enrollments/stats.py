@@ -0,0 +1,29 @@
+"""
+Cached enrollment counts.
+
+Tagged by course (and teacher), so signals.py can drop them as soon as an
+enrollment or course changes.
+"""
+
+from django.db.models import Count
+
+from apps.courses.models import Course
+from eduvillage_backend.caching import cached
+
+from .models import Enrollment
+
+
+@cached(ttl=10 * 60, tags=['course:{course_id}'])
+def student_count(course_id):
+    return Enrollment.objects.filter(course_id=course_id).count()
+
+
+@cached(ttl=10 * 60, tags=['teacher:{teacher_id}'])
+def teacher_totals(teacher_id):
+    """Courses, enrollments and distinct students of a teacher's courses."""
+    courses = Course.objects.filter(instructor_id=teacher_id)
+    totals = Enrollment.objects.filter(course__in=courses).aggregate(
+        enrollments=Count('id'),
+        students=Count('student_id', distinct=True)
+    )
+    return {'courses': courses.count(), **totals}
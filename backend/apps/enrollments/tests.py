@@ -1,3 +1,100 @@
+import numpy as np
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.courses.models import Course
+from apps.users.models import User
+
+from . import recommendations, stats
+from .models import CourseSimilarity, Enrollment
+
+
+class TeacherTotalsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old = User.objects.create_user(username='old', password='x', role='teacher')
+        self.new = User.objects.create_user(username='new', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=self.old)
+
+    def test_reassigned_course_clears_both_teachers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(stats.teacher_totals(self.old.id)['courses'], 1)
+            self.assertEqual(stats.teacher_totals(self.new.id)['courses'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.instructor = self.new
+            self.course.save()
+
+        self.assertEqual(stats.teacher_totals(self.old.id)['courses'], 0)
+        self.assertEqual(stats.teacher_totals(self.new.id)['courses'], 1)
+
+
+class RecommendationTests(TestCase):
+    # Students 1-4 over courses A, B, C: A and B have three students each,
+    # C two. A and B share two, A and C two, B and C one
+    ENROLLMENTS = [(1, 'A'), (1, 'B'), (1, 'C'), (2, 'A'), (2, 'B'), (3, 'A'), (3, 'C'), (4, 'B')]
+
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.courses = {
+            name: Course.objects.create(title=name, description='', instructor=teacher)
+            for name in 'ABCD'
+        }
+        self.students = {
+            number: User.objects.create_user(username=f"student{number}", password='x', role='student')
+            for number in range(1, 5)
+        }
+        for number, name in self.ENROLLMENTS:
+            Enrollment.objects.create(student=self.students[number], course=self.courses[name])
+
+    def names(self, rows):
+        ids = {course.id: name for name, course in self.courses.items()}
+        return [ids[row['id']] for row in rows]
+
+    def test_cosine_similarity(self):
+        ids = {'A': 10, 'B': 20, 'C': 30}
+        students = np.array([number for number, _ in self.ENROLLMENTS] + [1])
+        courses = np.array([ids[name] for _, name in self.ENROLLMENTS] + [10])
+        course, similar, rank, score, co_enrolled = recommendations.similarities(
+            students, courses, min_co_enrolled=1
+        )
+        self.assertEqual(
+            list(zip(course.tolist(), similar.tolist(), rank.tolist(), co_enrolled.tolist())),
+            [
+                (10, 30, 0, 2), (10, 20, 1, 2),
+                (20, 10, 0, 2), (20, 30, 1, 1),
+                (30, 10, 0, 2), (30, 20, 1, 1),
+            ]
+        )
+        # co_enrolled / sqrt(size * size); the repeated enrollment counts once
+        np.testing.assert_allclose(
+            score, [2 / np.sqrt(6), 2 / 3, 2 / 3, 1 / np.sqrt(6), 2 / np.sqrt(6), 1 / np.sqrt(6)]
+        )
+
+        course, similar, *_ = recommendations.similarities(students, courses, top_k=1)
+        self.assertEqual(list(zip(course.tolist(), similar.tolist())), [(10, 30), (20, 10), (30, 10)])
+
+    def test_build_and_suggestions(self):
+        self.courses['D'].deleted_at = timezone.now()
+        self.courses['D'].save()
+        Enrollment.objects.create(student=self.students[1], course=self.courses['D'])
+        Enrollment.objects.create(student=self.students[2], course=self.courses['D'])
+
+        # B and C share only one student, below RECOMMENDATIONS_MIN_CO_ENROLLED
+        self.assertEqual(recommendations.build()['pairs'], 4)
+        self.assertFalse(CourseSimilarity.objects.filter(similar=self.courses['D']).exists())
+        self.assertEqual(self.names(recommendations.also_took(self.courses['A'].id)), ['C', 'B'])
+
+        # Courses the student already takes are left out
+        self.assertEqual(self.names(recommendations.suggestions(self.students[2].id)), ['C'])
+        self.assertEqual(self.names(recommendations.suggestions(self.students[4].id)), ['A'])
+
+        client = APIClient()
+        client.force_authenticate(self.students[4])
+        response = client.get('/api/enrollments/courses/browse/', {'order': 'recommended'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response.json()['courses']), ['A', 'B', 'C'])
 
-# Create your tests here.
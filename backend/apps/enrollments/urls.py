@@ -1,5 +1,6 @@
 from django.urls import path
 from .views import EnrollmentView, browse_courses, check_enrollment, course_students_count
+from .views import course_also_took, recommended_courses
 
 urlpatterns = [
     # Enrollment CRUD
@@ -9,4 +10,8 @@ urlpatterns = [
     path('courses/browse/', browse_courses, name='browse-courses'),
     path('courses/<int:course_id>/check/', check_enrollment, name='check-enrollment'),
     path('courses/<int:course_id>/students-count/', course_students_count, name='course-students-count'),
+
+    # Recommendations
+    path('courses/recommended/', recommended_courses, name='recommended-courses'),
+    path('courses/<int:course_id>/also-took/', course_also_took, name='course-also-took'),
 ]
\ No newline at end of file
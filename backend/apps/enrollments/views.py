@@ -7,20 +7,32 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from django.db.models import F
 
 from .models import Enrollment
-from .serializers import EnrollmentSerializer, CourseEnrollmentSerializer
+from .serializers import EnrollmentSerializer
 from .permissions import IsStudent
+from . import recommendations
+from .stats import student_count
 from apps.courses.models import Course
+from apps.courses.heartbeats import invalidate_enrollments
 
 class EnrollmentView(APIView):
     permission_classes = [IsAuthenticated, IsStudent]
     
     def get(self, request):
         """Get student's enrollments"""
-        enrollments = Enrollment.objects.filter(student=request.user)
-        serializer = EnrollmentSerializer(enrollments, many=True)
-        return Response(serializer.data)
+        # Plain rows with EnrollmentSerializer's fields, in one query
+        enrollments = Enrollment.objects.filter(
+            student_id=request.user.id,
+            course__deleted_at__isnull=True
+        ).values(
+            'id', 'student_id', 'course_id', 'enrolled_at',
+            student_username=F('student__username'),
+            course_title=F('course__title'),
+            course_instructor=F('course__instructor__username')
+        )
+        return Response(list(enrollments))
 
     def post(self, request):
         """Enroll student in a course"""
@@ -45,6 +57,9 @@ class EnrollmentView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Let video heartbeats for the new course through right away
+        invalidate_enrollments(request.user.id)
+
         serializer = EnrollmentSerializer(enrollment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -52,16 +67,32 @@ class EnrollmentView(APIView):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsStudent])
 def browse_courses(request):
-    """Get all available courses with enrollment status"""
-    courses = Course.objects.all().select_related('instructor')
-    serializer = CourseEnrollmentSerializer(
-        courses,
-        many=True,
-        context={'request': request}
+    """
+    Get all available courses with enrollment status
+
+    Query params: order=recommended puts the student's suggested courses
+    first, best match first
+    """
+    # One query for the student's enrollments instead of one per course
+    enrolled = set(
+        Enrollment.objects.filter(student_id=request.user.id).values_list('course_id', flat=True)
     )
+    courses = list(Course.objects.values(
+        'id', 'title', 'description', 'created_at',
+        instructor_name=F('instructor__username')
+    ))
+    for course in courses:
+        course['is_enrolled'] = course['id'] in enrolled
+    if request.query_params.get('order') == 'recommended':
+        suggested = {
+            course['id']: position
+            for position, course in enumerate(recommendations.suggestions(request.user.id))
+        }
+        # Stable, so the rest keep their usual order
+        courses.sort(key=lambda course: suggested.get(course['id'], len(suggested)))
     return Response({
-        'total_courses': courses.count(),
-        'courses': serializer.data
+        'total_courses': len(courses),
+        'courses': courses
     }, status=status.HTTP_200_OK)
 
 
@@ -100,9 +131,33 @@ def course_students_count(request, course_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    student_count = Enrollment.objects.filter(course=course).count()
-    
     return Response({
         'course_id': course_id,
-        'student_count': student_count
+        'student_count': student_count(course.id)
+    }, status=status.HTTP_200_OK)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def course_also_took(request, course_id):
+    """Students who took this course also took: similar courses by co-enrollment"""
+    if not Course.objects.filter(id=course_id).exists():
+        return Response(
+            {"error": "Course not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    return Response({
+        'course_id': course_id,
+        'courses': recommendations.also_took(course_id)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStudent])
+def recommended_courses(request):
+    """Courses suggested for the student from their enrollments"""
+    return Response({
+        'courses': recommendations.suggestions(request.user.id)
     }, status=status.HTTP_200_OK)
@@ -7,3 +7,7 @@ class UsersConfig(AppConfig):
     name = 'apps.users'
 
 
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.users.signals  # noqa
@@ -0,0 +1,113 @@
+"""
+Stateless JWT Authentication
+
+simplejwt's JWTAuthentication loads the User row on every request, but
+the permission checks (IsTeacher, IsStudent, IsAdmin, IsAdminUser) only
+look at a handful of fields. Access tokens issued by
+CustomTokenObtainPairSerializer carry those fields as claims, and
+ClaimsJWTAuthentication turns them into a ClaimsUser, a proxy of User,
+without a query. Every other field is deferred: the first time a view
+reads one, all of them are loaded in a single query.
+
+Claims go stale when an admin blocks a user or changes their role, so
+they are only trusted for AUTH_USER_SNAPSHOT_TTL seconds after they
+were read (the claims_at claim, which refreshed access tokens inherit
+unchanged). Older tokens are checked against a snapshot of
+the same fields, cached for AUTH_USER_SNAPSHOT_TTL seconds and dropped
+whenever the user is saved (signals.py). A blocked user is therefore
+rejected within AUTH_USER_SNAPSHOT_TTL seconds on every worker, and
+immediately on workers sharing the admin's cache. Admin actions that
+take access away also revoke the user's tokens outright (revocation.py),
+which applies within seconds.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser, User
+from .revocation import is_revoked
+
+
+SNAPSHOT_TTL = getattr(settings, 'AUTH_USER_SNAPSHOT_TTL', 30)
+SNAPSHOT_FIELDS = ('username', 'role', 'is_active', 'is_staff', 'teacher_status')
+
+
+def _snapshot_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def user_claims(user):
+    """Claims embedded in tokens."""
+    claims = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+    # Sub-second, unlike iat, so a revocation and a sign-in later in the
+    # same second are told apart (revocation.py)
+    claims['claims_at'] = time.time()
+    return claims
+
+
+def user_snapshot(user_id):
+    """
+    Current SNAPSHOT_FIELDS of a user, from the cache or the database.
+
+    Returns:
+        dict or None: None if the user no longer exists
+    """
+    key = _snapshot_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is None:
+            return None
+        cache.set(key, snapshot, SNAPSHOT_TTL)
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(_snapshot_key(user_id))
+
+
+def claims_user(user_id, fields):
+    """ClaimsUser with only `fields` loaded; the rest load on first access."""
+    loaded = {ClaimsUser._meta.pk.attname: user_id, **fields}
+    # from_db() expects values in model field order
+    names = [f.attname for f in ClaimsUser._meta.concrete_fields if f.attname in loaded]
+    return ClaimsUser.from_db(
+        router.db_for_read(ClaimsUser),
+        names,
+        [loaded[name] for name in names]
+    )
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that builds request.user from token claims."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user_id = User._meta.pk.to_python(user_id)
+        # Refreshed access tokens keep the sign-in time in claims_at
+        claims_at = validated_token.get('claims_at')
+        if is_revoked(user_id, claims_at or validated_token.get('iat')):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        if claims_at is not None and time.time() - claims_at <= SNAPSHOT_TTL:
+            fields = {field: validated_token[field] for field in SNAPSHOT_FIELDS}
+        else:
+            fields = user_snapshot(user_id)
+            if fields is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not fields['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return claims_user(user_id, fields)
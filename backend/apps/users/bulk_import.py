@@ -0,0 +1,321 @@
+"""
+Bulk User Import
+
+Creates users and their enrollments from a CSV instead of one
+RegisterView and one EnrollmentView call per student. Columns:
+
+    username (required), email, password, role (student/teacher),
+    first_name, last_name, courses (course ids separated by ';')
+
+The file is streamed in chunks of USER_IMPORT_CHUNK_SIZE rows. For each
+chunk, passwords are hashed in parallel on a process pool, since hashing
+is deliberately slow and holds the GIL. Users and enrollments are then
+written with bulk_create(ignore_conflicts=True) in one transaction.
+Usernames that already exist are left untouched but still enrolled, so a
+failed or repeated import can simply be run again. Only students are
+enrolled: course ids on teacher rows, or on rows naming an existing
+non-student, are ignored.
+
+Rows without a password get an unusable one; those users set it through
+password reset. Hashing dominates the run time for rows with passwords
+(about 1/2 s per password per core with Django's default PBKDF2).
+
+Uploads go through the admin endpoint (views.admin_import_users) and run
+on the background pool; `python manage.py import_users` imports a file
+directly or sweeps up pending uploads.
+"""
+
+import csv
+import logging
+import multiprocessing
+import os
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from apps.courses.heartbeats import invalidate_enrollments
+from apps.courses.models import Course
+from apps.enrollments.models import Enrollment
+from apps.enrollments.signals import invalidate_course_counts
+
+from .models import User, UserImport
+
+
+CHUNK_SIZE = getattr(settings, 'USER_IMPORT_CHUNK_SIZE', 1000)
+HASH_WORKERS = getattr(settings, 'USER_IMPORT_HASH_WORKERS', None) or os.cpu_count()
+IMPORT_DIR = getattr(settings, 'USER_IMPORT_DIR', os.path.join(settings.BASE_DIR, 'imports'))
+MAX_REPORTED_ERRORS = 1000
+IMPORT_ROLES = ('student', 'teacher')
+
+logger = logging.getLogger(__name__)
+
+
+class ImportFileError(Exception):
+    """Raised when the CSV itself cannot be imported."""
+
+
+def hash_pool():
+    # spawn, not fork: imports run next to web server threads. Workers
+    # only need settings; nothing from this module is sent to them
+    return ProcessPoolExecutor(
+        max_workers=HASH_WORKERS,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup
+    )
+
+
+def parse_course_ids(value):
+    """'3;4' or '3,4' or [3, 4] -> [3, 4]. Raises ValueError."""
+    if isinstance(value, (list, tuple)):
+        return [int(course_id) for course_id in value]
+    return [int(course_id) for course_id in str(value or '').replace(',', ';').split(';') if course_id.strip()]
+
+
+def _validate_row(row, seen):
+    """Clean one CSV row; raises ValidationError."""
+    username = (row.get('username') or '').strip()
+    if not username:
+        raise ValidationError("username is required")
+    if len(username) > 150:
+        raise ValidationError("username is longer than 150 characters")
+    User.username_validator(username)
+    if username in seen:
+        raise ValidationError("duplicate username in this file")
+
+    email = (row.get('email') or '').strip()
+    if email:
+        validate_email(email)
+
+    role = (row.get('role') or 'student').strip().lower()
+    if role not in IMPORT_ROLES:
+        raise ValidationError(f"invalid role '{role}'")
+
+    first_name = (row.get('first_name') or '').strip()
+    last_name = (row.get('last_name') or '').strip()
+    if len(first_name) > 150 or len(last_name) > 150:
+        raise ValidationError("name is longer than 150 characters")
+
+    try:
+        course_ids = parse_course_ids(row.get('courses'))
+    except ValueError:
+        raise ValidationError(f"invalid course id in '{row.get('courses')}'")
+
+    return {
+        'username': username,
+        'email': email,
+        'password': row.get('password') or '',
+        'role': role,
+        'first_name': first_name,
+        'last_name': last_name,
+        'course_ids': course_ids,
+    }
+
+
+class Importer:
+    """
+    Imports one CSV stream.
+
+    Counters and the first MAX_REPORTED_ERRORS row errors are kept on the
+    instance; `progress` is called after every chunk.
+    """
+
+    def __init__(self, course_ids=(), chunk_size=CHUNK_SIZE, pool=None, progress=None):
+        self.course_ids = list(course_ids)
+        self.chunk_size = chunk_size
+        self.pool = pool
+        self.progress = progress
+        self.processed_rows = 0
+        self.created_users = 0
+        self.existing_users = 0
+        self.enrollments_created = 0
+        self.failed_rows = 0
+        self.errors = []
+        self._seen = set()
+        self._known_courses = set()
+
+    def _error(self, line, username, message):
+        self.failed_rows += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'username': username, 'error': message})
+
+    def _missing_courses(self, course_ids):
+        unknown = set(course_ids) - self._known_courses
+        if unknown:
+            self._known_courses.update(
+                Course.objects.filter(id__in=unknown).values_list('id', flat=True)
+            )
+        return set(course_ids) - self._known_courses
+
+    def _hash(self, passwords):
+        if self.pool is None or len(passwords) < 2:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (HASH_WORKERS * 4))
+        return list(self.pool.map(make_password, passwords, chunksize=chunksize))
+
+    def _import_chunk(self, rows):
+        valid = []
+        for line, row in rows:
+            try:
+                data = _validate_row(row, self._seen)
+            except ValidationError as e:
+                self._error(line, (row.get('username') or '').strip(), ' '.join(e.messages))
+                continue
+            self._seen.add(data['username'])
+            valid.append((line, data))
+
+        # Row-level course ids that don't exist fail just that row
+        self._missing_courses({course_id for _, data in valid for course_id in data['course_ids']})
+        checked = []
+        for line, data in valid:
+            missing = set(data['course_ids']) - self._known_courses
+            if missing:
+                self._error(line, data['username'], f"course not found: {', '.join(map(str, sorted(missing)))}")
+            else:
+                checked.append(data)
+
+        usernames = [data['username'] for data in checked]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        new = [data for data in checked if data['username'] not in existing]
+
+        with_password = [data for data in new if data['password']]
+        hashes = dict(zip(
+            (data['username'] for data in with_password),
+            self._hash([data['password'] for data in with_password])
+        ))
+        unusable = make_password(None)
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    username=data['username'],
+                    email=data['email'],
+                    password=hashes.get(data['username'], unusable),
+                    role=data['role'],
+                    first_name=data['first_name'],
+                    last_name=data['last_name'],
+                )
+                for data in new
+            ], batch_size=self.chunk_size, ignore_conflicts=True)
+
+            user_ids = {}
+            student_usernames = set()
+            for username, user_id, role in User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'id', 'role'):
+                user_ids[username] = user_id
+                if role == 'student':
+                    student_usernames.add(username)
+            enrollments = {
+                (user_ids[data['username']], course_id)
+                for data in checked if data['username'] in student_usernames
+                for course_id in data['course_ids'] + self.course_ids
+            }
+            student_ids = {student_id for student_id, _ in enrollments}
+            before = Enrollment.objects.filter(student_id__in=student_ids).count()
+            Enrollment.objects.bulk_create([
+                Enrollment(student_id=student_id, course_id=course_id)
+                for student_id, course_id in enrollments
+            ], batch_size=self.chunk_size, ignore_conflicts=True)
+            after = Enrollment.objects.filter(student_id__in=student_ids).count()
+            # bulk_create() sends no signals
+            invalidate_course_counts({course_id for _, course_id in enrollments})
+
+        # Existing students may have their enrollment list cached
+        for username in existing:
+            invalidate_enrollments(user_ids[username])
+
+        self.processed_rows += len(rows)
+        self.created_users += len(new)
+        self.existing_users += len(existing)
+        self.enrollments_created += after - before
+
+    def run(self, csv_file):
+        """
+        Args:
+            csv_file: Text file object positioned at the header row
+        """
+        missing = self._missing_courses(self.course_ids)
+        if missing:
+            raise ImportFileError(f"Courses not found: {', '.join(map(str, sorted(missing)))}")
+        reader = csv.DictReader(csv_file)
+        if not reader.fieldnames or 'username' not in reader.fieldnames:
+            raise ImportFileError("CSV must have a header row with a 'username' column")
+
+        chunk = []
+        # Data starts on line 2, after the header
+        for line, row in enumerate(reader, start=2):
+            chunk.append((line, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+                if self.progress:
+                    self.progress(self)
+        if chunk:
+            self._import_chunk(chunk)
+            if self.progress:
+                self.progress(self)
+        return self
+
+
+def import_file(path, course_ids=(), chunk_size=CHUNK_SIZE, progress=None):
+    """Import a CSV file on disk. Returns the finished Importer."""
+    with hash_pool() as pool, open(path, newline='', encoding='utf-8-sig') as csv_file:
+        return Importer(course_ids, chunk_size, pool, progress).run(csv_file)
+
+
+def _save_progress(user_import_id):
+    def progress(importer):
+        UserImport.objects.filter(pk=user_import_id).update(
+            processed_rows=importer.processed_rows,
+            created_users=importer.created_users,
+            existing_users=importer.existing_users,
+            enrollments_created=importer.enrollments_created,
+            failed_rows=importer.failed_rows,
+            errors=importer.errors,
+        )
+    return progress
+
+
+def run_import(user_import_id):
+    """
+    Process an uploaded UserImport.
+
+    Safe to call from several workers: only the one that claims the row
+    does the work.
+    """
+    claimed = UserImport.objects.filter(
+        pk=user_import_id, status='pending'
+    ).update(status='processing')
+    if not claimed:
+        return
+
+    user_import = UserImport.objects.get(pk=user_import_id)
+    try:
+        import_file(
+            user_import.file_path,
+            user_import.course_ids,
+            progress=_save_progress(user_import_id)
+        )
+    except Exception as e:
+        if not isinstance(e, (ImportFileError, OSError, UnicodeDecodeError, csv.Error, DatabaseError, BrokenExecutor)):
+            logger.exception("User import %s failed", user_import_id)
+        # Anything else would leave the import 'processing' for good
+        UserImport.objects.filter(pk=user_import_id).update(
+            status='failed', error=str(e), finished_at=timezone.now()
+        )
+    else:
+        UserImport.objects.filter(pk=user_import_id).update(
+            status='done', finished_at=timezone.now()
+        )
+    finally:
+        # The file may hold passwords
+        try:
+            os.remove(user_import.file_path)
+        except OSError:
+            pass
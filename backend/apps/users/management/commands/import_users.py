@@ -0,0 +1,73 @@
+"""
+Import users and enrollments from a CSV (see apps/users/bulk_import.py).
+
+Either imports a file directly, printing progress after every chunk, or
+runs uploads left pending by the admin endpoint (pool saturated, process
+restarted).
+
+Usage:
+    python manage.py import_users students.csv [--course 3 --course 4] [--chunk-size 1000]
+    python manage.py import_users --pending
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users import bulk_import
+from apps.users.models import UserImport
+
+
+class Command(BaseCommand):
+    help = "Bulk-create users and enrollments from a CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', nargs='?')
+        parser.add_argument('--course', type=int, action='append', default=[],
+                            help="Enroll every row in this course; repeatable")
+        parser.add_argument('--chunk-size', type=int, default=bulk_import.CHUNK_SIZE)
+        parser.add_argument('--pending', action='store_true',
+                            help="Run pending uploads from the admin endpoint")
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            for user_import_id in UserImport.objects.filter(status='pending').values_list('id', flat=True):
+                bulk_import.run_import(user_import_id)
+                user_import = UserImport.objects.get(pk=user_import_id)
+                self.stdout.write(
+                    f"{user_import_id}: {user_import.status}, {user_import.created_users} created, "
+                    f"{user_import.failed_rows} failed {user_import.error}"
+                )
+            return
+
+        if not options['csv_path']:
+            raise CommandError("Give a CSV path or --pending")
+
+        started = time.monotonic()
+
+        def progress(importer):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{importer.processed_rows} rows ({importer.processed_rows / elapsed:.0f}/s): "
+                f"{importer.created_users} created, {importer.existing_users} existing, "
+                f"{importer.enrollments_created} enrollments, {importer.failed_rows} failed"
+            )
+
+        try:
+            importer = bulk_import.import_file(
+                options['csv_path'], options['course'], options['chunk_size'], progress
+            )
+        except bulk_import.ImportFileError as e:
+            raise CommandError(str(e))
+
+        for error in importer.errors:
+            self.stdout.write(self.style.ERROR(
+                f"line {error['line']} {error['username']}: {error['error']}"
+            ))
+        if importer.failed_rows > len(importer.errors):
+            self.stdout.write(self.style.ERROR(
+                f"... and {importer.failed_rows - len(importer.errors)} more errors"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.processed_rows} rows in {time.monotonic() - started:.1f}s"
+        ))
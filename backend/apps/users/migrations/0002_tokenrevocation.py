@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='token_revocation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('revoked_before', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(db_index=True, help_text='Set on every write, so workers can fetch only new revocations')),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 11:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_tokenrevocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(help_text='Uploaded CSV under USER_IMPORT_DIR, removed once imported', max_length=500)),
+                ('course_ids', models.JSONField(blank=True, default=list, help_text='Courses every imported user is enrolled in')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('created_users', models.PositiveIntegerField(default=0)),
+                ('existing_users', models.PositiveIntegerField(default=0)),
+                ('enrollments_created', models.PositiveIntegerField(default=0)),
+                ('failed_rows', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list, help_text='Per-row errors: line, username, error. Capped, see failed_rows')),
+                ('error', models.TextField(blank=True, default='', help_text='Why the whole import failed')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='user_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_userimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Set when an admin deletes the user; rows are purged in the background', null=True),
+        ),
+    ]
@@ -50,3 +50,101 @@ class User(AbstractUser):
         null=True,
         help_text="Years of teaching experience"
     )
+
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Set when an admin deletes the user; rows are purged in the background"
+    )
+
+
+class ClaimsUser(User):
+    """
+    request.user for ClaimsJWTAuthentication, built from token claims
+    without a query (see authentication.claims_user).
+
+    Only the primary key and the claimed fields are loaded. Django loads a
+    deferred field on first access by calling refresh_from_db(fields=[name]);
+    this loads all the deferred fields at once instead, so a view reading
+    several of them costs a single query.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        if fields is not None:
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+
+class TokenRevocation(models.Model):
+    """
+    Tokens of `user` issued before `revoked_before` are no longer accepted.
+
+    Written when an admin blocks a user or changes their role, and read
+    by every worker through the in-memory filter in revocation.py.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='token_revocation'
+    )
+    revoked_before = models.DateTimeField()
+    updated_at = models.DateTimeField(
+        db_index=True,
+        help_text="Set on every write, so workers can fetch only new revocations"
+    )
+
+    def __str__(self):
+        return f"{self.user_id} revoked before {self.revoked_before}"
+
+
+class UserImport(models.Model):
+    """
+    A CSV of users to create and enroll, uploaded by an admin.
+
+    Processed in the background by bulk_import.run_import; the counters are
+    updated after every chunk so the admin can follow progress.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='user_imports'
+    )
+    file_path = models.CharField(
+        max_length=500,
+        help_text="Uploaded CSV under USER_IMPORT_DIR, removed once imported"
+    )
+    course_ids = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Courses every imported user is enrolled in"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_users = models.PositiveIntegerField(default=0)
+    existing_users = models.PositiveIntegerField(default=0)
+    enrollments_created = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Per-row errors: line, username, error. Capped, see failed_rows"
+    )
+    error = models.TextField(blank=True, default='', help_text="Why the whole import failed")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"User import {self.pk} ({self.status})"
@@ -0,0 +1,124 @@
+"""
+Token Revocation
+
+Access tokens stay valid for ACCESS_TOKEN_LIFETIME and carry the user's
+role (see authentication.py), so blocking a user or taking a role away
+has to invalidate the tokens they already hold. revoke_tokens() records a
+"tokens issued before" time per user in TokenRevocation; tokens from an
+earlier sign-in are rejected and the user has to sign in again.
+
+Reading that table on every request would cost a query per request.
+Instead every worker keeps the recent revocations in memory as a dict of
+user id -> unix time, so a check is a single dict lookup. Every
+TOKEN_REVOCATION_REFRESH_INTERVAL seconds the first request to come along
+fetches only the rows written since the last refresh (updated_at is
+indexed), which is how a revocation reaches all workers within seconds.
+Revocations older than REFRESH_TOKEN_LIFETIME are dropped, since every
+token they could reject has expired.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenRevocation
+
+
+REFRESH_INTERVAL = getattr(settings, 'TOKEN_REVOCATION_REFRESH_INTERVAL', 2)
+# Rows are stamped before their transaction commits, so re-read a window
+# behind the last refresh to pick up late commits and clock skew
+SYNC_OVERLAP = 30
+# Periodic full reload, which also drops expired revocations
+FULL_RELOAD_INTERVAL = 10 * 60
+
+
+class RevocationFilter:
+    """In-process copy of TokenRevocation, refreshed incrementally."""
+
+    def __init__(self, refresh_interval=REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._revoked = {}
+        self._synced_at = None
+        self._next_refresh = 0.0
+        self._next_full_reload = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        now = timezone.now()
+        horizon = now - api_settings.REFRESH_TOKEN_LIFETIME
+        full = self._synced_at is None or time.monotonic() >= self._next_full_reload
+
+        rows = TokenRevocation.objects.filter(revoked_before__gte=horizon)
+        if not full:
+            rows = rows.filter(updated_at__gte=self._synced_at - timedelta(seconds=SYNC_OVERLAP))
+        changes = {
+            user_id: revoked_before.timestamp()
+            for user_id, revoked_before in rows.values_list('user_id', 'revoked_before')
+        }
+
+        # Swap in a new dict rather than mutate, so concurrent readers
+        # never see a partial update
+        if full:
+            self._revoked = changes
+            self._next_full_reload = time.monotonic() + FULL_RELOAD_INTERVAL
+        elif changes:
+            self._revoked = {**self._revoked, **changes}
+        self._synced_at = now
+
+    def _maybe_refresh(self):
+        if time.monotonic() < self._next_refresh:
+            return
+        # Only one thread refreshes; the others carry on with the current
+        # copy, except before the first load
+        if not self._lock.acquire(blocking=self._synced_at is None):
+            return
+        try:
+            if time.monotonic() >= self._next_refresh:
+                self.refresh()
+                self._next_refresh = time.monotonic() + self.refresh_interval
+        finally:
+            self._lock.release()
+
+    def add(self, user_id, revoked_before):
+        self._revoked = {**self._revoked, user_id: revoked_before}
+
+    def is_revoked(self, user_id, issued_at):
+        """
+        Args:
+            user_id: User primary key
+            issued_at (float): Unix time the token's sign-in happened. The
+                claims_at claim has sub-second precision, as revocations
+                do; tokens without it fall back to iat, whole seconds,
+                which also rejects sign-ins in the second of a revocation
+
+        Returns:
+            bool: True if tokens issued at `issued_at` have been revoked
+        """
+        self._maybe_refresh()
+        revoked_before = self._revoked.get(user_id)
+        if revoked_before is None:
+            return False
+        return issued_at is None or issued_at < revoked_before
+
+
+_filter = RevocationFilter()
+
+
+def is_revoked(user_id, issued_at):
+    return _filter.is_revoked(user_id, issued_at)
+
+
+def revoke_tokens(user_id):
+    """Reject every token issued to the user up to now."""
+    now = timezone.now()
+    TokenRevocation.objects.update_or_create(
+        user_id=user_id,
+        defaults={'revoked_before': now, 'updated_at': now}
+    )
+    # Other workers pick it up on their next refresh; this one right away
+    transaction.on_commit(lambda: _filter.add(user_id, now.timestamp()))
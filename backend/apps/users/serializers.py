@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from .models import User
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.exceptions import AuthenticationFailed
+from .authentication import user_claims
+from .revocation import is_revoked
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -49,6 +52,14 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
     
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        """Embed the fields permission checks need, see authentication.py"""
+        token = super().get_token(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
 
@@ -63,4 +74,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id', 'username', 'email', 'role', 'teacher_status', 
                   'qualification', 'subject', 'experience')
-        read_only_fields = ('id', 'role', 'teacher_status')
\ No newline at end of file
+        read_only_fields = ('id', 'role', 'teacher_status')
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = User._meta.pk.to_python(refresh.get(api_settings.USER_ID_CLAIM))
+        if is_revoked(user_id, refresh.get('claims_at') or refresh.get('iat')):
+            raise AuthenticationFailed("Your session has ended, please sign in again")
+
+        return super().validate(attrs)
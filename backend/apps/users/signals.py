@@ -0,0 +1,22 @@
+"""
+Drop cached auth snapshots (authentication.py) when a user changes, so
+blocking a user or changing their role applies on the next request.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user_snapshot
+from .models import ClaimsUser, User
+
+
+# request.user is a ClaimsUser, whose saves are sent with that sender
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ClaimsUser)
+def user_changed(sender, instance, **kwargs):
+    # After commit, so a concurrent request can't cache the old row again
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
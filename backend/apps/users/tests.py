@@ -0,0 +1,175 @@
+import io
+import os
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from apps.courses.models import Course
+from apps.enrollments.models import Enrollment
+
+from . import authentication, bulk_import, revocation
+from .models import User, UserImport
+from .serializers import CustomTokenObtainPairSerializer
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='teacher', password='x', role='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=self.teacher)
+
+    def test_only_students_are_enrolled(self):
+        csv_file = io.StringIO(
+            "username,role,courses\n"
+            f"alice,student,{self.course.id}\n"
+            f"bob,teacher,{self.course.id}\n"
+            # Existing teacher, named with the default role
+            f"teacher,,{self.course.id}\n"
+        )
+        importer = bulk_import.Importer(course_ids=[self.course.id]).run(csv_file)
+
+        self.assertEqual((importer.created_users, importer.existing_users), (2, 1))
+        self.assertEqual(importer.enrollments_created, 1)
+        self.assertEqual(
+            list(Enrollment.objects.values_list('student__username', flat=True)),
+            ['alice']
+        )
+
+    def test_unexpected_error_marks_import_failed(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        user_import = UserImport.objects.create(file_path=path)
+
+        with mock.patch.object(bulk_import, 'import_file', side_effect=RuntimeError("boom")), \
+                self.assertLogs('apps.users.bulk_import', 'ERROR'):
+            bulk_import.run_import(user_import.id)
+
+        user_import.refresh_from_db()
+        self.assertEqual((user_import.status, user_import.error), ('failed', 'boom'))
+        self.assertIsNotNone(user_import.finished_at)
+        self.assertFalse(os.path.exists(path))
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='x', role='student')
+        self.client = APIClient()
+        # Sign-ins and the revocation all happen within one second
+        self.now = int(time.time()) + 0.2
+        for patch in (
+            mock.patch.object(revocation, '_filter', revocation.RevocationFilter()),
+            mock.patch.object(authentication, 'time', mock.Mock(time=lambda: self.now)),
+            mock.patch(
+                'apps.users.revocation.timezone.now',
+                lambda: datetime.fromtimestamp(self.now, tz=dt_timezone.utc)
+            ),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def sign_in(self):
+        response = self.client.post('/api/token/', {'username': 'student', 'password': 'x'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def profile_status(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        status_code = self.client.get('/api/users/me/').status_code
+        self.client.credentials()
+        return status_code
+
+    def test_revoked_tokens_are_rejected(self):
+        old = self.sign_in()
+        self.assertEqual(self.profile_status(old['access']), 200)
+
+        self.now += 0.3
+        with self.captureOnCommitCallbacks(execute=True):
+            revocation.revoke_tokens(self.user.id)
+        self.now += 0.3
+
+        self.assertEqual(self.profile_status(old['access']), 401)
+        response = self.client.post('/api/token/refresh/', {'refresh': old['refresh']})
+        self.assertEqual(response.status_code, 401)
+
+        # Signing in again in the same second works
+        new = self.sign_in()
+        self.assertEqual(self.profile_status(new['access']), 200)
+        response = self.client.post('/api/token/refresh/', {'refresh': new['refresh']})
+        self.assertEqual(response.status_code, 200)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='teacher', password='x', email='t@example.com',
+            role='teacher', teacher_status='approved'
+        )
+        self.now = 1000.0
+        for patch in (
+            mock.patch.object(authentication, 'time', mock.Mock(time=lambda: self.now)),
+            mock.patch.object(authentication, 'is_revoked', return_value=False),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def get_user(self):
+        return authentication.ClaimsJWTAuthentication().get_user(self.token)
+
+    def test_fresh_claims_need_no_query(self):
+        with self.assertNumQueries(0):
+            user = self.get_user()
+            self.assertEqual((user.pk, user.role, user.teacher_status), (self.user.pk, 'teacher', 'approved'))
+        self.assertIsInstance(user, User)
+        self.assertEqual(user, self.user)
+
+        # The other fields load together, on first access
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.experience), ('t@example.com', None))
+
+    def test_claims_are_trusted_for_the_snapshot_ttl(self):
+        User.objects.filter(pk=self.user.pk).update(role='student')
+        self.now += authentication.SNAPSHOT_TTL
+        self.assertEqual(self.get_user().role, 'teacher')
+
+        # Older claims are replaced by the cached snapshot
+        self.now += 1
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_user().role, 'student')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_user().role, 'student')
+
+    def test_saving_the_user_drops_the_snapshot(self):
+        self.now += authentication.SNAPSHOT_TTL + 1
+        user = self.get_user()
+        self.assertEqual(user.role, 'teacher')
+        # Saved through request.user
+        user.role = 'student'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.get_user().role, 'student')
+
+    def test_inactive_user_is_rejected_after_the_claims_expire(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_user().pk, self.user.pk)
+
+        self.now += authentication.SNAPSHOT_TTL + 1
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.get_user()
+        self.assertEqual(raised.exception.detail['code'], 'user_inactive')
+
+    def test_deleted_user_is_rejected_after_the_claims_expire(self):
+        self.user.delete()
+        self.now += authentication.SNAPSHOT_TTL + 1
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.get_user()
+        self.assertEqual(raised.exception.detail['code'], 'user_not_found')
@@ -5,6 +5,7 @@ from .views import (
     admin_pending_teachers, admin_approved_teachers, admin_approve_teacher, admin_reject_teacher
 )
 from .views import admin_block_user, admin_unblock_user
+from .views import admin_import_users, admin_import_status
 
 urlpatterns = [
     path('register/', RegisterView.as_view()),
@@ -20,4 +21,6 @@ urlpatterns = [
     path("admin/teachers/<int:teacher_id>/reject/", admin_reject_teacher),
     path("admin/users/<int:user_id>/block/",admin_block_user),
     path("admin/users/<int:user_id>/unblock/",admin_unblock_user),
+    path("admin/users/import/", admin_import_users),
+    path("admin/users/import/<int:import_id>/", admin_import_status),
 ]
\ No newline at end of file
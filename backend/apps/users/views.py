@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -7,7 +10,13 @@ from django.contrib.auth import authenticate
 from .serializers import RegisterSerializer
 from .models import User
 from .permissions import IsAdmin
+from .revocation import revoke_tokens
+from . import bulk_import
+from .models import UserImport
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from apps.courses.background import submit
+from apps.courses.deletion import delete_user
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import CustomTokenObtainPairSerializer
@@ -35,10 +44,9 @@ def admin_users_list(request):
     """Get all users, optionally filtered by role."""
     role_filter = request.query_params.get('role', None)
     
+    users = User.objects.filter(deleted_at__isnull=True)
     if role_filter:
-        users = User.objects.filter(role=role_filter)
-    else:
-        users = User.objects.all()
+        users = users.filter(role=role_filter)
 
     data = []
     for user in users:
@@ -72,7 +80,7 @@ def admin_delete_user(request, user_id):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    user.delete()
+    delete_user(user)
     return Response(
         {"message": "User deleted successfully"},
         status=status.HTTP_200_OK
@@ -109,6 +117,8 @@ def admin_update_user_role(request, user_id):
 
     user.role = new_role
     user.save()
+    # Existing tokens carry the old role
+    revoke_tokens(user.id)
 
     return Response(
         {"message": "User role updated successfully"},
@@ -122,7 +132,8 @@ def admin_pending_teachers(request):
     """Get all teachers with pending approval status"""
     pending_teachers = User.objects.filter(
         role='teacher',
-        teacher_status='pending'
+        teacher_status='pending',
+        deleted_at__isnull=True
     )
     
     data = []
@@ -146,7 +157,8 @@ def admin_approved_teachers(request):
     """Get all approved teachers for course assignment"""
     approved_teachers = User.objects.filter(
         role='teacher',
-        teacher_status='approved'
+        teacher_status='approved',
+        deleted_at__isnull=True
     )
     
     data = []
@@ -204,6 +216,7 @@ def admin_reject_teacher(request, teacher_id):
     
     teacher.teacher_status = 'rejected'
     teacher.save()
+    revoke_tokens(teacher.id)
     
     return Response(
         {
@@ -225,6 +238,7 @@ def admin_block_user(request, user_id):
         user = User.objects.get(id=user_id)
         user.is_active = False
         user.save()
+        revoke_tokens(user.id)
         return Response(
             {"message": "User blocked successfully"},
             status=status.HTTP_200_OK
@@ -301,4 +315,75 @@ class ProfileView(APIView):
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = CustomTokenObtainPairSerializer
\ No newline at end of file
+    serializer_class = CustomTokenObtainPairSerializer
+
+
+def _user_import_data(user_import):
+    return {
+        "id": user_import.id,
+        "status": user_import.status,
+        "processed_rows": user_import.processed_rows,
+        "created_users": user_import.created_users,
+        "existing_users": user_import.existing_users,
+        "enrollments_created": user_import.enrollments_created,
+        "failed_rows": user_import.failed_rows,
+        "errors": user_import.errors,
+        "error": user_import.error,
+        "created_at": user_import.created_at,
+        "finished_at": user_import.finished_at,
+    }
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def admin_import_users(request):
+    """
+    Upload a CSV of users to create and enroll (see bulk_import.py).
+
+    Optional course_ids ("3,4") enrolls every row in those courses. The
+    import runs in the background; poll the returned status URL.
+    """
+    csv_file = request.FILES.get('file')
+    if not csv_file:
+        return Response(
+            {"error": "CSV file is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        course_ids = bulk_import.parse_course_ids(request.data.get('course_ids'))
+    except ValueError:
+        return Response(
+            {"error": "course_ids must be a list of course ids"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    os.makedirs(bulk_import.IMPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=bulk_import.IMPORT_DIR, suffix='.csv')
+    with os.fdopen(fd, 'wb') as f:
+        for chunk in csv_file.chunks():
+            f.write(chunk)
+
+    user_import = UserImport.objects.create(
+        created_by_id=request.user.id,
+        file_path=path,
+        course_ids=course_ids
+    )
+    # If the pool is saturated it stays pending for `manage.py import_users --pending`
+    transaction.on_commit(lambda: submit(bulk_import.run_import, user_import.id))
+
+    return Response(
+        {
+            **_user_import_data(user_import),
+            "status_url": f"/api/users/admin/users/import/{user_import.id}/"
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def admin_import_status(request, import_id):
+    """Progress and row errors of a user import"""
+    user_import = get_object_or_404(UserImport, id=import_id)
+    return Response(_user_import_data(user_import), status=status.HTTP_200_OK)
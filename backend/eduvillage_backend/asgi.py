@@ -0,0 +1,15 @@
+"""ASGI config for eduvillage_backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker eduvillage_backend.asgi
+
+Views written with eduvillage_backend.async_views.async_api_view run on
+the event loop; all other views run in a thread per request, as under WSGI.
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eduvillage_backend.settings')
+
+application = get_asgi_application()
@@ -0,0 +1,131 @@
+"""
+Async API Views
+
+DRF runs views synchronously. Under ASGI, Django therefore gives every DRF
+request a thread for its whole duration, including slow uploads and file
+downloads. @async_api_view is the async counterpart of
+@api_view + @permission_classes for I/O-bound views:
+
+    @async_api_view(['POST'], [IsAuthenticated, IsStudent])
+    async def submit_assignment(request, assignment_id):
+        assignment = await aget_object_or_404(CourseContent, pk=assignment_id)
+        ...
+
+The view receives a DRF Request and returns a DRF Response. As with
+@api_view, the following happen before the view runs:
+
+- authentication
+- permission and throttle checks
+- content negotiation
+- parsing of the request body (request.data, request.FILES)
+
+These steps run in a worker thread. APIExceptions and Http404 become
+error responses as usual.
+
+Inside the view, use the async ORM (aget(), aexists(), asave()...).
+Lazy relations raise SynchronousOnlyOperation, so use select_related()
+or the *_id fields.
+
+Under WSGI (runserver, gunicorn), Django runs these views through
+async_to_sync. They still work but don't free a thread. Sync views work
+unchanged under both servers.
+"""
+
+import functools
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.views import APIView
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def async_api_view(http_method_names, permission_classes=None):
+    """
+    Decorate an async function view like @api_view(http_method_names).
+
+    Args:
+        http_method_names (list): Allowed methods, e.g. ['GET']
+        permission_classes (list): As for @permission_classes; the
+            REST_FRAMEWORK default when omitted
+    """
+    methods = [method.lower() for method in http_method_names]
+
+    def decorator(func):
+        attrs = {'http_method_names': methods}
+        if permission_classes is not None:
+            attrs['permission_classes'] = permission_classes
+        # Handlers only make allowed_methods (the Allow header) right
+        attrs.update({method: func for method in methods})
+        view_class = type(f"{func.__name__}_view", (APIView,), attrs)
+
+        def prepare(api_view, request, args, kwargs):
+            if request.method.lower() not in methods:
+                raise MethodNotAllowed(request.method)
+            api_view.initial(request, *args, **kwargs)
+            # Parse the body here rather than on first access in the view
+            request.data
+
+        @functools.wraps(func)
+        async def view(request, *args, **kwargs):
+            api_view = view_class()
+            api_view.args = args
+            api_view.kwargs = kwargs
+            request = api_view.initialize_request(request, *args, **kwargs)
+            api_view.request = request
+            api_view.headers = api_view.default_response_headers
+            try:
+                await sync_to_async(prepare)(api_view, request, args, kwargs)
+                response = await func(request, *args, **kwargs)
+            except Exception as exc:
+                response = api_view.handle_exception(exc)
+            return api_view.finalize_response(request, response, *args, **kwargs)
+
+        view.cls = view_class
+        return csrf_exempt(view)
+    return decorator
+
+
+async def aget_object_or_404(model, **lookup):
+    """Async get_object_or_404() for a model or queryset."""
+    queryset = model._default_manager.all() if hasattr(model, '_default_manager') else model
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+async def _read_chunks(path, chunk_size):
+    # The default executor, not the request's thread, so reads overlap
+    file = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    try:
+        while chunk := await sync_to_async(file.read, thread_sensitive=False)(chunk_size):
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
+
+
+async def file_response(request, path, content_type=None, filename=None):
+    """
+    Stream a file from disk without blocking the event loop.
+
+    Under ASGI, Django would read a plain FileResponse into memory in one
+    go, so the file is streamed in FILE_CHUNK_SIZE reads from a thread
+    pool instead. Under WSGI it is a FileResponse, which the server can
+    send with sendfile.
+    """
+    disposition = f'attachment; filename="{filename}"' if filename else None
+    if not isinstance(getattr(request, '_request', request), ASGIRequest):
+        file = await sync_to_async(open)(path, 'rb')
+        response = FileResponse(file, content_type=content_type)
+    else:
+        size = await sync_to_async(os.path.getsize)(path)
+        response = StreamingHttpResponse(_read_chunks(path, FILE_CHUNK_SIZE), content_type=content_type)
+        response['Content-Length'] = str(size)
+    if disposition:
+        response['Content-Disposition'] = disposition
+    return response
@@ -0,0 +1,307 @@
+"""
+Two-tier Cache
+
+@cached keeps a function's results in two places:
+
+- L1: an LRU dict in each process holding up to CACHE_L1_MAX_ENTRIES
+  values. A value is kept for at most CACHE_L1_TTL seconds, so other
+  workers pick up a change within that time.
+- L2: the shared Django cache CACHE_L2_ALIAS (Redis when REDIS_URL is
+  set, see settings.CACHES). A value is kept for the decorator's ttl.
+
+Recomputation is guarded in two ways:
+
+- Single flight. When a key expires, only one caller recomputes it. In
+  the same process, the other callers wait for its result. Across
+  workers, a lock key added to L2 picks the one worker that recomputes.
+  The others serve the stale value, since L2 keeps entries
+  CACHE_STALE_GRACE seconds past their ttl. If there is no stale value,
+  they wait up to CACHE_LOCK_WAIT seconds for the new one.
+- Early refresh (XFetch). A hit close to expiry may recompute ahead of
+  time. The chance grows as expiry nears and with how long the value
+  took to compute, so busy keys are seldom seen expired.
+
+Values can be tagged, e.g. course:12. invalidate_tags('course:12') bumps
+the tag's version in L2. Entries stored under an older version count as
+misses in every worker, and this process drops its L1 copies at once.
+Other workers drop theirs within CACHE_L1_TTL seconds.
+
+    @cached(ttl=300, tags=['course:{course_id}'])
+    def student_count(course_id):
+        ...
+"""
+
+import functools
+import inspect
+import math
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+L2_ALIAS = getattr(settings, 'CACHE_L2_ALIAS', 'default')
+L1_MAX_ENTRIES = getattr(settings, 'CACHE_L1_MAX_ENTRIES', 10000)
+L1_TTL = getattr(settings, 'CACHE_L1_TTL', 5)
+STALE_GRACE = getattr(settings, 'CACHE_STALE_GRACE', 60)
+LOCK_TIMEOUT = getattr(settings, 'CACHE_LOCK_TIMEOUT', 30)
+LOCK_WAIT = getattr(settings, 'CACHE_LOCK_WAIT', 5)
+# XFetch beta; above 1 refreshes earlier
+EARLY_REFRESH_BETA = getattr(settings, 'CACHE_EARLY_REFRESH_BETA', 1.0)
+POLL_INTERVAL = 0.05
+
+KEY_PREFIX = 'tiered'
+TAG_PREFIX = 'tag'
+
+# versions: tag versions read before the value was computed
+Entry = namedtuple('Entry', 'value expires_at delta versions')
+
+
+def _l2():
+    return caches[L2_ALIAS]
+
+
+class LRUCache:
+    """L1: a bounded, thread-safe LRU of Entry, each kept at most L1_TTL seconds."""
+
+    def __init__(self, max_entries=L1_MAX_ENTRIES, ttl=L1_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (entry, tags, stored_at)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if now - item[2] > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key, entry, tags, now):
+        with self._lock:
+            self._data[key] = (entry, frozenset(tags), now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def drop_tags(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for key in [key for key, item in self._data.items() if not tags.isdisjoint(item[1])]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local = LRUCache()
+
+
+def _tag_key(tag):
+    return f"{TAG_PREFIX}:{tag}"
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def _current_versions(tags):
+    """Versions of tags for a value about to be computed; missing tags get one."""
+    if not tags:
+        return ()
+    l2 = _l2()
+    keys = [_tag_key(tag) for tag in tags]
+    found = l2.get_many(keys)
+    for key in keys:
+        if key not in found:
+            version = _new_version()
+            # add() so workers starting the same tag agree on its version
+            found[key] = version if l2.add(key, version, None) else l2.get(key)
+    return tuple(found.get(key) for key in keys)
+
+
+def invalidate_tags(*tags):
+    """Make every value tagged with any of tags a miss."""
+    if not tags:
+        return
+    version = _new_version()
+    _l2().set_many({_tag_key(tag): version for tag in tags}, None)
+    local.drop_tags(tags)
+
+
+def _read_l2(key, tags):
+    """The L2 entry if its tags are still at the versions it was stored with."""
+    tag_keys = [_tag_key(tag) for tag in tags]
+    found = _l2().get_many([key, *tag_keys])
+    stored = found.get(key)
+    if stored is None:
+        return None
+    entry = Entry(*stored)
+    # A missing tag (evicted) never matches, since stored versions are never None
+    if entry.versions != tuple(found.get(tag_key) for tag_key in tag_keys):
+        return None
+    return entry
+
+
+def _needs_refresh(entry, now):
+    """Expired, or picked for early refresh (XFetch)."""
+    # 1 - random() is in (0, 1], so log() is defined
+    return now - entry.delta * EARLY_REFRESH_BETA * math.log(1.0 - random.random()) >= entry.expires_at
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.ok = False
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _compute(key, compute, ttl, tags):
+    versions = _current_versions(tags)
+    start = time.time()
+    value = compute()
+    now = time.time()
+    entry = Entry(value, now + ttl, now - start, versions)
+    _l2().set(key, tuple(entry), ttl + STALE_GRACE)
+    local.set(key, entry, tags, now)
+    return value
+
+
+def _wait_for_l2(key, tags):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = _read_l2(key, tags)
+        if entry is not None and entry.expires_at > time.time():
+            local.set(key, entry, tags, time.time())
+            return entry
+    return None
+
+
+def _refresh(key, compute, ttl, tags, stale):
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if stale is not None:
+            return stale.value
+        flight.done.wait(LOCK_WAIT)
+        if flight.ok:
+            return flight.value
+        # The leader failed or is stuck; don't fail because of it
+        return compute()
+
+    try:
+        lock_key = f"{key}:lock"
+        l2 = _l2()
+        if l2.add(lock_key, 1, LOCK_TIMEOUT):
+            try:
+                flight.value = _compute(key, compute, ttl, tags)
+            finally:
+                l2.delete(lock_key)
+        elif stale is not None:
+            # Another worker is recomputing
+            flight.value = stale.value
+        else:
+            entry = _wait_for_l2(key, tags)
+            flight.value = entry.value if entry is not None else _compute(key, compute, ttl, tags)
+        flight.ok = True
+        return flight.value
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def get_or_compute(key, compute, ttl, tags=()):
+    """
+    The cached value for key, computing it with compute() when needed.
+
+    Args:
+        key (str): Cache key
+        compute (callable): Builds the value; must return something picklable
+        ttl (int): Seconds the value counts as fresh
+        tags (iterable): Tags to invalidate the value by
+
+    Returns:
+        The cached or computed value
+    """
+    tags = tuple(tags)
+    now = time.time()
+    entry = local.get(key, now)
+    if entry is not None and not _needs_refresh(entry, now):
+        return entry.value
+    entry = _read_l2(key, tags)
+    if entry is None:
+        return _refresh(key, compute, ttl, tags, stale=None)
+    if _needs_refresh(entry, now):
+        # L2 keeps entries STALE_GRACE past expiry, so this one can be served meanwhile
+        return _refresh(key, compute, ttl, tags, stale=entry)
+    local.set(key, entry, tags, now)
+    return entry.value
+
+
+def cached(ttl, tags=(), key=None):
+    """
+    Cache a function's results in both tiers.
+
+    Args:
+        ttl (int): Seconds a result counts as fresh
+        tags (iterable): Tag templates formatted with the call's arguments,
+            e.g. 'course:{course_id}'
+        key (str): Key template formatted the same way. By default every
+            argument is part of the key.
+
+    The wrapped function gets an invalidate(*args, **kwargs) attribute
+    that drops the result for those arguments.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        prefix = f"{KEY_PREFIX}:{func.__module__}.{func.__qualname__}"
+
+        def arguments(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.arguments
+
+        def make_key(values):
+            suffix = key.format(**values) if key is not None else ':'.join(map(str, values.values()))
+            return f"{prefix}:{suffix}" if suffix else prefix
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            values = arguments(args, kwargs)
+            return get_or_compute(
+                make_key(values),
+                lambda: func(*args, **kwargs),
+                ttl,
+                [tag.format(**values) for tag in tags]
+            )
+
+        def invalidate(*args, **kwargs):
+            cache_key = make_key(arguments(args, kwargs))
+            _l2().delete(cache_key)
+            local.delete(cache_key)
+
+        wrapper.invalidate = invalidate
+        return wrapper
+    return decorator
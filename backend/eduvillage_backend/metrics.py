@@ -0,0 +1,215 @@
+"""
+Prometheus Metrics
+
+Instrumentation for the hot paths, exposed in the Prometheus text format
+at /metrics:
+
+- eduvillage_http_request_duration_seconds{view, method, status}:
+  latency histogram per URL name (e.g. student-progress,
+  course-submissions). Unnamed routes use their pattern, so labels stay
+  bounded
+- eduvillage_db_queries_per_request{view} and
+  eduvillage_db_query_seconds_per_request{view}: query count and total
+  query time of each request
+- eduvillage_cache_requests_total{group, result}: hits and misses, with
+  keys grouped by their first two segments (auth:user, exam:attempt)
+  through the Instrumented*Cache backends
+- eduvillage_certificate_render_seconds: certificate PDF generation
+- eduvillage_upload_bytes_total{view}: multipart request bytes, so
+  rate() gives upload bandwidth per endpoint
+
+Under gunicorn, each worker keeps its own values. Set
+PROMETHEUS_MULTIPROC_DIR to an empty directory before the workers start
+(gunicorn.conf.py does this and cleans up after dead workers). /metrics
+then sums the values of every worker. Without it, as under runserver,
+/metrics reports the current process only.
+
+If METRICS_TOKEN is set, /metrics requires `Authorization: Bearer <token>`.
+"""
+
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+
+REQUEST_DURATION = Histogram(
+    'eduvillage_http_request_duration_seconds',
+    "Request latency by view",
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+QUERIES_PER_REQUEST = Histogram(
+    'eduvillage_db_queries_per_request',
+    "Database queries per request by view",
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+QUERY_SECONDS_PER_REQUEST = Histogram(
+    'eduvillage_db_query_seconds_per_request',
+    "Time spent in database queries per request by view",
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+CACHE_REQUESTS = Counter(
+    'eduvillage_cache_requests',
+    "Cache lookups by key group and result",
+    ['group', 'result'],
+)
+CERTIFICATE_RENDER_SECONDS = Histogram(
+    'eduvillage_certificate_render_seconds',
+    "Certificate PDF generation time",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+UPLOAD_BYTES = Counter(
+    'eduvillage_upload_bytes',
+    "Bytes received in multipart uploads by view",
+    ['view'],
+)
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.route or 'unnamed'
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set per request. Context variables follow the request into the threads
+# where async views run their queries, which per-connection wrappers don't
+_queries = ContextVar('metrics_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    queries = _queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.count += 1
+        queries.seconds += time.perf_counter() - start
+
+
+def install(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install)
+
+
+class MetricsMiddleware:
+    """Per-view latency and query metrics. Place it near the top of MIDDLEWARE."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries = _QueryCounter()
+        token = _queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = _QueryCounter()
+        token = _queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, time.perf_counter() - start, queries)
+        return response
+
+    def observe(self, request, response, elapsed, queries):
+        view = view_label(request)
+        REQUEST_DURATION.labels(view, request.method, response.status_code).observe(elapsed)
+        QUERIES_PER_REQUEST.labels(view).observe(queries.count)
+        QUERY_SECONDS_PER_REQUEST.labels(view).observe(queries.seconds)
+        if request.content_type == 'multipart/form-data':
+            try:
+                UPLOAD_BYTES.labels(view).inc(int(request.META.get('CONTENT_LENGTH') or 0))
+            except ValueError:
+                pass
+
+
+def _key_group(key):
+    return ':'.join(str(key).split(':')[:2])
+
+
+class CacheMetricsMixin:
+    """
+    Count hits and misses of get(). BaseCache.get_many() and get_or_set()
+    go through get(), so they are counted too.
+    """
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        if value is self._missing:
+            CACHE_REQUESTS.labels(_key_group(key), 'miss').inc()
+            return default
+        CACHE_REQUESTS.labels(_key_group(key), 'hit').inc()
+        return value
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(CacheMetricsMixin, RedisCache):
+    def get_many(self, keys, version=None):
+        # Redis fetches many keys in one command, bypassing get()
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        for key in keys:
+            CACHE_REQUESTS.labels(_key_group(key), 'hit' if key in found else 'miss').inc()
+        return found
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    if TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, TOKEN):
+            return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
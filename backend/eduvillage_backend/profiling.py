@@ -0,0 +1,370 @@
+"""
+Per-request Profiling
+
+ProfilingMiddleware captures one request at a time when either:
+
+- sampling is switched on by an admin (views in apps/dashboard); a
+  sample_rate fraction of requests under an optional path prefix is
+  captured until the expiry time
+- the request carries an `X-Profile` header holding a token from the
+  admin token endpoint, signed with SECRET_KEY and valid for
+  PROFILING_TOKEN_MAX_AGE seconds
+
+A capture holds a cProfile of the rest of the middleware stack and the
+view, every SQL query with its duration, and the tracemalloc peak while
+the request ran. The peak is process-wide, so concurrent requests add to
+it. Captures go to PROFILING_DIR as <id>.json (summary and queries) plus
+<id>.prof (pstats, for snakeviz or pstats.Stats). Only the newest
+PROFILING_MAX_CAPTURES are kept. Profiled responses carry an
+`X-Profile-Id` header.
+
+One request per process is profiled at a time; requests arriving on other
+threads meanwhile are served unprofiled, since only one cProfile profiler
+can be active at once on Python 3.12+. Under ASGI the cProfile part also
+covers other requests handled on the event loop meanwhile.
+
+The switch lives in PROFILING_DIR/config.json, so every worker on the
+host sees it. Workers re-read it at most every PROFILING_REFRESH_INTERVAL
+seconds. When profiling is off, a request costs one time check and one
+header lookup.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db.backends.signals import connection_created
+
+PROFILING_DIR = str(getattr(settings, 'PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'eduvillage', 'profiles')))
+MAX_CAPTURES = getattr(settings, 'PROFILING_MAX_CAPTURES', 200)
+REFRESH_INTERVAL = getattr(settings, 'PROFILING_REFRESH_INTERVAL', 5)
+TOKEN_MAX_AGE = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+# Queries kept per capture; the totals still count every query
+MAX_QUERIES = getattr(settings, 'PROFILING_MAX_QUERIES', 1000)
+TOP_FUNCTIONS = 40
+
+HEADER = 'HTTP_X_PROFILE'
+TOKEN_SALT = 'eduvillage.profiling'
+CONFIG_FILE = 'config.json'
+# Capture ids as Capture makes them; nothing else in PROFILING_DIR is served
+CAPTURE_ID = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+
+class ProfilingConfig:
+    """The sampling switch, cached per process."""
+
+    def __init__(self):
+        self._config = {}
+        self._mtime = None
+        self._next_check = 0.0
+
+    def _path(self):
+        return os.path.join(PROFILING_DIR, CONFIG_FILE)
+
+    def _load(self):
+        try:
+            mtime = os.stat(self._path()).st_mtime
+        except OSError:
+            self._config, self._mtime = {}, None
+            return
+        if mtime != self._mtime:
+            try:
+                with open(self._path()) as f:
+                    self._config = json.load(f)
+            except (OSError, ValueError):
+                self._config = {}
+            self._mtime = mtime
+
+    def get(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + REFRESH_INTERVAL
+            self._load()
+        return self._config
+
+    def active(self):
+        config = self.get()
+        return bool(config.get('enabled')) and config.get('expires_at', 0) > time.time()
+
+    def sampled(self, path):
+        config = self.get()
+        if not path.startswith(config.get('path_prefix') or '/'):
+            return False
+        return random.random() < config.get('sample_rate', 0)
+
+    def save(self, config):
+        """Write the switch for every worker; this process applies it at once."""
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        tmp = f"{self._path()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(config, f)
+        os.replace(tmp, self._path())
+        self._next_check = 0.0
+
+
+config = ProfilingConfig()
+
+
+def make_token(user_id):
+    """An X-Profile header value issued by admin `user_id`."""
+    return signing.dumps({'issued_by': user_id}, salt=TOKEN_SALT)
+
+
+def read_token(token):
+    """The token's payload, or None if it is forged or expired."""
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+class QueryLog:
+    """execute_wrapper that records each query and its time."""
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({
+                    'db': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'ms': round(elapsed * 1000, 3),
+                })
+
+
+# The capture's QueryLog. Context variables follow the request into the
+# threads where async views run their queries
+_query_log = ContextVar('profiling_query_log', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    log = _query_log.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    return log(execute, sql, params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+connection_created.connect(install)
+
+
+# tracemalloc is process-wide; overlapping captures share one session
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+        tracemalloc.reset_peak()
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+    return peak
+
+
+def _top_functions(profile):
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{filename}:{line}({name})",
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def _prune():
+    captures = sorted(name for name in os.listdir(PROFILING_DIR) if name.endswith('.json') and name != CONFIG_FILE)
+    for name in captures[:-MAX_CAPTURES]:
+        capture_id = name[:-len('.json')]
+        for suffix in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(PROFILING_DIR, capture_id + suffix))
+            except OSError:
+                pass
+
+
+def _save(capture_id, summary, profile):
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    profile.dump_stats(os.path.join(PROFILING_DIR, f"{capture_id}.prof"))
+    # The .json appears last, so listed captures are complete
+    tmp = os.path.join(PROFILING_DIR, f"{capture_id}.json.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(summary, f)
+    os.replace(tmp, os.path.join(PROFILING_DIR, f"{capture_id}.json"))
+    _prune()
+
+
+def capture_path(capture_id, suffix):
+    """Path of a stored capture file, or None for ids that aren't ours."""
+    if not CAPTURE_ID.fullmatch(capture_id):
+        return None
+    path = os.path.join(PROFILING_DIR, capture_id + suffix)
+    return path if os.path.exists(path) else None
+
+
+def list_captures():
+    """Summaries of stored captures without their query lists, newest first."""
+    if not os.path.isdir(PROFILING_DIR):
+        return []
+    captures = []
+    for name in sorted(os.listdir(PROFILING_DIR), reverse=True):
+        if not name.endswith('.json') or name == CONFIG_FILE:
+            continue
+        try:
+            with open(os.path.join(PROFILING_DIR, name)) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summary.pop('queries', None)
+        summary.pop('functions', None)
+        captures.append(summary)
+    return captures
+
+
+class Capture:
+    """One profiled request."""
+
+    def __init__(self, trigger):
+        # Sortable by time, so pruning keeps the newest
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.trigger = trigger
+        self.log = QueryLog()
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        _start_tracing()
+        self.started = time.perf_counter()
+        self.token = _query_log.set(self.log)
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        _query_log.reset(self.token)
+        self.elapsed = time.perf_counter() - self.started
+        self.peak = _stop_tracing()
+
+    def save(self, request, response):
+        summary = {
+            'id': self.id,
+            **self.trigger,
+            'captured_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+            'status': response.status_code,
+            'duration_ms': round(self.elapsed * 1000, 3),
+            'query_count': self.log.count,
+            'query_ms': round(self.log.total * 1000, 3),
+            'peak_memory_kb': round(self.peak / 1024, 1),
+            'queries': self.log.queries,
+            'functions': _top_functions(self.profile),
+        }
+        try:
+            _save(self.id, summary, self.profile)
+        except OSError:
+            return response
+        response['X-Profile-Id'] = self.id
+        return response
+
+
+# One capture per process: Python 3.12+ allows a single active cProfile
+# profiler, and async requests share the event loop's thread anyway
+_capturing = threading.Lock()
+
+
+class ProfilingMiddleware:
+    """Profile sampled or explicitly requested requests. See module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def trigger(self, request):
+        """The capture's trigger fields, or None to serve the request unprofiled."""
+        token = request.META.get(HEADER)
+        if token is None and not config.active():
+            return None
+        if token is not None:
+            payload = read_token(token)
+            return None if payload is None else {'trigger': 'header', **payload}
+        if not config.sampled(request.path):
+            return None
+        return {'trigger': 'sample'}
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        trigger = self.trigger(request)
+        if trigger is None or not _capturing.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            capture = Capture(trigger)
+            capture.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                capture.stop()
+        finally:
+            _capturing.release()
+        return capture.save(request, response)
+
+    async def __acall__(self, request):
+        trigger = self.trigger(request)
+        if trigger is None or not _capturing.acquire(blocking=False):
+            return await self.get_response(request)
+        try:
+            capture = Capture(trigger)
+            capture.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                capture.stop()
+        finally:
+            _capturing.release()
+        return await sync_to_async(capture.save)(request, response)
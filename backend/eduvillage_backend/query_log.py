@@ -0,0 +1,291 @@
+"""
+Slow-query Log
+
+Every database connection gets an execute_wrapper, added when the
+connection opens. It does two things with each query:
+
+- Queries slower than SLOW_QUERY_THRESHOLD_MS are logged to the
+  `eduvillage.slow_queries` logger. The entry has the normalized SQL,
+  parameter count, duration, the view (URL name) and the first line of
+  project code on the stack.
+- Every query is added to per-minute totals keyed by normalized SQL.
+  Literals become ?, and IN lists and multi-row VALUES collapse to
+  (...), so the same statement with different values is one entry.
+
+Each worker writes its totals for the last QUERY_STATS_WINDOW_MINUTES and
+its recent slow queries to QUERY_STATS_DIR/<pid>.json every
+QUERY_STATS_FLUSH_INTERVAL seconds. report() merges the files of every
+worker on the host and ranks statements by total time.
+`manage.py query_report` and api/dashboard/admin/queries/ show it.
+
+The wrapper is installed once this module is imported, which
+QueryLogMiddleware does for web workers. Management commands are not
+covered.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from apps.courses.background import start_periodic
+
+from .metrics import view_label
+
+logger = logging.getLogger('eduvillage.slow_queries')
+
+THRESHOLD = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100) / 1000
+WINDOW_MINUTES = getattr(settings, 'QUERY_STATS_WINDOW_MINUTES', 60)
+FLUSH_INTERVAL = getattr(settings, 'QUERY_STATS_FLUSH_INTERVAL', 30)
+STATS_DIR = str(getattr(settings, 'QUERY_STATS_DIR', os.path.join(tempfile.gettempdir(), 'eduvillage', 'query_stats')))
+# Distinct statements tracked per minute; the rest are counted as OTHER
+MAX_STATEMENTS = 2000
+RECENT_SLOW = 100
+OTHER = '<other statements>'
+
+PROJECT_DIR = str(settings.BASE_DIR) + os.sep
+OWN_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+_request = ContextVar('query_log_request', default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize(sql):
+    """'... WHERE id IN (%s, %s) AND x = 5' -> '... WHERE id IN (...) AND x = ?'"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    sql = _LISTS.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def call_site():
+    """'apps/courses/views.py:123 in teacher_course_submissions', or None."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(PROJECT_DIR) and not filename.startswith(OWN_DIR)
+                and 'site-packages' not in filename):
+            return f"{filename[len(PROJECT_DIR):]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryStats:
+    """Per-minute totals for this process: {minute: {sql: [calls, seconds, max]}}."""
+
+    def __init__(self):
+        self._minutes = {}
+        self._slow = []
+        self._lock = threading.Lock()
+
+    def add(self, sql, elapsed):
+        minute = int(time.time() // 60)
+        with self._lock:
+            statements = self._minutes.get(minute)
+            if statements is None:
+                statements = self._minutes[minute] = {}
+            entry = statements.get(sql)
+            if entry is None:
+                if len(statements) >= MAX_STATEMENTS:
+                    sql = OTHER
+                entry = statements.setdefault(sql, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    def add_slow(self, record):
+        with self._lock:
+            self._slow.append(record)
+            del self._slow[:-RECENT_SLOW]
+
+    def snapshot(self):
+        oldest = int(time.time() // 60) - WINDOW_MINUTES
+        with self._lock:
+            for minute in [minute for minute in self._minutes if minute <= oldest]:
+                del self._minutes[minute]
+            return {
+                'pid': os.getpid(),
+                'minutes': {
+                    str(minute): {sql: list(entry) for sql, entry in statements.items()}
+                    for minute, statements in self._minutes.items()
+                },
+                'slow': list(self._slow),
+            }
+
+
+stats = QueryStats()
+
+
+def _path(pid):
+    return os.path.join(STATS_DIR, f"{pid}.json")
+
+
+def flush():
+    """Write this worker's totals for report() in other processes."""
+    os.makedirs(STATS_DIR, exist_ok=True)
+    tmp = _path(os.getpid()) + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(stats.snapshot(), f)
+    os.replace(tmp, _path(os.getpid()))
+
+
+def log_queries(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        normalized = normalize(sql)
+        stats.add(normalized, elapsed)
+        if elapsed >= THRESHOLD:
+            _log_slow(normalized, params, many, context, elapsed)
+        start_periodic("query-stats-flusher", FLUSH_INTERVAL, flush)
+
+
+def _log_slow(sql, params, many, context, elapsed):
+    request = _request.get()
+    params = list(params or ())
+    record = {
+        'ts': time.time(),
+        'at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'ms': round(elapsed * 1000, 3),
+        'sql': sql,
+        'params': len(params[0]) if many and params else len(params),
+        'rows': len(params) if many else None,
+        'db': context['connection'].alias,
+        'view': view_label(request) if request is not None else threading.current_thread().name,
+        'source': call_site(),
+    }
+    stats.add_slow(record)
+    logger.warning(
+        "Slow query %.1f ms in %s at %s: %s",
+        record['ms'], record['view'], record['source'], sql, extra={'query': record}
+    )
+
+
+def install(sender, connection, **kwargs):
+    if log_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_queries)
+
+
+connection_created.connect(install)
+
+
+class QueryLogMiddleware:
+    """Makes the request's view name available to the slow-query log."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
+
+
+def report(minutes=WINDOW_MINUTES, top=20, order='total'):
+    """
+    Statements ranked across every worker on this host.
+
+    Args:
+        minutes (int): How far back to look, at most QUERY_STATS_WINDOW_MINUTES
+        top (int): Number of statements to return
+        order (str): 'total', 'calls', 'mean' or 'max'
+
+    Returns:
+        dict: {'statements': [...], 'slow': [...recent slow queries...], 'workers': n}
+    """
+    snapshots = {}
+    if os.path.isdir(STATS_DIR):
+        stale = time.time() - WINDOW_MINUTES * 60
+        for name in os.listdir(STATS_DIR):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(STATS_DIR, name)
+            try:
+                if os.path.getmtime(path) < stale:
+                    # A worker that has exited
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots[snapshot['pid']] = snapshot
+    # This process's own totals are newer than its last flush
+    own = stats.snapshot()
+    if own['minutes'] or own['slow']:
+        snapshots[os.getpid()] = own
+
+    since = int(time.time() // 60) - min(minutes, WINDOW_MINUTES)
+    totals = {}
+    for snapshot in snapshots.values():
+        for minute, statements in snapshot['minutes'].items():
+            if int(minute) <= since:
+                continue
+            for sql, (calls, seconds, longest) in statements.items():
+                entry = totals.setdefault(sql, [0, 0.0, 0.0])
+                entry[0] += calls
+                entry[1] += seconds
+                entry[2] = max(entry[2], longest)
+
+    grand_total = sum(seconds for _, seconds, _ in totals.values()) or 1
+    statements = [
+        {
+            'sql': sql,
+            'calls': calls,
+            'total_ms': round(seconds * 1000, 3),
+            'mean_ms': round(seconds / calls * 1000, 3),
+            'max_ms': round(longest * 1000, 3),
+            'share': round(seconds / grand_total, 4),
+        }
+        for sql, (calls, seconds, longest) in totals.items()
+    ]
+    key = {'total': 'total_ms', 'calls': 'calls', 'mean': 'mean_ms', 'max': 'max_ms'}[order]
+    statements.sort(key=lambda row: row[key], reverse=True)
+
+    slow = sorted(
+        (
+            record for snapshot in snapshots.values() for record in snapshot['slow']
+            if record['ts'] > (since + 1) * 60
+        ),
+        key=lambda record: record['ts'], reverse=True
+    )
+    return {'statements': statements[:top], 'slow': slow[:RECENT_SLOW], 'workers': len(snapshots)}
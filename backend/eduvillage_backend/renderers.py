@@ -0,0 +1,35 @@
+"""
+orjson-backed JSON renderer for DRF.
+
+A drop-in replacement for rest_framework.renderers.JSONRenderer that is
+several times faster on large list responses. Datetimes render as DRF
+renders them with TIME_ZONE = 'UTC' ("...Z"); anything orjson can't
+serialize natively (Decimal, lazy strings, querysets...) goes through
+DRF's own JSONEncoder. Non-string dict keys (e.g. answers keyed by
+question id) become strings, as the json module makes them.
+"""
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_fallback = JSONEncoder()
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = OPTIONS
+        # The browsable API asks for indented output
+        if (renderer_context or {}).get('indent') or 'indent=' in (accepted_media_type or ''):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_fallback.default, option=options)
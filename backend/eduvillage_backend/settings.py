@@ -3,6 +3,7 @@
 This is intentionally minimal: default files only, no models or apps added.
 """
 import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
     'apps.enrollments',
     'apps.dashboard',
     'apps.notifications',
+    'apps.assessments',
     'corsheaders',
 
 ]
@@ -34,7 +36,16 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.ClaimsJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'eduvillage_backend.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'eduvillage_backend.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
@@ -42,19 +53,179 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.CustomTokenRefreshSerializer',
 }
 
+# How long role/is_active claims in access tokens, and the cached user
+# snapshot that replaces them afterwards, may be trusted. Bounds how long a
+# blocked user keeps access
+AUTH_USER_SNAPSHOT_TTL = 30
+
+# How often each worker fetches new token revocations (blocked users,
+# role changes), i.e. how long a revocation takes to apply everywhere
+TOKEN_REVOCATION_REFRESH_INTERVAL = 2
+
+# Bulk CSV user import (apps/users/bulk_import.py). Uploads may contain
+# passwords, so they are kept outside MEDIA_ROOT and removed once imported
+USER_IMPORT_DIR = BASE_DIR / 'imports'
+USER_IMPORT_CHUNK_SIZE = 1000
+USER_IMPORT_HASH_WORKERS = None  # password hashing processes; None = one per CPU
+
+# Per-process cache unless REDIS_URL is set. Django's default MAX_ENTRIES
+# (300) is far too small for exam session state and culls live entries under
+# load. Write-behind buffers and the two-tier cache need the shared Redis
+# backend once there is more than one worker. The Instrumented* backends count
+# hits and misses for /metrics (eduvillage_backend/metrics.py)
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'eduvillage_backend.metrics.InstrumentedRedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'eduvillage_backend.metrics.InstrumentedLocMemCache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 100000,
+            },
+        }
+    }
+
+# Two-tier cache for @cached (eduvillage_backend/caching.py): an LRU per
+# process in front of the CACHE_L2_ALIAS cache, with single-flight refresh
+CACHE_L2_ALIAS = 'default'
+CACHE_L1_MAX_ENTRIES = 10000
+CACHE_L1_TTL = 5  # seconds; bounds how stale other workers' copies can be
+CACHE_STALE_GRACE = 60  # seconds expired values are served during a refresh
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 5
+
+# Exam sessions: autosaves are buffered in the cache and flushed in batches.
+# Attempt state and its locks live in CACHES, so every worker must share it
+# (REDIS_URL); with the per-process cache, workers would accept saves after
+# another one scored the attempt. The exam endpoints answer 503 unless
+# REDIS_URL is set or DEBUG runs a single development server
+EXAM_SESSIONS_ENABLED = bool(REDIS_URL) or DEBUG
+EXAM_AUTOSAVE_FLUSH_INTERVAL = 5  # seconds
+EXAM_AUTOSAVE_BATCH_SIZE = 1000
+EXAM_DEADLINE_GRACE_SECONDS = 10
+
+# Content completion write-behind: when enabled, mark_content_complete queues
+# completions and they are upserted in batches every PROGRESS_FLUSH_INTERVAL.
+# Use a shared CACHES backend so every worker sees pending completions.
+PROGRESS_WRITE_BEHIND = False
+PROGRESS_FLUSH_INTERVAL = 2  # seconds
+PROGRESS_FLUSH_BATCH_SIZE = 1000
+
+# Bitmap-encoded progress (apps/courses/progress_bitmaps.py). Switch writes
+# on, backfill with `manage.py migrate_progress_bitmaps`, then switch reads on
+PROGRESS_BITMAP_WRITES = False
+PROGRESS_BITMAP_READS = False
+
+# Video heartbeats: furthest position per (student, video) is kept in memory
+# and flushed periodically; videos past the threshold are marked completed
+VIDEO_HEARTBEAT_FLUSH_INTERVAL = 10  # seconds
+VIDEO_HEARTBEAT_BATCH_SIZE = 1000
+VIDEO_HEARTBEAT_MAX_BATCH = 500  # heartbeats per request
+VIDEO_COMPLETE_THRESHOLD = 90  # percent watched
+
+# Background worker pool for media processing, per process. Jobs beyond the
+# queue size stay pending for the sweeper management commands
+BACKGROUND_WORKERS = 2
+BACKGROUND_QUEUE_SIZE = 50
+
+# Deleted courses/users are purged in transactions of this many rows
+# (apps/courses/deletion.py)
+DELETION_BATCH_SIZE = 1000
+
+# HLS transcoding of uploaded videos
+FFMPEG_BINARY = 'ffmpeg'
+FFPROBE_BINARY = 'ffprobe'
+HLS_SEGMENT_SECONDS = 6
+# Videos left 'processing' this long (worker killed mid-job) are transcoded again
+TRANSCODE_STALE_AFTER = 3 * 60 * 60
+
+# PDF/document previews (poppler, qpdf, LibreOffice)
+PDFTOPPM_BINARY = 'pdftoppm'
+PDFINFO_BINARY = 'pdfinfo'
+PDFTOTEXT_BINARY = 'pdftotext'
+QPDF_BINARY = 'qpdf'
+SOFFICE_BINARY = 'soffice'
+PREVIEW_THUMBNAIL_WIDTH = 480
+# Items left 'processing' this long (worker killed mid-job) are rendered again
+PREVIEW_STALE_AFTER = 30 * 60
+
+# Course search (SQLite FTS5 in development, PostgreSQL tsvector in production)
+SEARCH_PG_CONFIG = 'english'
+SEARCH_MAX_TEXT_CHARS = 100000
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+# Queries are ranked among their newest N matches; totals are capped at N
+SEARCH_MAX_CANDIDATES = 2000
+
+# Response compression (eduvillage_backend/compression.py). zstd and br need
+# the zstandard / brotli packages; `manage.py bench_compression` compares levels
+COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+COMPRESSION_ZSTD_LEVEL = 3
+COMPRESSION_BROTLI_QUALITY = 4
+COMPRESSION_GZIP_LEVEL = 6
+# Below about one TCP segment compression saves no round trips
+COMPRESSION_MIN_SIZE = 1024
+
+# Files written at runtime per host (query stats, profiles) live outside
+# the source tree
+RUNTIME_DIR = Path(os.environ.get('EDUVILLAGE_RUNTIME_DIR', Path(tempfile.gettempdir()) / 'eduvillage'))
+
+# Per-request profiling (eduvillage_backend/profiling.py), switched on by
+# admins at runtime. Captures are kept per host in a ring of this many
+PROFILING_DIR = RUNTIME_DIR / 'profiles'
+PROFILING_MAX_CAPTURES = 200
+PROFILING_REFRESH_INTERVAL = 5
+PROFILING_TOKEN_MAX_AGE = 3600
+
+# Bearer token Prometheus must send to scrape /metrics; None leaves it open
+# (restrict it at the proxy instead)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Slow-query log and per-statement totals (eduvillage_backend/query_log.py)
+SLOW_QUERY_THRESHOLD_MS = 100
+QUERY_STATS_WINDOW_MINUTES = 60
+QUERY_STATS_FLUSH_INTERVAL = 30
+QUERY_STATS_DIR = RUNTIME_DIR / 'query_stats'
+
+# Content drop-off funnels (apps/courses/funnel.py) are kept as cached
+# counters and recounted from the database at least this often (seconds)
+FUNNEL_REBUILD_INTERVAL = 6 * 60 * 60
+
+# Co-enrollment recommendations (apps/enrollments/recommendations.py),
+# rebuilt by `manage.py build_recommendations`: similar courses kept per
+# course, and the fewest shared students for a pair to count
+RECOMMENDATIONS_TOP_K = 20
+RECOMMENDATIONS_MIN_CO_ENROLLED = 2
+
+# Daily per-course rollups (apps/dashboard/rollups.py). Each run recounts
+# from this many seconds before the previous one, for late-committed rows
+ANALYTICS_ROLLUP_LAG = 15 * 60
+# Longest time series the dashboards serve
+ANALYTICS_MAX_DAYS = 730
+
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'eduvillage_backend.metrics.MetricsMiddleware',
+    'eduvillage_backend.query_log.QueryLogMiddleware',
+    'eduvillage_backend.profiling.ProfilingMiddleware',
+    'eduvillage_backend.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
 ]
 
 ROOT_URLCONF = 'eduvillage_backend.urls'
@@ -76,6 +247,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'eduvillage_backend.wsgi.application'
+ASGI_APPLICATION = 'eduvillage_backend.asgi.application'
 
 DATABASES = {
     'default': {
@@ -98,6 +270,13 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Signed, expiring URLs for protected media (see apps/courses/signed_media.py)
+MEDIA_SIGNING_KEY = os.environ.get('MEDIA_SIGNING_KEY', SECRET_KEY)
+MEDIA_URL_SIGNATURE = 'hmac'  # or 'secure_link' to verify with nginx secure_link_md5
+MEDIA_URL_TTL = 60 * 60
+MEDIA_URL_EXPIRY_STEP = 5 * 60
+MEDIA_PROTECTED_PREFIXES = ('course_content/', 'submissions/', 'certificates/', 'hls/', 'previews/')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
@@ -0,0 +1,255 @@
+import datetime
+import decimal
+import gzip
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import ResolverMatch
+
+from . import caching, compression, metrics, profiling, query_log
+from .renderers import ORJSONRenderer
+
+
+class CachingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        caching.local.clear()
+        self.addCleanup(caching.local.clear)
+        self.calls = 0
+
+    def compute(self, value='value'):
+        self.calls += 1
+        return value
+
+    def test_l1_entries_expire(self):
+        lru = caching.LRUCache(max_entries=2, ttl=5)
+        entry = caching.Entry('value', 100, 0, ())
+        lru.set('a', entry, (), now=0)
+        self.assertEqual(lru.get('a', now=5), entry)
+        self.assertIsNone(lru.get('a', now=6))
+
+        for key in 'abc':
+            lru.set(key, entry, (), now=0)
+        self.assertIsNone(lru.get('a', now=0))
+        self.assertEqual(lru.get('c', now=0), entry)
+
+    def test_tag_invalidation(self):
+        @caching.cached(ttl=60, tags=['course:{course_id}'])
+        def title(course_id):
+            return self.compute(f"title {course_id}")
+
+        self.assertEqual((title(1), title(1), title(2)), ('title 1', 'title 1', 'title 2'))
+        self.assertEqual(self.calls, 2)
+
+        caching.invalidate_tags('course:1')
+        self.assertEqual((title(1), title(2)), ('title 1', 'title 2'))
+        self.assertEqual(self.calls, 3)
+
+        # Another worker bumps the tag; once this worker's L1 copy is gone
+        # the L2 entry doesn't match the new version
+        cache.set(caching._tag_key('course:2'), caching._new_version(), None)
+        caching.local.clear()
+        title(2)
+        self.assertEqual(self.calls, 4)
+
+    def test_single_flight(self):
+        start = threading.Barrier(8)
+        results = []
+
+        def slow():
+            time.sleep(0.2)
+            return self.compute()
+
+        def read():
+            start.wait()
+            results.append(caching.get_or_compute('single-flight', slow, ttl=60))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_served_while_another_worker_refreshes(self):
+        caching.get_or_compute('report', lambda: self.compute('old'), ttl=60)
+        # Expired, but still within the grace period
+        expired = caching.Entry('old', time.time() - 1, 0.0, ())
+        cache.set('report', tuple(expired), caching.STALE_GRACE)
+        caching.local.clear()
+
+        cache.add('report:lock', 1)
+        self.assertEqual(caching.get_or_compute('report', lambda: self.compute('new'), ttl=60), 'old')
+        self.assertEqual(self.calls, 1)
+
+        cache.delete('report:lock')
+        self.assertEqual(caching.get_or_compute('report', lambda: self.compute('new'), ttl=60), 'new')
+        self.assertEqual(self.calls, 2)
+
+
+class CompressionTests(SimpleTestCase):
+    def test_choose_encoding(self):
+        cases = [
+            ('gzip, br', 'br'),
+            ('gzip;q=1.0, br;q=0.5', 'gzip'),
+            ('*', 'zstd'),
+            ('*, zstd;q=0', 'br'),
+            ('gzip;q=0', None),
+            ('identity', None),
+            ('', None),
+        ]
+        with mock.patch.object(compression, 'AVAILABLE', ('zstd', 'br', 'gzip')):
+            for header, expected in cases:
+                self.assertEqual(compression.choose_encoding(header), expected, header)
+
+    def respond(self, body, content_type='application/json', **headers):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = HttpResponse(body, content_type=content_type, headers=headers)
+        with mock.patch.object(compression, 'AVAILABLE', ('gzip',)):
+            return compression.CompressionMiddleware(lambda request: response)(request)
+
+    def test_compresses_large_json(self):
+        body = b'{"id": 1, "title": "Course"}' * 100
+        response = self.respond(body, ETag='"abc"')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+        response = self.respond(body, ETag='W/"abc"')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_skips_small_and_compressed_bodies(self):
+        small = self.respond(b'{}' * 10)
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertFalse(small.has_header('Vary'))
+
+        image = self.respond(b'x' * 10000, content_type='image/png', ETag='"abc"')
+        self.assertFalse(image.has_header('Content-Encoding'))
+        self.assertEqual(image['ETag'], '"abc"')
+
+        svg = self.respond(b'<svg/>' * 1000, content_type='image/svg+xml')
+        self.assertEqual(svg['Content-Encoding'], 'gzip')
+
+
+class MetricsTests(SimpleTestCase):
+    def scrape(self, **headers):
+        return metrics.metrics_view(RequestFactory().get('/metrics', headers=headers))
+
+    def test_token_is_required_when_set(self):
+        with mock.patch.object(metrics, 'TOKEN', 'secret'):
+            self.assertEqual(self.scrape().status_code, 403)
+            self.assertEqual(self.scrape(Authorization='Bearer wrong').status_code, 403)
+            response = self.scrape(Authorization='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'eduvillage_http_request_duration_seconds', response.content)
+
+        with mock.patch.object(metrics, 'TOKEN', None):
+            self.assertEqual(self.scrape().status_code, 200)
+
+    def test_view_label(self):
+        request = RequestFactory().get('/api/courses/1/')
+        self.assertEqual(metrics.view_label(request), 'unmatched')
+
+        request.resolver_match = ResolverMatch(lambda r: None, (), {}, url_name='course-detail', route='api/courses/<int:pk>/')
+        self.assertEqual(metrics.view_label(request), 'course-detail')
+
+        # Unnamed routes use their pattern, not the path, so ids don't become labels
+        request.resolver_match = ResolverMatch(lambda r: None, (), {}, route='api/courses/<int:pk>/')
+        self.assertEqual(metrics.view_label(request), 'api/courses/<int:pk>/')
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_normalize(self):
+        cases = [
+            ('SELECT * FROM "courses_course" WHERE "id" IN (%s, %s, %s)',
+             'SELECT * FROM "courses_course" WHERE "id" IN (...)'),
+            ('SELECT * FROM t WHERE id IN (1, 2) AND x = 5 LIMIT 21',
+             'SELECT * FROM t WHERE id IN (...) AND x = ? LIMIT ?'),
+            ('INSERT INTO t ("a", "b") VALUES (%s, %s), (%s, %s),\n (%s, %s)',
+             'INSERT INTO t ("a", "b") VALUES (...)'),
+            ("SELECT * FROM t WHERE name = 'O''Brien' OR name = 'x, y'",
+             'SELECT * FROM t WHERE name = ? OR name = ?'),
+            # Digits inside identifiers stay
+            ('SELECT "t1"."col2" FROM t1 WHERE t1.x = -3.5',
+             'SELECT "t1"."col2" FROM t1 WHERE t1.x = ?'),
+        ]
+        for sql, expected in cases:
+            self.assertEqual(query_log.normalize(sql), expected, sql)
+
+        self.assertEqual(
+            query_log.normalize('SELECT 1 WHERE id IN (%s)'),
+            query_log.normalize('SELECT 1 WHERE id IN (%s, %s, %s, %s)')
+        )
+
+
+class ProfilingTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(profiling, 'PROFILING_DIR', directory.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_tokens(self):
+        token = profiling.make_token(7)
+        self.assertEqual(profiling.read_token(token), {'issued_by': 7})
+        self.assertIsNone(profiling.read_token(token + 'x'))
+        with mock.patch.object(profiling, 'TOKEN_MAX_AGE', -1):
+            self.assertIsNone(profiling.read_token(token))
+
+    def request(self, token=None):
+        headers = {} if token is None else {'X-Profile': token}
+        request = RequestFactory().get('/api/courses/', headers=headers)
+        return profiling.ProfilingMiddleware(lambda request: HttpResponse('ok'))(request)
+
+    def test_signed_header_profiles_the_request(self):
+        self.assertFalse(self.request().has_header('X-Profile-Id'))
+        self.assertFalse(self.request('forged').has_header('X-Profile-Id'))
+
+        capture_id = self.request(profiling.make_token(7))['X-Profile-Id']
+        self.assertRegex(capture_id, profiling.CAPTURE_ID)
+        summary = profiling.list_captures()[0]
+        self.assertEqual(
+            (summary['id'], summary['trigger'], summary['issued_by'], summary['path']),
+            (capture_id, 'header', 7, '/api/courses/')
+        )
+        self.assertIsNotNone(profiling.capture_path(capture_id, '.prof'))
+
+    def test_capture_path_only_serves_captures(self):
+        profiling.config.save({'enabled': False})
+        self.addCleanup(profiling.config.save, {})
+        self.assertTrue(os.path.exists(os.path.join(profiling.PROFILING_DIR, 'config.json')))
+
+        for capture_id in ('config', '../profiles/config', '20260310-120000-abcdef12\n', '20260310-120000-ABCDEF12'):
+            self.assertIsNone(profiling.capture_path(capture_id, '.json'), capture_id)
+        self.assertIsNone(profiling.capture_path('20260310-120000-abcdef12', '.json'))
+
+
+class RendererTests(SimpleTestCase):
+    def test_render(self):
+        data = {
+            'answers': {12: 3, 13: None},
+            'scores': np.array([1, 2], dtype=np.int16),
+            'submitted_at': datetime.datetime(2026, 3, 10, 12, 0, tzinfo=datetime.timezone.utc),
+            'grade': decimal.Decimal('4.50'),
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            b'{"answers":{"12":3,"13":null},"scores":[1,2],'
+            b'"submitted_at":"2026-03-10T12:00:00Z","grade":4.5}'
+        )
+        self.assertEqual(ORJSONRenderer().render({1: [1]}, 'application/json; indent=4'), b'{\n  "1": [\n    1\n  ]\n}')
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
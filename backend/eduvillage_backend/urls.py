@@ -1,8 +1,11 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from apps.users.views import CustomTokenObtainPairView
+from apps.courses.signed_media import PROTECTED_PREFIXES
+from apps.courses.views import media_auth, serve_signed_media
+from eduvillage_backend.metrics import metrics_view
 
 
 
@@ -24,11 +27,18 @@ urlpatterns += [
     path('api/dashboard/', include('apps.dashboard.urls')),
     path('api/users/', include('apps.users.urls')),
     path('api/notifications/', include('apps.notifications.urls')),
+    path('api/assessments/', include('apps.assessments.urls')),
     path('api/token/', CustomTokenObtainPairView.as_view()),
     path('api/dashboard/', include('apps.dashboard.urls')),
+    path('api/media/auth/', media_auth),
+    path('metrics', metrics_view, name='metrics'),
 
 ]
 
-# Serve media files during development
+# Serve media files during development; protected ones need a signed URL
 if settings.DEBUG:
+    protected = '|'.join(PROTECTED_PREFIXES)
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>(?:{protected}).*)$', serve_signed_media),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration.
+
+    gunicorn -c gunicorn.conf.py eduvillage_backend.wsgi
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker eduvillage_backend.asgi
+
+Workers share Prometheus metrics through PROMETHEUS_MULTIPROC_DIR (see
+eduvillage_backend/metrics.py). It defaults to a directory under the
+system temp dir, which is emptied when gunicorn starts.
+"""
+
+import os
+import shutil
+import tempfile
+
+workers = int(os.environ.get('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+
+# Set before any worker imports prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'eduvillage-metrics'))
+
+
+def on_starting(server):
+    # Values left by a previous run would be added to this one's
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)